@@ -1,29 +1,44 @@
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from src.config.config import get_settings
+from src.utils.logger import configure_logging, setup_logger
+
+_SETTINGS = get_settings()
+
+# Antes de importar el resto de src: sus módulos ya escriben logs al importarse
+configure_logging(_SETTINGS)
+
 from src.config.cors_config import add_cors
+from src.config.compression_config import add_compression
+from src.config.db_config import get_pool_stats
+from src.config.firebase_config import get_firebase_auth
+from src.config.profiling_config import add_profiling
 from src.routes.api.v1 import router as v1_router
-from src.utils.logger import setup_logger
+from src.utils.google_clients import close_http_client
+from src.utils.metrics import MetricsMiddleware, render_metrics
 from src.services.background_service import BackgroundService
 
 logger = setup_logger(__name__, level=logging.INFO)
 
-_SETTINGS = get_settings()
-
 background_service = BackgroundService()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: initialize services
     logger.info("Starting application with Pub/Sub listener...")
-    background_service.start_pubsub_listener()
+    # Firebase se carga al arrancar y no en la primera petición autenticada
+    get_firebase_auth()
+    await background_service.start_pubsub_listener()
+    await background_service.start_expiry_sweeper()
     
     yield  # Application runs here
     
     # Shutdown: cleanup resources
     logger.info("Shutting down application...")
-    background_service.stop_pubsub_listener()
+    await background_service.stop_expiry_sweeper()
+    await background_service.stop_pubsub_listener()
+    await close_http_client()
 
 app = FastAPI(
     title=_SETTINGS.service_name,
@@ -33,6 +48,10 @@ app = FastAPI(
 )
 
 add_cors(app)
+add_compression(app)
+# Dentro de MetricsMiddleware para reutilizar sus estadísticas SQL por petición
+add_profiling(app)
+app.add_middleware(MetricsMiddleware)
 
 # Incluir las rutas
 # app.include_router(v1_router, prefix="/api/v1", tags=["API v1"])
@@ -44,6 +63,17 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/health/db")
+async def database_health_check():
+    """Connection pool usage per engine (primary and read replica)"""
+    return {"pools": get_pool_stats()}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     logger.info("Iniciando la aplicación...")
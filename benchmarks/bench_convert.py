@@ -0,0 +1,159 @@
+"""
+Benchmark for the scrape preprocessing helpers in src/ingestion/convert.py.
+
+Builds a synthetic scrape frame (text columns with missing cells and a few
+lone surrogates, a float score, a datetime column) and times clean_dataframe,
+convert_nan_to_none and convert_nan_to_empty_string against the previous
+cell-by-cell implementations, checking that both give the same result.
+
+Usage:
+    python benchmarks/bench_convert.py --rows 200000
+    python benchmarks/bench_convert.py --rows 200000 --surrogate-rate 0.01 --repeat 5
+"""
+import argparse
+import json
+import platform
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.seed import SOURCES, WORDS
+from benchmarks.support import git_revision
+from src.ingestion.convert import clean_dataframe, convert_nan_to_empty_string, convert_nan_to_none
+
+TEXT_COLUMNS = {"title": 10, "detail": 40, "content": 300, "author": 2, "location": 1}
+
+
+# Implementaciones anteriores (Series.apply celda por celda)
+def previous_nan_to_none(series):
+    return series.apply(lambda x: None if pd.isna(x) else x)
+
+
+def previous_nan_to_empty_string(series):
+    return series.apply(lambda x: "" if pd.isna(x) else x)
+
+
+def previous_clean_dataframe(df):
+    strip = lambda text: re.sub(r'[\ud800-\udfff]', '', text) if isinstance(text, str) else text
+    for col in df.select_dtypes(include=['object']):
+        df[col] = df[col].apply(strip)
+    return df
+
+
+def build_frame(rows, missing_rate, surrogate_rate, seed):
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+
+    def text(words):
+        if rng.random() < missing_rate:
+            return None
+        value = " ".join(rng.choices(WORDS, k=words))
+        if rng.random() < surrogate_rate:
+            position = rng.randrange(len(value))
+            value = value[:position] + "\ud83d" + value[position:]
+        return value
+
+    frame = {name: [text(words) for _ in range(rows)] for name, words in TEXT_COLUMNS.items()}
+    frame["news_source"] = [rng.choice(SOURCES) for _ in range(rows)]
+    frame["source_link"] = [f"https://news.example.com/articulo/{i}" for i in range(rows)]
+    start = datetime(2024, 1, 1)
+    frame["publish_datetime"] = [
+        pd.NaT if rng.random() < missing_rate else start + timedelta(minutes=rng.randrange(525_600))
+        for _ in range(rows)
+    ]
+    scores = np_rng.uniform(-1, 1, rows)
+    scores[np_rng.random(rows) < missing_rate] = np.nan
+    frame["sentiment_score"] = scores
+    return pd.DataFrame(frame)
+
+
+def best_of(repeat, func, make_input):
+    timings, result = [], None
+    for _ in range(repeat):
+        value = make_input()
+        start = time.perf_counter()
+        result = func(value)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def frames_equal(left, right):
+    if list(left.columns) != list(right.columns):
+        return False
+    return all(series_equal(left[name], right[name]) for name in left.columns)
+
+
+def series_equal(left, right):
+    # None y NaN cuentan como distintos
+    return left.dtype == right.dtype and [repr(v) for v in left.tolist()] == [repr(v) for v in right.tolist()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrape preprocessing helpers")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--missing-rate", type=float, default=0.1, help="Share of missing cells")
+    parser.add_argument("--surrogate-rate", type=float, default=0.001, help="Share of text cells with a lone surrogate")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best one is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/convert-<timestamp>.json)")
+    args = parser.parse_args()
+
+    frame = build_frame(args.rows, args.missing_rate, args.surrogate_rate, args.seed)
+    cases = {
+        "clean_dataframe": (previous_clean_dataframe, clean_dataframe, lambda: frame.copy(), frames_equal),
+    }
+    for name in ("title", "content", "publish_datetime", "sentiment_score"):
+        column = frame[name]
+        cases[f"convert_nan_to_none[{name}]"] = (previous_nan_to_none, convert_nan_to_none, lambda c=column: c, series_equal)
+        cases[f"convert_nan_to_empty_string[{name}]"] = (
+            previous_nan_to_empty_string, convert_nan_to_empty_string, lambda c=column: c, series_equal,
+        )
+
+    results = {}
+    for name, (previous, current, make_input, equal) in cases.items():
+        before, expected = best_of(args.repeat, previous, make_input)
+        after, actual = best_of(args.repeat, current, make_input)
+        results[name] = {
+            "previous_ms": round(before * 1000, 2),
+            "current_ms": round(after * 1000, 2),
+            "speedup": round(before / after, 1) if after else None,
+            "identical": equal(actual, expected),
+        }
+        print(f"{name:42s} {before * 1000:>9.1f} ms -> {after * 1000:>8.1f} ms  "
+              f"x{results[name]['speedup']:<6}  {'ok' if results[name]['identical'] else 'MISMATCH'}")
+
+    report = {
+        "run": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "rows": args.rows,
+            "missing_rate": args.missing_rate,
+            "surrogate_rate": args.surrogate_rate,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "cases": results,
+    }
+    output = Path(args.output or ROOT / "benchmarks" / "results" / f"convert-{datetime.now():%Y%m%d-%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nReport written to {output}")
+
+    if not all(result["identical"] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Throughput of the Google Play notification path without Google Cloud.
+
+Publishes synthetic subscriptionNotification payloads to an InMemorySource and
+runs them through PubSubService (queues, micro-batches, dedupe) and
+SubscriptionService against a local SQLite (or MySQL) database. Reports
+messages per second and end-to-end lag (publish -> ack), and checks that
+every message was acked once, wrote one history row and left each
+subscription in the state of its last notification.
+
+By default every message is published before the consumer starts, so the lag
+is how long the backlog takes to drain; --rate publishes at a steady pace
+instead. The Firebase service account variables still need to be set (as for
+the app itself).
+
+Usage:
+    python benchmarks/bench_pubsub.py --messages 50000
+    python benchmarks/bench_pubsub.py --messages 20000 --rate 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add the project root to the Python path
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+from benchmarks.support import percentile
+from tests.conftest import notification_payloads, seed_subscriptions
+
+
+async def run(args):
+    # Settings se leen al importar: la URL de la base tiene que estar antes de importar src
+    os.environ["DB_URL"] = args.db_url
+    os.environ.setdefault("LOG_LEVEL", args.log_level)
+
+    await seed_subscriptions(args.db_url, args.subscriptions, max(1, args.subscriptions // 10), progress=True)
+
+    from sqlalchemy import func, select
+    from src.config.config import get_settings
+    from src.config.db_config import engine, get_session
+    from src.models.subscription_model import SubscriptionHistoryModel, SubscriptionModel
+    from src.services.message_sources import InMemorySource
+    from src.services.pubsub_service import PubSubService
+    from src.utils.logger import configure_logging
+
+    configure_logging(get_settings())
+    source = InMemorySource()
+    payloads, expected = notification_payloads(args.messages, args.subscriptions, args.seed)
+
+    # Ids nuevos en cada ejecución: la base se reutiliza y la dedupe descartaría los de la anterior
+    run_id = uuid.uuid4().hex[:8]
+
+    def publish(rate=0.0):
+        for i, payload in enumerate(payloads):
+            source.publish(payload, message_id=f"{run_id}-{i}")
+            if rate:
+                time.sleep(1 / rate)
+
+    async def history_rows():
+        async with get_session() as db:
+            return (await db.execute(select(func.count()).select_from(SubscriptionHistoryModel))).scalar()
+
+    service = PubSubService(source=source)
+    try:
+        history_before = await history_rows()
+        if not args.rate:
+            publish()
+        start = time.perf_counter()
+        await service.start()
+        if args.rate:
+            await asyncio.to_thread(publish, args.rate)
+        idle = await asyncio.to_thread(source.wait_until_idle, args.timeout)
+        seconds = time.perf_counter() - start
+        await service.stop()
+
+        history = await history_rows() - history_before
+        async with get_session() as db:
+            stmt = select(SubscriptionModel.purchase_token, SubscriptionModel.status).where(
+                SubscriptionModel.purchase_token.in_(expected)
+            )
+            statuses = {token: status.value for token, status in await db.execute(stmt)}
+    finally:
+        await engine.dispose()
+
+    lags = sorted(message.acked_at - message.published_at for message in source.acked)
+    to_ms = lambda value: round(value * 1000, 1) if value is not None else None
+    report = {
+        "messages": args.messages,
+        "subscriptions": args.subscriptions,
+        "rate": args.rate,
+        "completed": idle,
+        "acked": len(source.acked),
+        "acked_unique": len({message.message_id for message in source.acked}),
+        "nacked": source.nacked,
+        "history_rows": history,
+        "wrong_final_status": sum(statuses.get(token) != status for token, status in expected.items()),
+        "seconds": round(seconds, 3),
+        "messages_per_second": round(len(source.acked) / seconds, 1) if seconds else None,
+        "lag_ms": {
+            "p50": to_ms(percentile(lags, 50)),
+            "p99": to_ms(percentile(lags, 99)),
+            "max": to_ms(lags[-1]) if lags else None,
+        },
+    }
+    print(f"{report['acked']}/{report['messages']} messages in {report['seconds']}s: "
+          f"{report['messages_per_second']} msgs/s, lag p50 {report['lag_ms']['p50']} ms, "
+          f"p99 {report['lag_ms']['p99']} ms, max {report['lag_ms']['max']} ms")
+    print(json.dumps(report, indent=2))
+
+    # Un resultado incorrecto no es una medida válida: se falla en vez de informar
+    ok = (report["completed"] and report["acked_unique"] == args.messages
+          and report["history_rows"] == args.messages and report["wrong_final_status"] == 0)
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pump synthetic Google Play notifications through PubSubService")
+    parser.add_argument("--db-url", default=f"sqlite+aiosqlite:///{ROOT / 'benchmarks' / 'pubsub.db'}")
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--subscriptions", type=int, default=2_000)
+    parser.add_argument("--rate", type=float, default=0.0, help="Messages per second to publish (0 = all up front)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for every message to be acked")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
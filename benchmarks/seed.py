@@ -0,0 +1,214 @@
+"""
+Seeds a database with synthetic articles for the benchmarks.
+
+Creates `news`, `news_translation`, `news_characters` and
+`news_trans_characters` rows at the requested scale, plus benchmark users with
+favorites. Works against MySQL (mysql+aiomysql://...) or a local SQLite file
+(sqlite+aiosqlite:///...) as a stand-in.
+
+Usage:
+    python benchmarks/seed.py --db-url sqlite+aiosqlite:///benchmarks/bench.db --articles 10000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.models.favorites_model import FavoritesModel
+from src.models.news_tag_model import NewsCharactersModel, NewsModel, NewsTranslationModel, NewsTransCharactersModel
+from src.models.user_model import UserModel
+from src.schema.sentiment_category import SentimentCategory
+from tests.conftest import metadata_for
+
+SOURCES = [f"Fuente {i:02d}" for i in range(40)]
+WORDS = (
+    "economia gobierno elecciones mercado inflacion salud educacion tecnologia energia clima "
+    "seguridad justicia transporte mineria agricultura exportaciones banco reforma congreso "
+    "presidente ministro alcaldia protesta acuerdo inversion empleo turismo deporte cultura "
+    "ciencia universidad hospital carretera litio gas petroleo agua vivienda impuesto deuda"
+).split()
+CATEGORIES = [c for c in SentimentCategory if c not in (SentimentCategory.DESCONOCIDO, SentimentCategory.UNKNOWN)]
+LABELS = ["alto", "medio", "bajo"]
+
+BENCH_USER_EMAIL = "bench-user-{}@example.com"
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _paragraphs(rng, sentences):
+    return " ".join(_sentence(rng, rng.randint(8, 18)) for _ in range(sentences))
+
+
+def _news_row(rng, news_id, now):
+    return {
+        "id": news_id,
+        "news_source": rng.choice(SOURCES),
+        "title": _sentence(rng, rng.randint(6, 12))[:255],
+        "detail": _paragraphs(rng, 2),
+        "image_url": f"https://img.example.com/{news_id}.jpg",
+        "content": _paragraphs(rng, 12),
+        "summary": _paragraphs(rng, 3),
+        "author": f"Autor {rng.randint(1, 500)}",
+        "publish_datetime": now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60)),
+        "location": "Bolivia",
+        "source_link": f"https://news.example.com/articulo/{news_id}",
+        "sentiment_category": rng.choice(CATEGORIES),
+        "justification": _paragraphs(rng, 2),
+        "sentiment_score": round(rng.uniform(-0.99999, 0.99999), 5),
+        "news_type_category": "informativa",
+        "news_type_justification": _sentence(rng, 12),
+        "purpose_objective": "informar",
+        "purpose_audience": "general",
+        "context_temporality": "actual",
+        "context_location": "nacional",
+        "content_facts_vs_opinions": rng.choice(LABELS),
+        "content_precision": rng.choice(LABELS),
+        "content_impartiality": rng.choice(LABELS),
+        "structure_clarity": rng.choice(LABELS),
+        "structure_key_data": rng.choice(LABELS),
+        "tone_neutrality": rng.choice(LABELS),
+        "tone_ethics": rng.choice(LABELS),
+    }
+
+
+def _translation_row(rng, news_id, language):
+    return {
+        "news_id": news_id,
+        "title_tra": _sentence(rng, 8),
+        "detail_tra": _paragraphs(rng, 2),
+        "content_tra": _paragraphs(rng, 12),
+        "summary_tra": _paragraphs(rng, 3),
+        "justification_tra": _paragraphs(rng, 2),
+        "news_type_category_tra": "informative",
+        "news_type_justification_tra": _sentence(rng, 12),
+        "purpose_objective_tra": "inform",
+        "purpose_audience_tra": "general",
+        "context_temporality_tra": "current",
+        "context_location_tra": "national",
+        "content_facts_vs_opinions_tra": "high",
+        "content_precision_tra": "high",
+        "content_impartiality_tra": "medium",
+        "structure_clarity_tra": "high",
+        "structure_key_data_tra": "medium",
+        "tone_neutrality_tra": "medium",
+        "tone_ethics_tra": "high",
+        "language": language,
+    }
+
+
+async def seed_database(db_url, articles=10_000, users=100, favorites_per_user=20,
+                        characters_per_article=2, batch_size=2_000, seed=42, reset=False):
+    """
+    Creates the schema and fills it with `articles` synthetic articles. If the
+    database already holds exactly that many articles it is left untouched, so
+    repeated benchmark runs reuse the same data. Returns a summary dict.
+    """
+    engine = create_async_engine(db_url)
+    metadata = metadata_for(engine.dialect.name)
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    start = time.perf_counter()
+    try:
+        async with engine.begin() as conn:
+            if engine.dialect.name == "sqlite":
+                # WAL permite lecturas concurrentes mientras la app registra tokens
+                await conn.execute(text("PRAGMA journal_mode=WAL"))
+            if reset:
+                await conn.run_sync(metadata.drop_all)
+            await conn.run_sync(metadata.create_all)
+            existing = (await conn.execute(select(func.count()).select_from(NewsModel.__table__))).scalar()
+
+        if existing == articles:
+            return {"articles": articles, "users": users, "seeded": False, "seconds": 0.0}
+        if existing:
+            async with engine.begin() as conn:
+                await conn.run_sync(metadata.drop_all)
+                await conn.run_sync(metadata.create_all)
+
+        character_id = 0
+        for batch_start in range(1, articles + 1, batch_size):
+            batch_ids = range(batch_start, min(batch_start + batch_size, articles + 1))
+            news_rows, translation_rows, character_rows, character_translation_rows = [], [], [], []
+            for news_id in batch_ids:
+                news_rows.append(_news_row(rng, news_id, now))
+                translation_rows.append(_translation_row(rng, news_id, "en"))
+                for _ in range(characters_per_article):
+                    character_id += 1
+                    character_rows.append({
+                        "id": character_id,
+                        "news_id": news_id,
+                        "character_name": f"Personaje {rng.randint(1, 5000)}",
+                        "character_description": _sentence(rng, 14),
+                    })
+                    character_translation_rows.append({
+                        "news_characters_id": character_id,
+                        "character_description_tra": _sentence(rng, 14),
+                        "language": "en",
+                    })
+
+            async with engine.begin() as conn:
+                await conn.execute(insert(NewsModel.__table__), news_rows)
+                await conn.execute(insert(NewsTranslationModel.__table__), translation_rows)
+                if character_rows:
+                    await conn.execute(insert(NewsCharactersModel.__table__), character_rows)
+                    await conn.execute(insert(NewsTransCharactersModel.__table__), character_translation_rows)
+            print(f"  {batch_ids[-1]}/{articles} articles", end="\r", flush=True)
+        print()
+
+        async with engine.begin() as conn:
+            await conn.execute(insert(UserModel.__table__), [
+                {"id": i, "email": BENCH_USER_EMAIL.format(i), "name": f"Bench {i}", "email_verified": True}
+                for i in range(1, users + 1)
+            ])
+            favorite_rows = [
+                {"user_id": user_id, "news_id": news_id}
+                for user_id in range(1, users + 1)
+                for news_id in rng.sample(range(1, articles + 1), min(favorites_per_user, articles))
+            ]
+            if favorite_rows:
+                await conn.execute(insert(FavoritesModel.__table__), favorite_rows)
+            if engine.dialect.name == "mysql":
+                # search_by_text_db usa MATCH(title, content) AGAINST(...)
+                await conn.execute(text("CREATE FULLTEXT INDEX ft_news_title_content ON news (title, content)"))
+
+        return {"articles": articles, "users": users, "seeded": True, "seconds": time.perf_counter() - start}
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a database with synthetic articles")
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///benchmarks/bench.db")
+    parser.add_argument("--articles", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--favorites-per-user", type=int, default=20)
+    parser.add_argument("--characters-per-article", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate the schema first")
+    args = parser.parse_args()
+
+    summary = asyncio.run(seed_database(
+        args.db_url, args.articles, args.users, args.favorites_per_user,
+        args.characters_per_article, args.batch_size, args.seed, args.reset,
+    ))
+    if summary["seeded"]:
+        print(f"Seeded {summary['articles']} articles in {summary['seconds']:.1f}s "
+              f"({summary['articles'] / summary['seconds']:.0f} articles/s)")
+    else:
+        print(f"Database already holds {summary['articles']} articles, nothing to do")
+
+
+if __name__ == "__main__":
+    main()
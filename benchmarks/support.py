@@ -0,0 +1,107 @@
+"""Helpers shared by the benchmark and load-test runners"""
+import os
+import subprocess
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from benchmarks.seed import BENCH_USER_EMAIL
+
+ROOT = Path(__file__).parent.parent
+
+
+def fake_token(user_id):
+    return f"bench-token-{user_id}"
+
+
+def install_fake_firebase():
+    """
+    Replaces Firebase token verification with deterministic bench users and
+    skips the Firebase app initialization, so no service account is needed
+    """
+    from firebase_admin import auth
+
+    def verify_id_token(token, *args, **kwargs):
+        user_id = int(token.rsplit("-", 1)[1])
+        now = int(time.time())
+        return {
+            "uid": f"bench-{user_id}",
+            "email": BENCH_USER_EMAIL.format(user_id),
+            "email_verified": True,
+            "iss": "https://securetoken.google.com/bench",
+            "aud": "bench",
+            "auth_time": now,
+            "iat": now,
+            "exp": now + 3600,
+        }
+
+    def get_user(uid, *args, **kwargs):
+        return SimpleNamespace(uid=uid, email=BENCH_USER_EMAIL.format(uid.rsplit("-", 1)[1]))
+
+    auth.verify_id_token = verify_id_token
+    auth.get_user = get_user
+
+    # get_firebase_auth() inicializa Firebase con la cuenta de servicio: sin credenciales
+    # reales fallaría en cada petición autenticada, así que se da por inicializado
+    from src.config import firebase_config
+    firebase_config.firebase_app = SimpleNamespace(name="bench")
+    firebase_config.initialize_firebase = lambda: firebase_config.firebase_app
+
+
+def load_app(db_url, log_level="WARNING"):
+    """
+    Imports the app configured against `db_url`, with profiling off and fake
+    Firebase tokens. Must run before anything else imports the app, since
+    settings are read at import time.
+    """
+    os.environ["DB_URL"] = db_url
+    os.environ.setdefault("LOG_LEVEL", log_level)
+    os.environ.setdefault("PROFILING_ENABLED", "false")
+
+    from app import app
+    install_fake_firebase()
+    return app
+
+
+def failed_scenarios(scenarios):
+    """Names of the scenarios in which every request failed"""
+    return [
+        name for name, result in scenarios.items()
+        if result.get("requests") and result["errors"] == result["requests"]
+    ]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, statuses, wall_seconds):
+    values = sorted(latencies)
+    to_ms = lambda v: round(v * 1000, 3) if v is not None else None
+    total = sum(statuses.values())
+    return {
+        "requests": total,
+        "errors": sum(count for status, count in statuses.items() if status == "error" or int(status) >= 400),
+        "status_codes": dict(statuses),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(total / wall_seconds, 2) if wall_seconds else None,
+        "latency_ms": {
+            "mean": to_ms(sum(values) / len(values)) if values else None,
+            "p50": to_ms(percentile(values, 50)),
+            "p90": to_ms(percentile(values, 90)),
+            "p95": to_ms(percentile(values, 95)),
+            "p99": to_ms(percentile(values, 99)),
+            "max": to_ms(values[-1]) if values else None,
+        },
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
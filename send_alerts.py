@@ -1,23 +1,25 @@
+import asyncio
 import logging
-import firebase_admin
-from sqlalchemy.orm import sessionmaker
 from datetime import date, datetime, time
-from firebase_admin import credentials, messaging
-from src.config.db_config import engine
+from sqlalchemy import select
+from src.config.db_config import get_session
 from src.models.news_tag_model import NewsModel
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__, level=logging.DEBUG)
 
-cred = credentials.Certificate("axioma.json")
-firebase_app = firebase_admin.initialize_app(cred)
-logger.info("Firebase inicializado correctamente.")
 
-SessionLocal = sessionmaker(bind=engine)
-session = SessionLocal()
+def initialize_messaging():
+    """Inicializa Firebase con la cuenta de servicio local; solo al ejecutar el script"""
+    import firebase_admin
+    from firebase_admin import credentials
 
+    cred = credentials.Certificate("axioma.json")
+    firebase_admin.initialize_app(cred)
+    logger.info("Firebase inicializado correctamente.")
 
-def get_top_news_for_category(session, category, target_date=None):
+
+async def get_top_news_for_category(category, target_date=None):
     """
     Obtiene la noticia con el mayor sentiment_score para una categoría específica,
     desde el inicio del día hasta la hora actual basada en target_date.
@@ -30,24 +32,28 @@ def get_top_news_for_category(session, category, target_date=None):
     end_datetime = datetime.combine(target_date, now_time)
 
     logger.info(
-        f"Buscando noticias para la categoría {category} entre {start_datetime} y {end_datetime}."
+        "Buscando noticias para la categoría %s entre %s y %s.",
+        category, start_datetime, end_datetime,
     )
 
-    news = (
-        session.query(NewsModel)
-        .filter(
-            NewsModel.sentiment_category == category,
-            NewsModel.publish_datetime.between(start_datetime, end_datetime),
+    async with get_session(readonly=True) as db:
+        result = await db.execute(
+            select(NewsModel)
+            .where(
+                NewsModel.sentiment_category == category,
+                NewsModel.publish_datetime.between(start_datetime, end_datetime),
+            )
+            .order_by(NewsModel.sentiment_score.desc())
+            .limit(1)
         )
-        .order_by(NewsModel.sentiment_score.desc())
-        .first()
-    )
+        news = result.scalars().first()
 
     if news:
-        logger.info(f"✅ Noticia encontrada: ID: {news.id}, Título: {news.title}")
+        logger.info("✅ Noticia encontrada: ID: %s, Título: %s", news.id, news.title)
     else:
         logger.info(
-            f"⚠️ No se encontraron noticias para la categoría {category} en el rango de {start_datetime} a {end_datetime}."
+            "⚠️ No se encontraron noticias para la categoría %s en el rango de %s a %s.",
+            category, start_datetime, end_datetime,
         )
 
     return news
@@ -57,6 +63,8 @@ def send_notification(news):
     """
     Envía una notificación push usando Firebase para una noticia específica.
     """
+    from firebase_admin import messaging
+
     if not news:
         logger.info("No hay noticias relevantes para enviar notificaciones.")
         return
@@ -71,7 +79,7 @@ def send_notification(news):
             "Original ✅" if news.title and news.title.strip() else "Predeterminado 🟡"
         )
 
-        logger.info(f"Preparando notificación: ID: {news.id}, Título: {title}")
+        logger.info("Preparando notificación: ID: %s, Título: %s", news.id, title)
 
         data_payload = {"id": str(news.id), "title": title}
         notification_fields = {"title": title}
@@ -88,7 +96,8 @@ def send_notification(news):
             data_payload["image_url"] = news.image_url
 
         logger.info(
-            f"📦 Campos presentes: Título: {title_type} | Detail: {'✅' if detail_present else '❌'} | Image URL: {'✅' if image_present else '❌'}"
+            "📦 Campos presentes: Título: %s | Detail: %s | Image URL: %s",
+            title_type, "✅" if detail_present else "❌", "✅" if image_present else "❌",
         )
 
         message = messaging.Message(
@@ -98,13 +107,13 @@ def send_notification(news):
         )
 
         response = messaging.send(message)
-        logger.info(f"✅ Notificación enviada con éxito. ID: {response}")
+        logger.info("✅ Notificación enviada con éxito. ID: %s", response)
 
     except Exception as e:
-        logger.error(f"❌ Error al enviar la notificación: {e}")
+        logger.error("❌ Error al enviar la notificación: %s", e)
 
 
-def main(prueba_fecha=None):
+async def check_and_notify(prueba_fecha=None):
     """
     Revisa las noticias y envía notificaciones para las categorías MUY_POSITIVO y MUY_NEGATIVO.
     """
@@ -116,12 +125,13 @@ def main(prueba_fecha=None):
                 f"El valor de prueba_fecha no es una fecha válida: {prueba_fecha}"
             )
 
-        logger.info(f"Usando la fecha objetivo: {prueba_fecha}")
+        logger.info("Usando la fecha objetivo: %s", prueba_fecha)
 
-        positive_news = get_top_news_for_category(session, "MUY_POSITIVO", prueba_fecha)
+        positive_news = await get_top_news_for_category("MUY_POSITIVO", prueba_fecha)
         if positive_news:
             logger.info(
-                f"Enviando notificación para noticia positiva: ID: {positive_news.id}, Título: {positive_news.title}"
+                "Enviando notificación para noticia positiva: ID: %s, Título: %s",
+                positive_news.id, positive_news.title,
             )
             send_notification(positive_news)
         else:
@@ -129,10 +139,11 @@ def main(prueba_fecha=None):
                 "⚠️ No hay noticias positivas para enviar notificaciones en la fecha especificada."
             )
 
-        negative_news = get_top_news_for_category(session, "MUY_NEGATIVO", prueba_fecha)
+        negative_news = await get_top_news_for_category("MUY_NEGATIVO", prueba_fecha)
         if negative_news:
             logger.info(
-                f"Enviando notificación para noticia negativa: ID: {negative_news.id}, Título: {negative_news.title}"
+                "Enviando notificación para noticia negativa: ID: %s, Título: %s",
+                negative_news.id, negative_news.title,
             )
             send_notification(negative_news)
         else:
@@ -141,9 +152,12 @@ def main(prueba_fecha=None):
             )
 
     except Exception as e:
-        logger.error(f"❌ Error en el proceso de notificaciones: {e}")
-    finally:
-        session.close()
+        logger.error("❌ Error en el proceso de notificaciones: %s", e)
+
+
+def main(prueba_fecha=None):
+    initialize_messaging()
+    asyncio.run(check_and_notify(prueba_fecha))
 
 
 if __name__ == "__main__":
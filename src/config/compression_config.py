@@ -0,0 +1,21 @@
+from src.config.config import get_settings
+from src.utils.compression import CompressionMiddleware
+from src.utils.response_cache import ResponseCache
+
+_SETTINGS = get_settings()
+
+# Cache compartida para los feeds de artículos (cuerpo + variantes comprimidas)
+feed_cache = ResponseCache(
+    ttl_seconds=_SETTINGS.feed_cache_ttl_seconds,
+    minimum_size=_SETTINGS.compression_minimum_size,
+    gzip_level=_SETTINGS.gzip_compresslevel,
+    brotli_quality=_SETTINGS.brotli_quality,
+)
+
+def add_compression(app):
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=_SETTINGS.compression_minimum_size,  # No comprimir respuestas pequeñas
+        gzip_level=_SETTINGS.gzip_compresslevel,
+        brotli_quality=_SETTINGS.brotli_quality,
+    )
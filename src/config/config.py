@@ -9,6 +9,12 @@ class Settings(BaseSettings):
     service_name: str = "Backend de AXIOMA"
     k_revision: str = "local"
     log_level: str = "DEBUG"
+    # "text" o "json" (una línea JSON por registro)
+    log_format: str = "text"
+    # Niveles por módulo, p. ej. "src.services.article_service=INFO,sqlalchemy.engine=WARNING"
+    log_level_overrides: str = ""
+    # Muestreo de DEBUG por logger: "nombre=N" deja pasar 1 de cada N registros por mensaje
+    log_debug_sampling: str = "src.services.article_service=100"
     api_url: str = "http://localhost:8000/"
 
     db_host: str = "localhost"
@@ -16,6 +22,25 @@ class Settings(BaseSettings):
     db_password: str = "root"
     db_port: int = 3306
     db_name: str = "axioma"
+    # URL SQLAlchemy completa; si se define, sustituye a DB_* (p. ej. sqlite+aiosqlite para benchmarks)
+    db_url: str = ""
+
+    # Connection pool, per worker process
+    db_pool_size: int = 50
+    db_max_overflow: int = 50
+    db_pool_timeout: int = 60
+    db_pool_recycle: int = 3600
+    # Total connection budget shared by all workers (0 = use db_pool_size/db_max_overflow as is)
+    db_max_connections: int = 0
+    web_concurrency: int = 1
+
+    # Read replica (optional). Empty user/password/port fall back to the primary's
+    db_replica_host: str = ""
+    db_replica_port: int = 0
+    db_replica_user: str = ""
+    db_replica_password: str = ""
+    db_replica_max_lag_seconds: int = 5  # 0 disables the lag check
+    db_replica_lag_check_interval: int = 10
 
     # vector_database_host: str = "localhost"
     # vector_database_port: int = 8000
@@ -40,9 +65,67 @@ class Settings(BaseSettings):
     # Google Play package name
     google_play_package_name: str = "com.axioma.app"
 
+    # Verificación de recibos con las tiendas (URLs configurables para apuntar a un proveedor falso en tests)
+    apple_verify_receipt_url: str = "https://buy.itunes.apple.com/verifyReceipt"
+    apple_sandbox_verify_receipt_url: str = "https://sandbox.itunes.apple.com/verifyReceipt"
+    google_play_api_url: str = "https://androidpublisher.googleapis.com/androidpublisher/v3"
+    receipt_verification_concurrency: int = 10  # Llamadas simultáneas a las tiendas por proceso
+    receipt_verification_retries: int = 3
+    receipt_verification_backoff: float = 0.2  # Espera base; se duplica en cada reintento
+    receipt_verification_backoff_max: float = 5.0
+    receipt_cache_ttl_seconds: int = 300
+    receipt_cache_max_entries: int = 10_000
+
+    # Clientes HTTP compartidos (httpx y APIs de Google)
+    http_client_timeout: float = 10.0
+    http_client_max_connections: int = 100
+    http_client_max_keepalive: int = 20
+    http_client_http2: bool = True  # Requiere httpx[http2]
+    # Los tokens de Google se renuevan cuando les quedan menos de estos segundos
+    google_token_refresh_margin: int = 300
+
     # Add these to your Settings class
     pubsub_topic_name: str = "play-subscription-notifications-axioma"
     pubsub_subscription_name: str = "play-subscription-notifications-axioma-sub"
+    # Origen de los mensajes: "google", "memory" (tests) o "file" (JSON Lines en PUBSUB_SOURCE_PATH)
+    pubsub_source: str = "google"
+    pubsub_source_path: str = ""
+    # Consumidor de Pub/Sub: los mensajes pasan a una cola acotada en el event loop de la app
+    pubsub_workers: int = 4
+    pubsub_queue_size: int = 100
+    pubsub_max_messages: int = 200  # Flow control: mensajes sin ack que Pub/Sub nos entrega a la vez
+    pubsub_max_bytes: int = 10 * 1024 * 1024
+    pubsub_shutdown_timeout: float = 10.0
+    # La suscripción tiene dead-letter topic: los mensajes que no se pueden decodificar se rechazan (nack)
+    # para que Pub/Sub los reenvíe allí; sin él se confirman (ack) y se descartan tras registrarlos
+    pubsub_dead_letter: bool = False
+    # Micro-lotes: mensajes que llegan en la misma ventana se procesan en una transacción
+    pubsub_batch_size: int = 100
+    pubsub_batch_window: float = 0.05
+    # Deduplicación por message_id: ids recientes en memoria y en BD hasta que caduca el TTL
+    pubsub_dedupe_cache_size: int = 10_000
+    pubsub_dedupe_ttl: int = 7 * 24 * 3600  # Pub/Sub retiene los mensajes sin ack hasta 7 días
+    pubsub_dedupe_cleanup_interval: int = 3600
+
+    # Cache de /subscriptions/verify por proceso (token -> usuario, usuario -> suscripción); 0 la desactiva
+    entitlement_cache_ttl_seconds: int = 60
+    entitlement_cache_max_entries: int = 10_000
+
+    # Barrido de suscripciones caducadas (ACTIVE con end_date pasada -> EXPIRED); intervalo 0 lo desactiva
+    subscription_expiry_sweep_interval: int = 300
+    subscription_expiry_batch_size: int = 500
+
+    # Request profiling (opt-in). Profiles requests sent with "X-Profile: 1" or a random sample
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_dir: str = "logs/profiles"
+    profiling_keep: int = 20
+
+    # Response compression
+    compression_minimum_size: int = 1024
+    gzip_compresslevel: int = 6
+    brotli_quality: int = 5
+    feed_cache_ttl_seconds: int = 60
 
     model_config = SettingsConfigDict(env_file=".env")
 
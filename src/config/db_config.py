@@ -1,50 +1,271 @@
 import logging
 import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import event, exc, text
 from src.config.config import get_settings
 from src.utils.logger import setup_logger
+from src.utils.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKED_OUT_ON_CHECKOUT,
+    DB_POOL_MAX_OVERFLOW,
+    DB_POOL_OVERFLOW_ON_CHECKOUT,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUTS,
+    DB_POOL_WAIT_SECONDS,
+    record_query,
+)
 
 logger = setup_logger(__name__, level=logging.DEBUG)
 
 _SETTINGS = get_settings()
 
-SQLALCHEMY_DATABASE_URL = (
-    f"mysql+aiomysql://{_SETTINGS.db_user}:{_SETTINGS.db_password}"
-    f"@{_SETTINGS.db_host}:{_SETTINGS.db_port}/{_SETTINGS.db_name}"
+def _build_database_url(user, password, host, port, name):
+    return f"mysql+aiomysql://{user}:{password}@{host}:{port}/{name}"
+
+SQLALCHEMY_DATABASE_URL = _SETTINGS.db_url or _build_database_url(
+    _SETTINGS.db_user, _SETTINGS.db_password, _SETTINGS.db_host, _SETTINGS.db_port, _SETTINGS.db_name
 )
 
+# Réplica de solo lectura (opcional): usuario, contraseña, puerto y base heredan los del primario
+SQLALCHEMY_REPLICA_URL = _build_database_url(
+    _SETTINGS.db_replica_user or _SETTINGS.db_user,
+    _SETTINGS.db_replica_password or _SETTINGS.db_password,
+    _SETTINGS.db_replica_host,
+    _SETTINGS.db_replica_port or _SETTINGS.db_port,
+    _SETTINGS.db_name,
+) if _SETTINGS.db_replica_host else None
+
 # Validación de variables
-if not all([_SETTINGS.db_user, _SETTINGS.db_password, _SETTINGS.db_host, _SETTINGS.db_port, _SETTINGS.db_name]):
+if not _SETTINGS.db_url and not all([_SETTINGS.db_user, _SETTINGS.db_password, _SETTINGS.db_host, _SETTINGS.db_port, _SETTINGS.db_name]):
     logger.error("❌ No se han definido las variables de entorno de la base de datos")
 else:
     logger.info("✅ Variables de entorno de la base de datos configuradas")
 
+def resolve_pool_limits(settings):
+    """
+    Calcula pool_size y max_overflow por worker. Si DB_MAX_CONNECTIONS está
+    definido, el presupuesto total se reparte entre WEB_CONCURRENCY workers
+    para no superar max_connections de MySQL.
+    """
+    pool_size = settings.db_pool_size
+    max_overflow = settings.db_max_overflow
+    if settings.db_max_connections > 0:
+        per_worker = max(1, settings.db_max_connections // max(1, settings.web_concurrency))
+        pool_size = min(pool_size, per_worker)
+        max_overflow = min(max_overflow, per_worker - pool_size)
+    return pool_size, max_overflow
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Pool que mide cuánto espera cada checkout y cuántos agotan pool_timeout"""
+
+    def connect(self):
+        label = self._orig_logging_name or "default"
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(engine=label).inc()
+            raise
+        finally:
+            DB_POOL_WAIT_SECONDS.labels(engine=label).observe(time.perf_counter() - start)
+
+
+def _instrument_pool(engine_name, async_engine, pool_size, max_overflow):
+
+    @event.listens_for(async_engine.sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        current_pool = async_engine.pool
+        DB_POOL_CHECKED_OUT_ON_CHECKOUT.labels(engine=engine_name).observe(current_pool.checkedout())
+        DB_POOL_OVERFLOW_ON_CHECKOUT.labels(engine=engine_name).observe(max(0, current_pool.overflow()))
+
+    DB_POOL_SIZE.labels(engine=engine_name).set(pool_size)
+    DB_POOL_MAX_OVERFLOW.labels(engine=engine_name).set(max_overflow)
+    DB_POOL_CHECKED_OUT.labels(engine=engine_name).set_function(lambda: async_engine.pool.checkedout())
+
+
+def _instrument_queries(engine_name, async_engine):
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # En el contexto de la sentencia y no en conn.info: si falla, se descarta con ella
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_query(engine_name, time.perf_counter() - context._query_start, statement)
+
+
+def _create_engine(url, engine_name):
+    pool_size, max_overflow = resolve_pool_limits(_SETTINGS)
+    new_engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_logging_name=engine_name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=_SETTINGS.db_pool_timeout,
+        pool_recycle=_SETTINGS.db_pool_recycle,
+        echo=False,
+    )
+    _instrument_pool(engine_name, new_engine, pool_size, max_overflow)
+    _instrument_queries(engine_name, new_engine)
+    logger.info("Pool '%s': pool_size=%s, max_overflow=%s, timeout=%ss", engine_name, pool_size, max_overflow, _SETTINGS.db_pool_timeout)
+    return new_engine
+
+def _create_sessionmaker(bind):
+    return async_sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+    )
+
 # Crear motor y sesión asíncrona
-engine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_size=50,
-    max_overflow=50,
-    pool_timeout=60,
-    pool_recycle=3600,
-    echo=False,
-)
+engine = _create_engine(SQLALCHEMY_DATABASE_URL, "primary")
+async_session = _create_sessionmaker(engine)
 
-async_session = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
-)
+# Motor de lectura: solo existe si hay réplica configurada
+read_engine = _create_engine(SQLALCHEMY_REPLICA_URL, "replica") if SQLALCHEMY_REPLICA_URL else None
+async_read_session = _create_sessionmaker(read_engine) if read_engine else None
+
+if read_engine:
+    logger.info("✅ Réplica de lectura configurada en %s", _SETTINGS.db_replica_host)
 
 Base = declarative_base()
 
-# Dependency para FastAPI
+
+class ReplicaLagMonitor:
+    """
+    Comprueba periódicamente el retraso de la réplica y decide si las lecturas
+    pueden ir a ella. El resultado se cachea durante `check_interval` segundos.
+    """
+
+    def __init__(self, replica_engine, max_lag_seconds: int, check_interval: int):
+        self.replica_engine = replica_engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.last_lag = None
+        self.healthy = replica_engine is not None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _measure_lag(self):
+        async with self.replica_engine.connect() as connection:
+            try:
+                result = await connection.execute(text("SHOW REPLICA STATUS"))
+                lag_column = "Seconds_Behind_Source"
+            except Exception:
+                # MySQL < 8.0.22
+                result = await connection.execute(text("SHOW SLAVE STATUS"))
+                lag_column = "Seconds_Behind_Master"
+            row = result.mappings().first()
+            return row.get(lag_column) if row else None
+
+    async def is_usable(self) -> bool:
+        if self.replica_engine is None:
+            return False
+        if self.max_lag_seconds <= 0:
+            return True
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return self.healthy
+
+        async with self._lock:
+            # Otra corrutina pudo refrescar el estado mientras esperábamos
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return self.healthy
+            try:
+                self.last_lag = await self._measure_lag()
+                # None significa que la replicación está detenida
+                self.healthy = self.last_lag is not None and self.last_lag <= self.max_lag_seconds
+                if not self.healthy:
+                    logger.warning("⚠️ Réplica con retraso %ss, leyendo del primario", self.last_lag)
+            except Exception as e:
+                logger.error("❌ Error al comprobar el retraso de la réplica: %s", e)
+                self.healthy = False
+            self._checked_at = time.monotonic()
+        return self.healthy
+
+
+replica_monitor = ReplicaLagMonitor(
+    read_engine,
+    max_lag_seconds=_SETTINGS.db_replica_max_lag_seconds,
+    check_interval=_SETTINGS.db_replica_lag_check_interval,
+)
+
+# Sesiones abiertas en la petición (o bloque session_scope) en curso, por tipo de motor
+_scope_sessions: ContextVar[dict | None] = ContextVar("scope_sessions", default=None)
+
+@asynccontextmanager
+async def session_scope():
+    """
+    Comparte las sesiones abiertas dentro del bloque con todas las llamadas a
+    get_session(). Las sesiones se crean al primer uso y se cierran al salir.
+    Si ya hay un bloque activo, se reutiliza.
+    """
+    if _scope_sessions.get() is not None:
+        yield
+        return
+
+    sessions = {}
+    token = _scope_sessions.set(sessions)
+    try:
+        yield
+    finally:
+        _scope_sessions.reset(token)
+        for session in sessions.values():
+            await session.close()
+
+@asynccontextmanager
+async def get_session(readonly: bool = False):
+    """
+    Devuelve la sesión de la petición en curso. Con readonly=True se usa la
+    réplica si está configurada y al día; en otro caso, el primario.
+    Fuera de una petición abre una sesión de corta duración.
+    """
+    kind = "replica" if readonly and await replica_monitor.is_usable() else "primary"
+    factory = async_read_session if kind == "replica" else async_session
+
+    sessions = _scope_sessions.get()
+    if sessions is None:
+        async with factory() as session:
+            yield session
+        return
+
+    if kind not in sessions:
+        sessions[kind] = factory()
+    yield sessions[kind]
+
+# Dependency para FastAPI: sesiones por petición, compartidas por auth y servicios
 async def get_db():
-    async with async_session() as session:
-        yield session
+    async with session_scope():
+        async with get_session() as session:
+            yield session
+
+def get_pool_stats():
+    """Estado de los pools de conexiones de cada motor"""
+    engines = {"primary": engine}
+    if read_engine:
+        engines["replica"] = read_engine
+
+    stats = {}
+    for name, current_engine in engines.items():
+        pool = current_engine.pool
+        stats[name] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+    if read_engine:
+        stats["replica"]["healthy"] = replica_monitor.healthy
+        stats["replica"]["lag_seconds"] = replica_monitor.last_lag
+    return stats
 
 # Script de prueba
 if __name__ == "__main__":
@@ -55,6 +276,6 @@ if __name__ == "__main__":
                 await connection.execute(text("SELECT 1"))
                 logger.info("✅ Conexión a la base de datos establecida correctamente.")
         except Exception as e:
-            logger.error(f"❌ Error al conectar con la base de datos: {e}")
+            logger.error("❌ Error al conectar con la base de datos: %s", e)
 
     asyncio.run(test_connection())
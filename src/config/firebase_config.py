@@ -1,5 +1,5 @@
 import logging
-from firebase_admin import credentials, initialize_app, get_app
+import threading
 from src.config.config import get_settings
 from src.utils.logger import setup_logger
 
@@ -9,13 +9,26 @@ logger = setup_logger(__name__, level=logging.DEBUG)
 _SETTINGS = get_settings()
 
 firebase_app = None
+_init_lock = threading.Lock()
 
 def initialize_firebase():
+    """
+    Inicializa Firebase la primera vez que se llama. firebase_admin se importa
+    aquí y no al cargar el módulo para no penalizar el arranque de los workers.
+    """
     global firebase_app
     if firebase_app:
-        logger.info("Firebase ya está inicializado.")
         return firebase_app
 
+    with _init_lock:
+        if firebase_app:
+            return firebase_app
+        return _initialize_firebase()
+
+def _initialize_firebase():
+    global firebase_app
+    from firebase_admin import credentials, initialize_app
+
     # Verificar las variables de entorno necesarias para Firebase
     if not all([
         _SETTINGS.firebase_project_id,
@@ -45,16 +58,22 @@ def initialize_firebase():
         firebase_app = initialize_app(cred, {"databaseURL": _SETTINGS.firebase_database_url})
         logger.info("Firebase inicializado correctamente")
     except Exception as e:
-        logger.error(f"Error al inicializar Firebase: {e}")
+        logger.error("Error al inicializar Firebase: %s", e)
         raise RuntimeError("Error inicializando Firebase.")
 
     return firebase_app
 
+def get_firebase_auth():
+    """Devuelve el módulo firebase_admin.auth con la app ya inicializada"""
+    initialize_firebase()
+    from firebase_admin import auth
+    return auth
+
 if __name__ == "__main__":
     try:
-        if firebase_app:
+        if initialize_firebase():
             logger.info("Firebase configurado y listo para usarse")
         else:
             logger.error("Firebase no se pudo inicializar")
     except Exception as e:
-        logger.error(f"Error al probar la configuración de Firebase: {e}")
+        logger.error("Error al probar la configuración de Firebase: %s", e)
@@ -0,0 +1,14 @@
+from src.config.config import get_settings
+from src.utils.profiling import ProfileStore, ProfilingMiddleware
+
+_SETTINGS = get_settings()
+
+def add_profiling(app):
+    # Sin PROFILING_ENABLED el middleware ni siquiera se registra: coste cero
+    if not _SETTINGS.profiling_enabled:
+        return
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=ProfileStore(_SETTINGS.profiling_dir, keep=_SETTINGS.profiling_keep),
+        sample_rate=_SETTINGS.profiling_sample_rate,
+    )
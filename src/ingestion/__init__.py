@@ -0,0 +1,2 @@
+# Herramientas de ingesta de noticias (DataFrames de pandas, BankNew).
+# La API no importa este paquete: pandas solo se carga en los procesos de ingesta.
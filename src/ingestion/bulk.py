@@ -0,0 +1,216 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import select, update
+from sqlalchemy.dialects import mysql, sqlite
+
+from src.config.db_config import engine
+from src.models.news_tag_model import NewsModel
+from src.schema.sentiment_category import SentimentCategory
+from src.utils.hashing import news_content_hash
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, level=logging.INFO)
+
+# Columnas de BankNew que se guardan en la tabla news
+NEWS_COLUMNS = [
+    "source_link",
+    "news_source",
+    "title",
+    "detail",
+    "image_url",
+    "author",
+    "publish_datetime",
+    "location",
+    "content",
+    "sentiment_category",
+    "sentiment_score",
+]
+# En un upsert no se sobrescribe la clave; content_hash se calcula al preparar el lote
+UPDATE_COLUMNS = [column for column in NEWS_COLUMNS if column != "source_link"] + ["content_hash"]
+
+SURROGATES_PATTERN = r"[\ud800-\udfff]"
+TITLE_MAX_LENGTH = NewsModel.__table__.c.title.type.length
+
+
+@dataclass
+class IngestionReport:
+    rows_read: int
+    rows_written: int
+    rows_skipped: int
+    batches: int
+    seconds: float
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # Artículos existentes cuyo texto cambió: quedan marcados con needs_analysis
+    changed_ids: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        # Filas procesadas: las que no cambiaron también cuentan
+        return (self.rows_written + self.unchanged) / self.seconds if self.seconds else 0.0
+
+
+def read_news_file(path) -> pd.DataFrame:
+    """Reads scraped news from a CSV, Parquet or Excel file"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return pd.read_csv(path)
+    if suffix in (".parquet", ".pq"):
+        return pd.read_parquet(path)
+    if suffix in (".xlsx", ".xls"):
+        return pd.read_excel(path)
+    raise ValueError(f"Unsupported file type: {path.suffix}")
+
+
+def prepare_news_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalizes a frame of BankNew-like records for the news table, column by
+    column instead of row by row: strips lone surrogates, fills the BankNew
+    defaults, drops rows without source_link, turns NaN/NaT into None and adds
+    the content_hash of each article.
+    """
+    frame = pd.DataFrame(index=df.index)
+    for column in NEWS_COLUMNS:
+        frame[column] = df[column] if column in df.columns else None
+
+    text_columns = [column for column in NEWS_COLUMNS if column not in ("publish_datetime", "sentiment_score")]
+    for column in text_columns:
+        series = frame[column]
+        strings = series.astype("string")
+        frame[column] = strings.str.replace(SURROGATES_PATTERN, "", regex=True).where(series.notna())
+
+    frame["title"] = frame["title"].str.slice(0, TITLE_MAX_LENGTH)
+    frame["publish_datetime"] = pd.to_datetime(frame["publish_datetime"], errors="coerce")
+    frame["sentiment_score"] = pd.to_numeric(frame["sentiment_score"], errors="coerce").fillna(0.0)
+
+    valid_categories = {category.value for category in SentimentCategory}
+    categories = frame["sentiment_category"].str.upper()
+    frame["sentiment_category"] = categories.where(categories.isin(valid_categories), SentimentCategory.DESCONOCIDO.value)
+
+    frame = frame[frame["source_link"].notna() & (frame["source_link"].str.strip() != "")]
+    # Si el scrape trae la misma noticia dos veces, gana la última
+    frame = frame.drop_duplicates(subset="source_link", keep="last")
+
+    frame = frame.astype(object).where(frame.notna(), None)
+    frame["content_hash"] = [news_content_hash(*texts) for texts in zip(frame["title"], frame["detail"], frame["content"])]
+    return frame
+
+
+def _upsert_statement(dialect_name):
+    table = NewsModel.__table__
+    if dialect_name == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update({column: stmt.inserted[column] for column in UPDATE_COLUMNS})
+    if dialect_name == "sqlite":
+        # Solo para pruebas y benchmarks locales
+        stmt = sqlite.insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=["source_link"],
+            set_={column: stmt.excluded[column] for column in UPDATE_COLUMNS},
+        )
+    raise ValueError(f"Bulk upsert not supported for dialect {dialect_name}")
+
+
+async def _existing_hashes(conn, source_links):
+    """{source_link: (id, content_hash, hash_stored)} de los artículos que ya existen"""
+    rows = (await conn.execute(
+        select(NewsModel.source_link, NewsModel.id, NewsModel.content_hash)
+        .where(NewsModel.source_link.in_(source_links))
+    )).all()
+
+    # Filas anteriores a la columna (sin backfill, p. ej. en SQLite): el hash se calcula del texto guardado
+    computed = {}
+    missing = [news_id for _, news_id, content_hash in rows if content_hash is None]
+    if missing:
+        result = await conn.execute(
+            select(NewsModel.id, NewsModel.title, NewsModel.detail, NewsModel.content).where(NewsModel.id.in_(missing))
+        )
+        computed = {news_id: news_content_hash(title, detail, content) for news_id, title, detail, content in result}
+
+    return {
+        link: (news_id, content_hash or computed[news_id], content_hash is not None)
+        for link, news_id, content_hash in rows
+    }
+
+
+async def _mark_for_analysis(conn, news_ids):
+    """
+    Las traducciones y personajes describen el texto anterior: se conservan
+    (la API sigue sirviéndolos) y el paso de análisis regenera los marcados
+    """
+    await conn.execute(update(NewsModel).where(NewsModel.id.in_(news_ids)).values(needs_analysis=True))
+
+
+async def upsert_news(df: pd.DataFrame, batch_size: int = 1000, bind=None, skip_unchanged: bool = True) -> IngestionReport:
+    """
+    Cleans the frame and upserts it into `news` in batches, keyed on the
+    unique source_link. Each batch runs in its own transaction.
+
+    With skip_unchanged, articles whose content_hash matches the stored one are
+    not written at all, so re-scraping a batch does not dirty pages or bump
+    rows that did not change. Articles whose text changed are rewritten and
+    flagged with needs_analysis, keeping their current translations and
+    characters until the analysis step regenerates them; their ids are also
+    returned in the report.
+    """
+    bind = bind or engine
+    start = time.perf_counter()
+    frame = prepare_news_frame(df)
+    records = frame.to_dict("records")
+    stmt = _upsert_statement(bind.dialect.name)
+
+    batches = written = inserted = updated = unchanged = 0
+    changed_ids = []
+    for offset in range(0, len(records), batch_size):
+        batch = records[offset:offset + batch_size]
+        async with bind.begin() as conn:
+            if skip_unchanged:
+                existing = await _existing_hashes(conn, [record["source_link"] for record in batch])
+                pending, stale_ids = [], []
+                for record in batch:
+                    news_id, stored_hash, hash_stored = existing.get(record["source_link"], (None, None, False))
+                    if news_id is None:
+                        inserted += 1
+                    elif stored_hash == record["content_hash"]:
+                        unchanged += 1
+                        if hash_stored:
+                            continue
+                        # Mismo texto, pero falta guardar el hash
+                    else:
+                        updated += 1
+                        stale_ids.append(news_id)
+                    pending.append(record)
+                batch = pending
+            if batch:
+                await conn.execute(stmt, batch)
+            if skip_unchanged and stale_ids:
+                await _mark_for_analysis(conn, stale_ids)
+                changed_ids.extend(stale_ids)
+        written += len(batch)
+        batches += 1
+        logger.debug("Lote %s: %s filas escritas", batches, len(batch))
+
+    report = IngestionReport(
+        rows_read=len(df),
+        rows_written=written,
+        rows_skipped=len(df) - len(records),
+        batches=batches,
+        seconds=time.perf_counter() - start,
+        inserted=inserted,
+        updated=updated,
+        unchanged=unchanged,
+        changed_ids=changed_ids,
+    )
+    logger.info(
+        "Ingesta completada: %s filas escritas (%s nuevas, %s modificadas, %s sin cambios), %s descartadas, "
+        "%s lotes en %.2fs (%.0f filas/s)",
+        report.rows_written, report.inserted, report.updated, report.unchanged, report.rows_skipped,
+        report.batches, report.seconds, report.rows_per_second,
+    )
+    return report
@@ -0,0 +1,104 @@
+import re
+import numpy as np
+import pandas as pd
+
+SURROGATES = re.compile(r'[\ud800-\udfff]')
+_SURROGATE_CHUNK = 256
+
+
+def _holds_strings(values):
+    """
+    True si entre los valores no nulos hay algún str. Series.apply re-infiere el
+    dtype del resultado y solo lo deja en object con certeza cuando hay texto;
+    en el resto de casos (números, fechas, bools...) se usa el camino por
+    elemento para devolver exactamente lo mismo.
+    """
+    kind = pd.api.types.infer_dtype(values, skipna=False)
+    if kind == "string":
+        return True
+    if kind in ("mixed", "mixed-integer"):
+        return any(isinstance(value, str) for value in values)
+    return False
+
+
+def _fill_missing(series, fill):
+    """Vectorized `series.apply(lambda x: fill if pd.isna(x) else x)`"""
+    if not isinstance(series.dtype, np.dtype):
+        # Int64, category, string...: cada uno tiene su propio apply
+        return series.apply(lambda x: fill if pd.isna(x) else x)
+    kind = series.dtype.kind
+    if kind in "iub":
+        # No pueden contener NaN
+        return series.copy()
+    mask = series.isna().to_numpy()
+    if kind in "fM":
+        if not mask.any() or (fill is None and not mask.all()):
+            # apply vuelve al dtype original y el NaN/NaT se queda como está
+            return series.copy()
+    elif kind != "O" or (not mask.all() and not _holds_strings(series.to_numpy()[~mask])):
+        return series.apply(lambda x: fill if pd.isna(x) else x)
+
+    values = series.to_numpy(dtype=object, copy=True)
+    values[mask] = fill
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+
+def convert_nan_to_none(value):
+    if isinstance(value, pd.Series):
+        return _fill_missing(value, None)
+    elif isinstance(value, list):
+        return [None if pd.isna(x) else x for x in value]
+    else:
+        return None if pd.isna(value) else value
+
+def convert_nan_to_empty_string(value):
+    if isinstance(value, pd.Series):
+        return _fill_missing(value, "")
+    elif isinstance(value, list):
+        return ["" if pd.isna(x) else x for x in value]
+    else:
+        return "" if pd.isna(value) else value
+
+def remove_surrogates(text):
+    if isinstance(text, str):
+        return SURROGATES.sub('', text)
+    return text
+
+def _encodes(text):
+    # Codificar a UTF-8 solo falla con surrogates, y es mucho más rápido que la regex
+    try:
+        text.encode("utf-8")
+        return True
+    except UnicodeEncodeError:
+        return False
+
+def _cells_with_surrogates(texts):
+    """Posiciones de los textos con surrogates, revisando por bloques y celda a celda solo en los bloques que fallan"""
+    positions = []
+    for start in range(0, len(texts), _SURROGATE_CHUNK):
+        chunk = texts[start:start + _SURROGATE_CHUNK]
+        if not _encodes("\n".join(chunk)):
+            positions.extend(start + i for i, text in enumerate(chunk) if not _encodes(text))
+    return positions
+
+def _remove_surrogates_column(series):
+    values = series.to_numpy()
+    present = np.flatnonzero(series.notna().to_numpy())
+    if not _holds_strings(values[present]):
+        return series.apply(remove_surrogates)
+    if pd.api.types.infer_dtype(values[present], skipna=False) == "string":
+        strings = present
+    else:
+        strings = present[[isinstance(value, str) for value in values[present]]]
+    dirty = strings[_cells_with_surrogates(values[strings].tolist())]
+    if not len(dirty):
+        # Caso normal: ninguna celda tiene surrogates y la columna queda igual
+        return series
+    cleaned = series.copy()
+    cleaned.iloc[dirty] = [SURROGATES.sub('', text) for text in values[dirty]]
+    return cleaned
+
+def clean_dataframe(df):
+    for col in df.select_dtypes(include=['object']):
+        df[col] = _remove_surrogates_column(df[col])
+    return df
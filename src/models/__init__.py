@@ -5,4 +5,5 @@ from .base_model import Base
 from .news_tag_model import NewsModel
 from .favorites_model import FavoritesModel
 from .categories_model import InterestsModel
-from .user_model import UserModel
\ No newline at end of file
+from .user_model import UserModel
+from .subscription_model import SubscriptionModel, SubscriptionHistoryModel, ProcessedMessageModel
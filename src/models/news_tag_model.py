@@ -1,11 +1,16 @@
 from __future__ import annotations  # Enable forward references
 
-import pandas as pd
-from sqlalchemy import Column, Integer, Numeric, String, ForeignKey, DateTime, Text, DECIMAL, Enum
+from typing import TYPE_CHECKING
+from sqlalchemy import Boolean, Column, Integer, Numeric, String, ForeignKey, DateTime, Text, DECIMAL, Enum, false
 from sqlalchemy.orm import relationship
 from src.models.base_model import Base
 from src.schema.sentiment_category import SentimentCategory
-from src.schema.bank_new import BankNew
+from src.utils.hashing import news_content_hash
+from src.utils.nulls import none_if_missing
+
+if TYPE_CHECKING:
+    # BankNew arrastra pandas: solo se necesita al ingerir noticias, no al servir la API
+    from src.ingestion.bank_new import BankNew
 
 class NewsTagAssociation(Base):
     __tablename__ = 'news_tag'
@@ -66,6 +71,10 @@ class NewsModel(Base):
     publish_datetime = Column(DateTime, nullable=True)
     location = Column(String(255), nullable=True)
     source_link = Column(String(255), nullable=False, unique=True)
+    # Hash de title/detail/content: el re-scrape de un artículo sin cambios no se reescribe
+    content_hash = Column(String(64), nullable=True)
+    # El texto cambió en un re-scrape: sus traducciones y personajes son del anterior hasta que se regeneren
+    needs_analysis = Column(Boolean, nullable=False, default=False, server_default=false())
     sentiment_category = Column(Enum(SentimentCategory), nullable=False)
     justification = Column(Text)
     sentiment_score = Column(Numeric(5, 5), nullable=False)
@@ -91,16 +100,20 @@ class NewsModel(Base):
 
     @staticmethod
     def from_bank_new(bank_new: BankNew) -> 'NewsModel':
+        title = none_if_missing(bank_new.title)
+        detail = none_if_missing(bank_new.detail)
+        content = none_if_missing(bank_new.content)
         return NewsModel(
-            news_source=bank_new.news_source if pd.notna(bank_new.news_source) else None,
-            title=bank_new.title if pd.notna(bank_new.title) else None,
-            detail=bank_new.detail if pd.notna(bank_new.detail) else None,
-            image_url=bank_new.image_url if pd.notna(bank_new.image_url) else None,
-            content=bank_new.content if pd.notna(bank_new.content) else None,
-            author=bank_new.author if pd.notna(bank_new.author) else None,
-            publish_datetime=bank_new.publish_datetime if pd.notna(bank_new.publish_datetime) else None,
-            location=bank_new.location if pd.notna(bank_new.location) else None,
+            news_source=none_if_missing(bank_new.news_source),
+            title=title,
+            detail=detail,
+            image_url=none_if_missing(bank_new.image_url),
+            content=content,
+            author=none_if_missing(bank_new.author),
+            publish_datetime=none_if_missing(bank_new.publish_datetime),
+            location=none_if_missing(bank_new.location),
             source_link=bank_new.source_link,
+            content_hash=news_content_hash(title, detail, content),
             sentiment_category=bank_new.sentiment_category,
             sentiment_score=bank_new.sentiment_score,
         )
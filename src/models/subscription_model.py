@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship
 import enum
 from src.models.base_model import Base
@@ -51,6 +51,7 @@ class SubscriptionModel(Base):
     auto_renew = Column(Boolean, default=True)
     platform = Column(String(50), nullable=False)  # ios/android
     receipt_data = Column(String(2048), nullable=True)  # Store the receipt/token for verification
+    purchase_token = Column(String(512), nullable=True, index=True)  # purchaseToken de Google Play, para las notificaciones RTDN
     product_id = Column(String(255), nullable=True)
     provider = Column(String(50), nullable=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -59,6 +60,13 @@ class SubscriptionModel(Base):
     user = relationship("UserModel", back_populates="subscriptions")
     history = relationship("SubscriptionHistoryModel", back_populates="subscription")
 
+    __table_args__ = (
+        # Suscripción activa/caducada de un usuario (verify, create, cancel)
+        Index('ix_subscription_user_status_end_date', 'user_id', 'status', 'end_date'),
+        # Barrido de caducadas: ACTIVE con end_date pasada
+        Index('ix_subscription_status_end_date', 'status', 'end_date'),
+    )
+
 class SubscriptionHistoryModel(Base):
     __tablename__ = 'subscription_history'
 
@@ -68,4 +76,12 @@ class SubscriptionHistoryModel(Base):
     details = Column(Text, nullable=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
-    subscription = relationship("SubscriptionModel", back_populates="history") 
\ No newline at end of file
+    subscription = relationship("SubscriptionModel", back_populates="history")
+
+
+class ProcessedMessageModel(Base):
+    """Mensajes de Pub/Sub ya aplicados: las reentregas se confirman sin volver a procesarse"""
+    __tablename__ = 'pubsub_processed_message'
+
+    message_id = Column(String(255), primary_key=True)
+    processed_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
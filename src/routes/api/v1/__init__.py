@@ -3,14 +3,16 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from src.config.db_config import get_db
 from . import articles
 from . import analysis
 from . import categories
 from . import favorites
 from .subscriptions import router as subscription_router
 
-router = APIRouter()
+# Una sesión de base de datos por petición, compartida por auth y servicios
+router = APIRouter(dependencies=[Depends(get_db)])
 # router.include_router(articles.router)
 router.include_router(articles.router, tags=["Articles"])
 router.include_router(analysis.router, tags=["Analysis"])
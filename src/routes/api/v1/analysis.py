@@ -22,16 +22,16 @@ async def get_analysis(
 ):
     try:
         query = query.lower()
-        logger.debug(f"Performing analysis with source_query='{query}', interval={interval}, unit='{unit}'")
-        analysis_data = analysis_service.search_by_text_analysis(query=query, interval=interval, unit=unit)
+        logger.debug("Performing analysis with source_query='%s', interval=%s, unit='%s'", query, interval, unit)
+        analysis_data = await analysis_service.search_by_text_analysis(query=query, interval=interval, unit=unit)
         logger.info("Analysis data successfully retrieved.")
         return analysis_data
 
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc.detail}")
+        logger.error("HTTP Exception: %s", http_exc.detail)
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred. Please try again later."
@@ -1,24 +1,29 @@
 import csv
 import io
 import logging
-from fastapi import APIRouter, Query, HTTPException, Response, status
+from fastapi import APIRouter, Query, HTTPException, Request, Response, status
+from pydantic import TypeAdapter
 from typing import List, Optional
+from src.config.compression_config import feed_cache
 from src.services.article_service import ArticleService
 from src.schema.responses.response_articles_models import ArticleResponseModel, NewsSourceResponseModel
 from src.schema.examples.response_articles_examples import articles_responses, article_by_id_responses, news_sources_responses
 from src.utils.logger import setup_logger
-from openpyxl import Workbook
+from src.utils.metrics import SERIALIZATION_SECONDS
 
 logger = setup_logger(__name__, level=logging.INFO)
 
 router = APIRouter()
 article_service = ArticleService()
 
+_articles_adapter = TypeAdapter(List[ArticleResponseModel])
+
 @router.get("/articles",
             description="Retrieve a list of articles that match a keyword search within the article content",
             response_model=List[ArticleResponseModel],
             responses=articles_responses)
 async def get_articles(
+    request: Request,
     query: str = Query("", description="Keyword to search within articles (leave empty to retrieve the most recent articles)"),
     limit: int = Query(50, description="Maximum number of articles to return"),
     sort: str = Query("publish_datetime", description="Field to sort results by (default is by date)"),
@@ -26,21 +31,31 @@ async def get_articles(
 ):
     try:
         query = query.lower()
-        if not query:
-            logger.debug(f"Empty query, fetching the most recent articles with limit={limit} sorted by {sort}.")
+        if not query and not token:
+            # El feed anónimo es igual para todos: se sirve desde la cache ya serializado y comprimido
+            cache_key = ("articles", limit, sort)
+            entry = feed_cache.get(cache_key)
+            if entry is None:
+                logger.debug("Feed cache miss, fetching the most recent articles with limit=%s sorted by %s.", limit, sort)
+                articles = await article_service.get_articles(limit, sort, token)
+                with SERIALIZATION_SECONDS.labels(operation="feed_json").time():
+                    entry = feed_cache.set(cache_key, _articles_adapter.dump_json(articles))
+            return feed_cache.to_response(entry, request.headers.get("accept-encoding", ""))
+        elif not query:
+            logger.debug("Empty query, fetching the most recent articles with limit=%s sorted by %s.", limit, sort)
             articles = await article_service.get_articles(limit, sort, token)
         else:
-            logger.debug(f"Fetching articles with query='{query}', limit={limit}, sort='{sort}'")
+            logger.debug("Fetching articles with query='%s', limit=%s, sort='%s'", query, limit, sort)
             articles = await article_service.search_by_text_db(query, limit, sort, token)
 
-        logger.info(f"Returning {len(articles)} articles.")
+        logger.info("Returning %s articles.", len(articles))
         return articles
 
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc.detail}")
+        logger.error("HTTP Exception: %s", http_exc.detail)
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred. Please try again later."
@@ -56,16 +71,16 @@ async def get_articles_by_email(
     sort: str = Query("publish_datetime", description="Field to sort results by (default is by date)")
 ):
     try:
-        logger.debug(f"Fetching articles for user email='{email}', limit={limit}, sort='{sort}'.")
+        logger.debug("Fetching articles for user email='%s', limit=%s, sort='%s'.", email, limit, sort)
         articles = await article_service.get_articles_by_email(email, limit, sort)
-        logger.info(f"Returning {len(articles)} articles for email={email}.")
+        logger.info("Returning %s articles for email=%s.", len(articles), email)
         return articles
 
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc.detail}")
+        logger.error("HTTP Exception: %s", http_exc.detail)
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred. Please try again later."
@@ -83,6 +98,8 @@ async def get_articles_excel(
         articles = await article_service.search_by_text_db(query, limit=10000) if query else await article_service.get_all_articles()
 
         # Create an in-memory Excel workbook
+        from openpyxl import Workbook  # Solo lo usa este endpoint
+
         workbook = Workbook()
         sheet = workbook.active
         sheet.title = "Articles"
@@ -140,10 +157,10 @@ async def get_articles_excel(
         )
 
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc.detail}")
+        logger.error("HTTP Exception: %s", http_exc.detail)
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=500,
             detail="An unexpected error occurred. Please try again later."
@@ -163,10 +180,10 @@ async def get_news_sources():
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="The requested resource does not exist.",
             )
-        logger.info(f"Retrieved {len(sources)} unique news sources.")
+        logger.info("Retrieved %s unique news sources.", len(sources))
         return {"sources": sources}
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc.detail}")
+        logger.error("HTTP Exception: %s", http_exc.detail)
         raise http_exc
     except ValueError:
         logger.error("Invalid request. Query parameter is invalid or missing.")
@@ -175,7 +192,7 @@ async def get_news_sources():
             detail="Invalid request. Query parameter is invalid or missing.",
         )
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred. Please try again later.",
@@ -186,6 +203,7 @@ async def get_news_sources():
             response_model=List[ArticleResponseModel],
             responses=articles_responses)
 async def get_articles_by_source(
+    request: Request,
     source: str = Query(..., description="News source to filter articles"),
     limit: int = Query(50, description="Maximum number of articles to return"),
     sort: str = Query("publish_datetime", description="Field to sort results by (default is by date)"),
@@ -195,16 +213,26 @@ async def get_articles_by_source(
     try:
         source = source.lower()
 
-        logger.debug(f"Fetching articles with source='{source}', limit={limit}, sort='{sort}'.")
+        if not token:
+            cache_key = ("articles/by-source", source, limit, sort)
+            entry = feed_cache.get(cache_key)
+            if entry is None:
+                logger.debug("Feed cache miss for source='%s', limit=%s, sort='%s'.", source, limit, sort)
+                articles = await article_service.search_by_source(source, limit, sort, token)
+                with SERIALIZATION_SECONDS.labels(operation="feed_json").time():
+                    entry = feed_cache.set(cache_key, _articles_adapter.dump_json(articles))
+            return feed_cache.to_response(entry, request.headers.get("accept-encoding", ""))
+
+        logger.debug("Fetching articles with source='%s', limit=%s, sort='%s'.", source, limit, sort)
         articles = await article_service.search_by_source(source, limit, sort, token)
         
-        logger.info(f"Returning {len(articles)} articles for source='{source}'.")
+        logger.info("Returning %s articles for source='%s'.", len(articles), source)
         return articles
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc.detail}")
+        logger.error("HTTP Exception: %s", http_exc.detail)
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred. Please try again later.",
@@ -216,26 +244,26 @@ async def get_articles_by_source(
             responses=article_by_id_responses)
 async def get_article_by_id(id: int, token: Optional[str] = None):
     try:
-        logger.debug(f"Fetching article with ID: {id} and token: {token}")
+        logger.debug("Fetching article with ID: %s (authenticated: %s)", id, bool(token))
         article = await article_service.get_article_by_id(id, token)
         if not article:
-            logger.warning(f"Article with ID {id} not found.")
+            logger.warning("Article with ID %s not found.", id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="The article with the specified ID was not found."
             )
         return article
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc.detail}")
+        logger.error("HTTP Exception: %s", http_exc.detail)
         raise http_exc
     except ValueError:
-        logger.error(f"Invalid article ID: {id}")
+        logger.error("Invalid article ID: %s", id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid request. The article ID must be a valid integer greater than 0."
         )
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred. Please try again later."
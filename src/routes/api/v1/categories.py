@@ -23,12 +23,12 @@ async def add_categories(
     keywords: List[str] = Query(..., description="Keywords to monitor"),
 ):
     try:
-        logger.info(f"Adding categories for token: {token}, keywords: {keywords}")
+        logger.info("Adding categories for token: %s..., keywords: %s", token[:10], keywords)
         
         # Llamada directa, sin pasar `db`
         result = await categories_service.process_categories(token, keywords)
         
-        logger.info(f"Categories added successfully for token: {token}")
+        logger.info("Categories added successfully for token: %s...", token[:10])
         return {
             "message": result["message"],
             "categories": result["categories"],
@@ -38,7 +38,7 @@ async def add_categories(
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error while adding categories: {e}")
+        logger.error("Unexpected error while adding categories: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while adding categories. Please try again later.",
@@ -54,13 +54,13 @@ async def get_categories(
     token: str = Query(...),
 ):
     try:
-        logger.info(f"Fetching categories for token: {token}")
+        logger.info("Fetching categories for token: %s...", token[:10])
         user_interests = await categories_service.get_user_interests(token)
         return user_interests
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error while fetching categories: {e}")
+        logger.error("Unexpected error while fetching categories: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while fetching categories. Please try again later.",
@@ -77,7 +77,7 @@ async def delete_categories(
     category_ids: List[int] = Query(...),
 ):
     try:
-        logger.info(f"Deleting categories {category_ids} for token: {token}")
+        logger.info("Deleting categories %s for token: %s...", category_ids, token[:10])
         deleted_categories = await categories_service.delete_categories(token, category_ids)
         return {
             "message": "Categories deleted successfully",
@@ -87,7 +87,7 @@ async def delete_categories(
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error while deleting categories: {e}")
+        logger.error("Unexpected error while deleting categories: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while deleting categories. Please try again later.",
@@ -27,7 +27,7 @@ async def add_favorite(
     news_id: int = Query(..., description="ID of the news to add to favorites"),
 ):
     try:
-        logger.info(f"Adding news_id {news_id} to favorites for token: {token}")
+        logger.info("Adding news_id %s to favorites for token: %s...", news_id, token[:10])
         result = await favorites_service.add_favorite(token, news_id)
         return {
             "message": result["message"],
@@ -37,7 +37,7 @@ async def add_favorite(
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while adding the favorite.",
@@ -53,14 +53,14 @@ async def get_favorites(
     token: str = Query(..., description="User authentication token"),
 ):
     try:
-        logger.info(f"Fetching favorites for token: {token}")
+        logger.info("Fetching favorites for token: %s...", token[:10])
         result = await favorites_service.get_favorites(token)
         return result
 
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while retrieving favorites.",
@@ -77,7 +77,7 @@ async def delete_favorite(
     news_id: int = Query(..., description="ID of the news to remove from favorites"),
 ):
     try:
-        logger.info(f"Removing news_id {news_id} from favorites for token: {token}")
+        logger.info("Removing news_id %s from favorites for token: %s...", news_id, token[:10])
         result = await favorites_service.delete_favorite(token, news_id)
         return {
             "message": result["message"],
@@ -87,7 +87,7 @@ async def delete_favorite(
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while deleting the favorite.",
@@ -20,7 +20,7 @@ async def create_subscription(
     try:
         user = await subscription_service.get_user_from_token(token)
 
-        # Ya no pasamos db manualmente; create_subscription debe usar async for db in get_db()
+        # Ya no pasamos db manualmente; create_subscription reutiliza la sesión de la petición
         result = await subscription_service.create_subscription(
             user_id=user.id,
             product_id=request.product_id,
@@ -36,10 +36,10 @@ async def create_subscription(
         }
 
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc.detail}")
+        logger.error("HTTP Exception: %s", http_exc.detail)
         raise
     except Exception as e:
-        logger.error(f"Error creating subscription: {e}")
+        logger.error("Error creating subscription: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while creating the subscription"
@@ -51,16 +51,16 @@ async def verify_subscription(
 ):
     """Verify subscription status"""
     try:
-        logger.info(f"Verifying subscription for token: {token[:10]}...")
+        logger.info("Verifying subscription for token: %s...", token[:10])
         result = await subscription_service.verify_subscription(token)
-        logger.info(f"Subscription verification result: {result}")
+        logger.debug("Subscription verification result: %s", result)
         return result
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception in verify_subscription: {http_exc.detail}")
+        logger.error("HTTP Exception in verify_subscription: %s", http_exc.detail)
         raise
     except Exception as e:
         import traceback
-        logger.error(f"Error verifying subscription: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Error verifying subscription: %s\n%s", str(e), traceback.format_exc())
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while verifying the subscription"
@@ -82,9 +82,9 @@ async def verify_subscription_post(
                 detail="Missing required token"
             )
 
-        logger.info(f"Verifying subscription for token: {token[:10]}...")
+        logger.info("Verifying subscription for token: %s...", token[:10])
         result = await subscription_service.verify_subscription(token)
-        logger.info(f"Subscription verification result: {result}")
+        logger.debug("Subscription verification result: %s", result)
         return result
 
     except json.JSONDecodeError:
@@ -94,12 +94,12 @@ async def verify_subscription_post(
             detail="Invalid JSON body"
         )
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception in verify_subscription_post: {http_exc.detail}")
+        logger.error("HTTP Exception in verify_subscription_post: %s", http_exc.detail)
         raise
     except Exception as e:
         import traceback
         error_traceback = traceback.format_exc()
-        logger.error(f"Error verifying subscription (POST): {str(e)}\nTraceback: {error_traceback}")
+        logger.error("Error verifying subscription (POST): %s\nTraceback: %s", str(e), error_traceback)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while verifying the subscription"
@@ -113,10 +113,10 @@ async def cancel_subscription(
     try:
         return await subscription_service.cancel_subscription(token)
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc.detail}")
+        logger.error("HTTP Exception: %s", http_exc.detail)
         raise
     except Exception as e:
-        logger.error(f"Error cancelling subscription: {e}")
+        logger.error("Error cancelling subscription: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while cancelling the subscription"
@@ -156,10 +156,10 @@ async def verify_receipt(
         }
 
     except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc.detail}")
+        logger.error("HTTP Exception: %s", http_exc.detail)
         raise
     except Exception as e:
-        logger.error(f"Error verifying receipt: {e}")
+        logger.error("Error verifying receipt: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while verifying the receipt"
@@ -0,0 +1,60 @@
+"""
+Bulk ingestion of scraped news.
+
+Reads a CSV, Parquet or Excel file with BankNew columns (source_link, title,
+detail, content, publish_datetime, sentiment_category, ...), cleans it and
+upserts it into `news` in batches keyed on source_link. New articles are
+inserted; existing ones are only rewritten when their title/detail/content hash
+changed (run src/scripts/migrate.py first to add the columns). Articles whose
+text changed keep their translations and characters and are flagged with
+needs_analysis so the analysis step regenerates them.
+
+Usage:
+    python src/scripts/ingest_news.py scraped.parquet
+    python src/scripts/ingest_news.py scraped.csv --batch-size 5000 --db-url sqlite+aiosqlite:///local.db
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+
+async def run(args):
+    # Se importa aquí para que --db-url llegue a Settings antes de crear el engine
+    from src.config.db_config import engine
+    from src.ingestion.bulk import read_news_file, upsert_news
+
+    df = read_news_file(args.path)
+    try:
+        report = await upsert_news(df, batch_size=args.batch_size, skip_unchanged=not args.rewrite_all)
+    finally:
+        await engine.dispose()
+
+    print(f"{report.rows_written} rows upserted ({report.inserted} new, {report.updated} changed), "
+          f"{report.unchanged} unchanged, {report.rows_skipped} skipped in {report.batches} batches, "
+          f"{report.seconds:.2f}s, {report.rows_per_second:.0f} rows/s")
+    if report.changed_ids:
+        print("Changed article ids (flagged with needs_analysis): "
+              + ",".join(str(news_id) for news_id in report.changed_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk upsert scraped news into the news table")
+    parser.add_argument("path", help="CSV, Parquet or Excel file with BankNew columns")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT ... ON DUPLICATE KEY UPDATE")
+    parser.add_argument("--rewrite-all", action="store_true",
+                        help="Upsert every row, even if its content hash did not change")
+    parser.add_argument("--db-url", help="Database URL (default: the DB_* settings)")
+    args = parser.parse_args()
+
+    if args.db_url:
+        os.environ["DB_URL"] = args.db_url
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,17 @@ from sqlalchemy import text, select
 from src.models.news_tag_model import NewsModel
 from src.schema.responses.response_analysis_models import AnalysisResponseModel, NewsHistoryModel, NewsPerceptionModel, GeneralPerceptionModel
 from src.utils.logger import setup_logger
-from src.config.db_config import get_db
+from src.utils.metrics import timed
+from src.config.db_config import get_session
 from sqlalchemy.orm import Session
 
 logger = setup_logger(__name__, level=logging.DEBUG)
 
 class AnalysisService:
 
+    @timed("AnalysisService")
     async def search_by_text_analysis(self, query: str, interval: int, unit: str) -> AnalysisResponseModel:
-        logger.info(f"Calculating date range for interval: {interval} {unit}")
+        logger.info("Calculating date range for interval: %s %s", interval, unit)
         end_date = datetime.now()
         if unit == "days":
             start_date = end_date - timedelta(days=interval)
@@ -26,12 +28,12 @@ class AnalysisService:
         else:
             raise ValueError("Invalid time unit")
 
-        logger.debug(f"Date range calculated: start_date={start_date}, end_date={end_date}")
+        logger.debug("Date range calculated: start_date=%s, end_date=%s", start_date, end_date)
         query_str = f'"{query}"'
 
-        async for db in get_db():
+        async with get_session(readonly=True) as db:
             try:
-                logger.info(f"Performing async text search in database for query: '{query}'")
+                logger.info("Performing async text search in database for query: '%s'", query)
                 sql = text("""
                     SELECT *, MATCH(title, content) AGAINST(:query IN BOOLEAN MODE) AS distance
                     FROM news
@@ -47,7 +49,7 @@ class AnalysisService:
                 })
 
                 rows = result.fetchall()
-                logger.debug(f"Text search completed. Found {len(rows)} articles.")
+                logger.debug("Text search completed. Found %s articles.", len(rows))
 
                 average_scores = defaultdict(list)
                 sources_history = defaultdict(int)
@@ -98,7 +100,7 @@ class AnalysisService:
                 return response
 
             except Exception as e:
-                logger.error(f"Error in async analysis: {e}")
+                logger.error("Error in async analysis: %s", e)
                 import traceback
                 logger.debug(traceback.format_exc())
                 raise
@@ -1,4 +1,5 @@
 import logging
+import time
 from typing import Optional
 from fastapi import HTTPException
 from contextlib import asynccontextmanager
@@ -8,20 +9,22 @@ from src.schema.responses.response_articles_models import ArticleResponseModel,
 from src.models.news_tag_model import NewsModel, NewsCharactersModel, NewsTransCharactersModel
 from sqlalchemy.orm import joinedload, selectinload, aliased
 from sqlalchemy import text, select
-from src.config.db_config import get_db
+from src.config.db_config import get_session
 from src.models.user_model import UserModel
 from src.utils.auth_utils import decode_and_sync_user
 from src.utils.logger import setup_logger
+from src.utils.metrics import SERIALIZATION_SECONDS, timed
 
 # Configure the logger
 logger = setup_logger(__name__, level=logging.DEBUG)
 
 class ArticleService:
 
+    @timed("ArticleService")
     async def get_articles(self, limit: int, sort: str = "publish_datetime", token: Optional[str] = None):
-        async for db in get_db():
+        async with get_session(readonly=True) as db:
             try:
-                logger.debug(f"Fetching articles with limit={limit} sorted by {sort} in descending order.")
+                logger.debug("Fetching articles with limit=%s sorted by %s in descending order.", limit, sort)
 
                 stmt = (
                     select(NewsModel)
@@ -35,16 +38,19 @@ class ArticleService:
                 result = await db.execute(stmt)
                 articles = result.scalars().all()
 
-                logger.info(f"Obtained {len(articles)} articles sorted by {sort} in descending order.")
+                logger.info("Obtained %s articles sorted by %s in descending order.", len(articles), sort)
 
                 favorite_ids = set()
                 if token:
-                    logger.debug(f"Token provided. Decoding and checking favorites for the user.")
-                    user = decode_and_sync_user(token, db)
-                    fav_stmt = select(FavoritesModel.news_id).where(FavoritesModel.user_id == user.id)
-                    fav_result = await db.execute(fav_stmt)
-                    favorite_ids = {row[0] for row in fav_result.all()}
-
+                    logger.debug("Token provided. Decoding and checking favorites for the user.")
+                    # Auth y favoritos van al primario: escriben y deben leer lo recién escrito
+                    async with get_session() as primary_db:
+                        user = await decode_and_sync_user(token, primary_db)
+                        fav_stmt = select(FavoritesModel.news_id).where(FavoritesModel.user_id == user.id)
+                        fav_result = await primary_db.execute(fav_stmt)
+                        favorite_ids = {row[0] for row in fav_result.all()}
+
+                serialize_start = time.perf_counter()
                 formatted_articles = [
                     ArticleResponseModel(
                         id=article.id,
@@ -118,28 +124,30 @@ class ArticleService:
                     )
                     for article in articles
                 ]
+                SERIALIZATION_SECONDS.labels(operation="get_articles").observe(time.perf_counter() - serialize_start)
 
-                logger.info(f"Returning {len(formatted_articles)} articles formatted using ArticleResponseModel.")
+                logger.info("Returning %s articles formatted using ArticleResponseModel.", len(formatted_articles))
                 return formatted_articles
 
             except Exception as e:
                 import traceback
                 error_details = traceback.format_exc()
-                logger.error(f"Error while fetching articles: {e}\n{error_details}")
+                logger.error("Error while fetching articles: %s\n%s", e, error_details)
                 raise
 
+    @timed("ArticleService")
     async def search_by_text_db(self, query: str, limit: int, sort: str = "publish_datetime", token: Optional[str] = None):
-        logger.debug(f"Performing SQL search for query='{query}' with limit={limit}.")
+        logger.debug("Performing SQL search for query='%s' with limit=%s.", query, limit)
 
         # Validación contra SQL injection en columna sort
         valid_sort_columns = {"publish_datetime", "title", "author", "sentiment_score"}
         if sort not in valid_sort_columns:
-            logger.warning(f"Invalid sort column: {sort}. Defaulting to 'publish_datetime'.")
+            logger.warning("Invalid sort column: %s. Defaulting to 'publish_datetime'.", sort)
             sort = "publish_datetime"
 
-        async for db in get_db():
+        async with get_session(readonly=True) as db:
             try:
-                logger.debug(f"Fetching articles using FULLTEXT MATCH with query='{query}'.")
+                logger.debug("Fetching articles using FULLTEXT MATCH with query='%s'.", query)
 
                 quoted_query = f'"{query}"'
 
@@ -165,13 +173,15 @@ class ArticleService:
                 favorite_ids = set()
                 if token:
                     logger.debug("Token provided. Decoding and checking favorites for the user.")
-                    user = decode_and_sync_user(token, db)
-                    favs = await db.execute(
-                        text("SELECT news_id FROM favorites WHERE user_id = :uid"),
-                        {"uid": user.id}
-                    )
-                    favorite_ids = {row[0] for row in favs.fetchall()}
+                    async with get_session() as primary_db:
+                        user = await decode_and_sync_user(token, primary_db)
+                        favs = await primary_db.execute(
+                            text("SELECT news_id FROM favorites WHERE user_id = :uid"),
+                            {"uid": user.id}
+                        )
+                        favorite_ids = {row[0] for row in favs.fetchall()}
 
+                serialize_start = time.perf_counter()
                 formatted_results = [
                     ArticleResponseModel(
                         id=article.id,
@@ -246,17 +256,19 @@ class ArticleService:
                     )
                     for article, distance in articles
                 ]
+                SERIALIZATION_SECONDS.labels(operation="search_by_text_db").observe(time.perf_counter() - serialize_start)
 
-                logger.info(f"Returning {len(formatted_results)} articles from SQL search.")
+                logger.info("Returning %s articles from SQL search.", len(formatted_results))
                 return formatted_results
 
             except Exception as e:
                 import traceback
-                logger.error(f"Error while performing SQL search: {e}\n{traceback.format_exc()}")
+                logger.error("Error while performing SQL search: %s\n%s", e, traceback.format_exc())
                 raise
 
+    @timed("ArticleService")
     async def get_all_articles(self):
-        async for db in get_db():
+        async with get_session(readonly=True) as db:
             try:
                 logger.debug("Fetching all articles sorted by publish_datetime in descending order.")
 
@@ -270,8 +282,9 @@ class ArticleService:
                 )
                 result = await db.execute(stmt)
                 articles = result.scalars().all()
-                logger.info(f"Fetched {len(articles)} articles.")
+                logger.info("Fetched %s articles.", len(articles))
 
+                serialize_start = time.perf_counter()
                 formatted_articles = [
                     ArticleResponseModel(
                         id=article.id,
@@ -345,19 +358,21 @@ class ArticleService:
                     )
                     for article in articles
                 ]
+                SERIALIZATION_SECONDS.labels(operation="get_all_articles").observe(time.perf_counter() - serialize_start)
 
                 return formatted_articles
 
             except Exception as e:
                 import traceback
                 error_details = traceback.format_exc()
-                logger.error(f"Error while fetching all articles: {e}\n{error_details}")
+                logger.error("Error while fetching all articles: %s\n%s", e, error_details)
                 raise
     
+    @timed("ArticleService")
     async def get_article_by_id(self, article_id: int, token: Optional[str] = None):
-        async for db in get_db():
+        async with get_session(readonly=True) as db:
             try:
-                logger.debug(f"Querying database for article with ID: {article_id}")
+                logger.debug("Querying database for article with ID: %s", article_id)
 
                 stmt = (
                     select(NewsModel)
@@ -371,9 +386,10 @@ class ArticleService:
                 article = result.scalars().first()
 
                 if not article:
-                    logger.warning(f"No article found with ID: {article_id}")
+                    logger.warning("No article found with ID: %s", article_id)
                     return None
 
+                serialize_start = time.perf_counter()
                 formatted_article = ArticleResponseModel(
                     id=article.id,
                     source=SourceModel(id=article.news_source, name=article.news_source),
@@ -444,15 +460,17 @@ class ArticleService:
                         for character in article.characters
                     ]
                 )
+                SERIALIZATION_SECONDS.labels(operation="get_article_by_id").observe(time.perf_counter() - serialize_start)
 
                 if token:
-                    user = decode_and_sync_user(token, db)
-                    stmt_fav = select(FavoritesModel).where(
-                        FavoritesModel.user_id == user.id,
-                        FavoritesModel.news_id == article_id
-                    )
-                    fav_result = await db.execute(stmt_fav)
-                    formatted_article.is_favorite = fav_result.scalars().first() is not None
+                    async with get_session() as primary_db:
+                        user = await decode_and_sync_user(token, primary_db)
+                        stmt_fav = select(FavoritesModel).where(
+                            FavoritesModel.user_id == user.id,
+                            FavoritesModel.news_id == article_id
+                        )
+                        fav_result = await primary_db.execute(stmt_fav)
+                        formatted_article.is_favorite = fav_result.scalars().first() is not None
                 else:
                     formatted_article.is_favorite = None
 
@@ -461,11 +479,12 @@ class ArticleService:
             except Exception as e:
                 import traceback
                 error_details = traceback.format_exc()
-                logger.error(f"Error while fetching article by ID: {e}\n{error_details}")
+                logger.error("Error while fetching article by ID: %s\n%s", e, error_details)
                 raise
 
+    @timed("ArticleService")
     async def get_all_news_sources(self):
-        async for db in get_db():
+        async with get_session(readonly=True) as db:
             try:
                 logger.debug("Fetching all unique news sources.")
 
@@ -474,19 +493,20 @@ class ArticleService:
                 sources = result.scalars().all()
 
                 unique_sources = [source for source in sources if source is not None]
-                logger.info(f"Found {len(unique_sources)} unique news sources.")
+                logger.info("Found %s unique news sources.", len(unique_sources))
                 return unique_sources
 
             except Exception as e:
                 import traceback
                 error_details = traceback.format_exc()
-                logger.error(f"Error while fetching unique news sources: {e}\n{error_details}")
+                logger.error("Error while fetching unique news sources: %s\n%s", e, error_details)
                 raise
 
+    @timed("ArticleService")
     async def search_by_source(self, source: str, limit: int, sort: str = "publish_datetime", token: Optional[str] = None):
-        async for db in get_db():
+        async with get_session(readonly=True) as db:
             try:
-                logger.debug(f"Querying database for articles with news_source='{source}', limit={limit}, sort={sort}.")
+                logger.debug("Querying database for articles with news_source='%s', limit=%s, sort=%s.", source, limit, sort)
 
                 stmt = (
                     select(NewsModel)
@@ -501,16 +521,19 @@ class ArticleService:
                 result = await db.execute(stmt)
                 articles = result.scalars().all()
 
-                logger.info(f"Obtained {len(articles)} articles for source='{source}'.")
+                logger.info("Obtained %s articles for source='%s'.", len(articles), source)
 
                 favorite_ids = set()
                 if token:
                     logger.debug("Token provided. Decoding and checking favorites for the user.")
-                    user = decode_and_sync_user(token, db)
-                    fav_stmt = select(FavoritesModel.news_id).where(FavoritesModel.user_id == user.id)
-                    fav_result = await db.execute(fav_stmt)
-                    favorite_ids = {row[0] for row in fav_result.fetchall()}
-
+                    # Auth y favoritos van al primario: escriben y deben leer lo recién escrito
+                    async with get_session() as primary_db:
+                        user = await decode_and_sync_user(token, primary_db)
+                        fav_stmt = select(FavoritesModel.news_id).where(FavoritesModel.user_id == user.id)
+                        fav_result = await primary_db.execute(fav_stmt)
+                        favorite_ids = {row[0] for row in fav_result.fetchall()}
+
+                serialize_start = time.perf_counter()
                 formatted_articles = [
                     ArticleResponseModel(
                         id=article.id,
@@ -584,21 +607,23 @@ class ArticleService:
                     )
                     for article in articles
                 ]
+                SERIALIZATION_SECONDS.labels(operation="search_by_source").observe(time.perf_counter() - serialize_start)
 
-                logger.info(f"Returning {len(formatted_articles)} articles formatted using ArticleResponseModel.")
+                logger.info("Returning %s articles formatted using ArticleResponseModel.", len(formatted_articles))
                 return formatted_articles
 
             except Exception as e:
                 import traceback
                 error_details = traceback.format_exc()
-                logger.error(f"Error while fetching articles by source: {e}\n{error_details}")
+                logger.error("Error while fetching articles by source: %s\n%s", e, error_details)
                 raise
 
     # Método para obtener artículos basados en el correo del usuario
+    @timed("ArticleService")
     async def get_articles_by_email(self, email: str, limit: int, sort: str):
-        async for db in get_db():
+        async with get_session(readonly=True) as db:
             try:
-                logger.debug(f"Fetching articles for email: {email} with limit={limit} sorted by {sort}.")
+                logger.debug("Fetching articles for email: %s with limit=%s sorted by %s.", email, limit, sort)
 
                 # Verificar si el usuario existe
                 user_stmt = select(UserModel).where(UserModel.email == email)
@@ -710,11 +735,11 @@ class ArticleService:
                             )
                         )
 
-                logger.info(f"Returning {len(articles)} articles for the provided email.")
+                logger.info("Returning %s articles for the provided email.", len(articles))
                 return articles
 
             except Exception as e:
                 import traceback
                 error_details = traceback.format_exc()
-                logger.error(f"Error while fetching articles by email: {e}\n{error_details}")
+                logger.error("Error while fetching articles by email: %s\n%s", e, error_details)
                 raise
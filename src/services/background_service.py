@@ -1,9 +1,12 @@
 import logging
-import threading
+import asyncio
+from src.config.config import get_settings
 from src.utils.logger import setup_logger
 from src.services.pubsub_service import PubSubService
+from src.services.subscription_service import SubscriptionService
 
 logger = setup_logger(__name__, level=logging.INFO)
+_SETTINGS = get_settings()
 
 class BackgroundService:
     """Service to manage background tasks"""
@@ -19,26 +22,33 @@ class BackgroundService:
     def __init__(self):
         if not BackgroundService._initialized:
             self.pubsub_service = PubSubService()
-            self.pubsub_thread = None
+            self.subscription_service = SubscriptionService()
+            self._expiry_sweeper = None
             BackgroundService._initialized = True
     
-    def start_pubsub_listener(self):
-        """Start the Pub/Sub listener in a background thread"""
-        if self.pubsub_thread is None or not self.pubsub_thread.is_alive():
-            logger.info("Starting Pub/Sub listener in background thread")
-            self.pubsub_thread = threading.Thread(
-                target=self.pubsub_service.start_subscription_listener,
-                daemon=True  # This ensures the thread will exit when the main program exits
-            )
-            self.pubsub_thread.start()
-        else:
-            logger.info("Pub/Sub listener already running")
+    async def start_pubsub_listener(self):
+        """Start the Pub/Sub consumer on the running event loop"""
+        logger.info("Starting Pub/Sub listener")
+        await self.pubsub_service.start()
     
-    def stop_pubsub_listener(self):
-        """Stop the Pub/Sub listener thread"""
-        if self.pubsub_thread and self.pubsub_thread.is_alive():
-            logger.info("Stopping Pub/Sub listener")
-            self.pubsub_service.shutdown()  # Signal the service to shut down
-            self.pubsub_thread.join(timeout=5)  # Wait up to 5 seconds for the thread to exit
-            if self.pubsub_thread.is_alive():
-                logger.warning("Pub/Sub listener thread did not exit cleanly") 
\ No newline at end of file
+    async def stop_pubsub_listener(self):
+        """Stop the Pub/Sub consumer, draining queued messages"""
+        logger.info("Stopping Pub/Sub listener")
+        await self.pubsub_service.stop()
+    
+    async def start_expiry_sweeper(self):
+        """Periodically mark subscriptions past end_date as EXPIRED"""
+        if _SETTINGS.subscription_expiry_sweep_interval <= 0 or self._expiry_sweeper is not None:
+            return
+        logger.info("Starting subscription expiry sweeper (every %ss)", _SETTINGS.subscription_expiry_sweep_interval)
+        self._expiry_sweeper = asyncio.create_task(
+            self.subscription_service.run_expiry_sweeper(), name="subscription-expiry-sweeper"
+        )
+    
+    async def stop_expiry_sweeper(self):
+        if self._expiry_sweeper is None:
+            return
+        logger.info("Stopping subscription expiry sweeper")
+        self._expiry_sweeper.cancel()
+        await asyncio.gather(self._expiry_sweeper, return_exceptions=True)
+        self._expiry_sweeper = None
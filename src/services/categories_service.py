@@ -1,6 +1,6 @@
 import logging
 from sqlalchemy import select, delete
-from src.config.db_config import get_db
+from src.config.db_config import get_session
 from src.models.categories_model import InterestsModel
 from src.schema.responses.response_categories_models import CategoriesResponseModel
 from src.utils.auth_utils import decode_and_sync_user
@@ -10,10 +10,10 @@ logger = setup_logger(__name__, level=logging.INFO)
 
 class CategoriesService:
     async def process_categories(self, token: str, keywords: list):
-        async for db in get_db():
+        async with get_session() as db:
             try:
                 # Validar y sincronizar usuario
-                user = decode_and_sync_user(token, db)
+                user = await decode_and_sync_user(token, db)
 
                 # Eliminar intereses existentes
                 delete_stmt = delete(InterestsModel).where(InterestsModel.user_id == user.id)
@@ -42,7 +42,7 @@ class CategoriesService:
 
                 added_categories = [{"id": interest.id, "keyword": interest.keyword} for interest in interests]
 
-                logger.info(f"Processed interests for user: {user.email}")
+                logger.info("Processed interests for user: %s", user.email)
                 return {
                     "message": "Categories added successfully",
                     "categories": added_categories,
@@ -51,13 +51,13 @@ class CategoriesService:
 
             except Exception as e:
                 await db.rollback()
-                logger.error(f"Error processing categories: {e}")
+                logger.error("Error processing categories: %s", e)
                 raise
 
     async def get_user_interests(self, token: str) -> CategoriesResponseModel:
-        async for db in get_db():
+        async with get_session() as db:
             try:
-                user = decode_and_sync_user(token, db)
+                user = await decode_and_sync_user(token, db)
 
                 stmt = select(InterestsModel).where(InterestsModel.user_id == user.id)
                 result = await db.execute(stmt)
@@ -72,13 +72,13 @@ class CategoriesService:
                 )
 
             except Exception as e:
-                logger.error(f"Error al obtener intereses: {e}")
+                logger.error("Error al obtener intereses: %s", e)
                 raise
 
     async def delete_categories(self, token: str, category_ids: list):
-        async for db in get_db():
+        async with get_session() as db:
             try:
-                user = decode_and_sync_user(token, db)
+                user = await decode_and_sync_user(token, db)
                 deleted_categories = []
 
                 for category_id in category_ids:
@@ -93,7 +93,7 @@ class CategoriesService:
                         deleted_categories.append({"id": category.id, "keyword": category.keyword})
                         await db.delete(category)
                     else:
-                        logger.warning(f"Categoría con ID {category_id} no encontrada para {user.email}")
+                        logger.warning("Categoría con ID %s no encontrada para %s", category_id, user.email)
 
                 await db.commit()
 
@@ -101,5 +101,5 @@ class CategoriesService:
 
             except Exception as e:
                 await db.rollback()
-                logger.error(f"Error al eliminar categorías: {e}")
+                logger.error("Error al eliminar categorías: %s", e)
                 raise
\ No newline at end of file
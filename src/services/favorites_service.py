@@ -1,8 +1,8 @@
-from http.client import HTTPException
+from fastapi import HTTPException
 import logging
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import select, delete
-from src.config.db_config import get_db
+from src.config.db_config import get_session
 from src.models.news_tag_model import NewsCharactersModel, NewsModel
 from src.models.favorites_model import FavoritesModel
 from src.utils.auth_utils import decode_and_sync_user
@@ -14,9 +14,9 @@ logger = setup_logger(__name__, level=logging.INFO)
 
 class FavoritesService:
     async def add_favorite(self, token: str, news_id: int):
-        async for db in get_db():
+        async with get_session() as db:
             try:
-                user = decode_and_sync_user(token, db)
+                user = await decode_and_sync_user(token, db)
 
                 # Verificar si la noticia existe
                 stmt_news = select(NewsModel).where(NewsModel.id == news_id)
@@ -39,19 +39,19 @@ class FavoritesService:
                 db.add(favorite)
                 await db.commit()
 
-                logger.info(f"Favorite added successfully for user: {user.email}, news_id: {news_id}")
+                logger.info("Favorite added successfully for user: %s, news_id: %s", user.email, news_id)
                 return {"message": "Favorite added successfully"}
 
             except Exception as e:
                 await db.rollback()
-                logger.error(f"Error while adding favorite: {e}")
+                logger.error("Error while adding favorite: %s", e)
                 raise
 
     async def get_favorites(self, token: str):
-        async for db in get_db():
+        async with get_session() as db:
             try:
                 logger.debug("Decoding user token and fetching user info.")
-                user = decode_and_sync_user(token, db)
+                user = await decode_and_sync_user(token, db)
 
                 logger.debug("Querying favorite articles for user.")
                 stmt_favs = select(FavoritesModel.news_id).where(FavoritesModel.user_id == user.id)
@@ -147,17 +147,17 @@ class FavoritesService:
                     for article in articles
                 ]
 
-                logger.info(f"Favorites retrieved successfully for user: {user.email}")
+                logger.info("Favorites retrieved successfully for user: %s", user.email)
                 return FavoritesResponseModel(user_id=user.id, articles=formatted_articles)
 
             except Exception as e:
-                logger.error(f"Error while retrieving favorites: {e}")
+                logger.error("Error while retrieving favorites: %s", e)
                 raise
     
     async def delete_favorite(self, token: str, news_id: int):
-        async for db in get_db():
+        async with get_session() as db:
             try:
-                user = decode_and_sync_user(token, db)
+                user = await decode_and_sync_user(token, db)
 
                 # Verifica si el favorito existe
                 stmt = select(FavoritesModel).where(
@@ -173,10 +173,10 @@ class FavoritesService:
                 await db.delete(favorite)
                 await db.commit()
 
-                logger.info(f"Favorite deleted successfully for user: {user.email}, news_id: {news_id}")
+                logger.info("Favorite deleted successfully for user: %s, news_id: %s", user.email, news_id)
                 return {"message": "Favorite deleted successfully"}
 
             except Exception as e:
                 await db.rollback()
-                logger.error(f"Error while deleting favorite: {e}")
+                logger.error("Error while deleting favorite: %s", e)
                 raise
\ No newline at end of file
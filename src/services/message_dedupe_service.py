@@ -0,0 +1,89 @@
+import logging
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config.config import get_settings
+from src.config.db_config import get_session
+from src.models.subscription_model import ProcessedMessageModel
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, level=logging.INFO)
+_SETTINGS = get_settings()
+
+class MessageDedupeService:
+    """
+    Registro de los message_id de Pub/Sub ya procesados. Pub/Sub entrega al
+    menos una vez: una reentrega de un mensaje ya aplicado se detecta aquí y
+    se confirma sin tocar la suscripción ni escribir otra fila de historial.
+
+    Los ids recientes se guardan en memoria (LRU acotado) y todos en la tabla
+    pubsub_processed_message, que se escribe en la misma transacción que los
+    cambios de la notificación y se purga pasado `pubsub_dedupe_ttl`.
+    """
+
+    def __init__(self, cache_size: int = None, ttl_seconds: int = None):
+        self.cache_size = cache_size if cache_size is not None else _SETTINGS.pubsub_dedupe_cache_size
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else _SETTINGS.pubsub_dedupe_ttl
+        self._recent = OrderedDict()
+
+    def __contains__(self, message_id):
+        return message_id in self._recent
+
+    def remember(self, message_ids):
+        """Add ids to the in-memory cache, evicting the least recently seen ones"""
+        for message_id in message_ids:
+            self._recent[message_id] = None
+            self._recent.move_to_end(message_id)
+        while len(self._recent) > self.cache_size:
+            self._recent.popitem(last=False)
+
+    async def processed_ids(self, message_ids) -> set:
+        """Return the ids that were already processed: memory first, one query for the rest"""
+        processed = {message_id for message_id in message_ids if message_id in self._recent}
+        unknown = set(message_ids) - processed
+        if unknown:
+            async with get_session() as db:
+                stmt = select(ProcessedMessageModel.message_id).where(ProcessedMessageModel.message_id.in_(unknown))
+                found = set((await db.execute(stmt)).scalars())
+            self.remember(found)
+            processed |= found
+        return processed
+
+    def mark_processed(self, db: AsyncSession, message_ids, now=None):
+        """Add the ids to the session; they are committed with the notification changes"""
+        now = now or datetime.utcnow()
+        db.add_all(ProcessedMessageModel(message_id=message_id, processed_at=now) for message_id in message_ids)
+
+    async def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete ids older than the TTL, in batches to keep each transaction short"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        deleted = 0
+        while True:
+            async with get_session() as db:
+                stmt = (
+                    select(ProcessedMessageModel.message_id)
+                    .where(ProcessedMessageModel.processed_at < cutoff)
+                    .limit(batch_size)
+                )
+                expired = list((await db.execute(stmt)).scalars())
+                if not expired:
+                    return deleted
+                await db.execute(delete(ProcessedMessageModel).where(ProcessedMessageModel.message_id.in_(expired)))
+                await db.commit()
+            deleted += len(expired)
+            if len(expired) < batch_size:
+                return deleted
+
+    async def run_cleanup(self, interval: float = None):
+        """Periodic purge; runs until cancelled"""
+        interval = interval if interval is not None else _SETTINGS.pubsub_dedupe_cleanup_interval
+        while True:
+            try:
+                deleted = await self.purge_expired()
+                if deleted:
+                    logger.info("Pub/Sub: Purged %s processed message ids older than %ss", deleted, self.ttl_seconds)
+            except Exception as e:
+                logger.error("Pub/Sub: Error purging processed message ids: %s", e)
+            await asyncio.sleep(interval)
@@ -0,0 +1,223 @@
+import logging
+import json
+import queue
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from src.config.config import get_settings
+from src.utils.google_clients import PUBSUB_SCOPE, get_credentials
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, level=logging.INFO)
+_SETTINGS = get_settings()
+
+
+class MessageSource(ABC):
+    """
+    Origen de los mensajes que consume PubSubService. `start(callback)` empieza
+    a entregar mensajes llamando a `callback(message)` desde hilos propios del
+    origen (nunca desde el event loop); `stop()` deja de entregar y espera a
+    que terminen las llamadas en curso. Ambos son bloqueantes.
+
+    Los mensajes tienen la interfaz de los de google-cloud-pubsub:
+    `message_id`, `data` (bytes), `publish_time`, `ack()` y `nack()`.
+    """
+
+    @abstractmethod
+    def start(self, callback):
+        ...
+
+    @abstractmethod
+    def stop(self):
+        ...
+
+
+class GooglePubSubSource(MessageSource):
+    """Streaming pull from the configured Google Cloud Pub/Sub subscription"""
+
+    def __init__(self, project_id: str = None, subscription_id: str = None):
+        self.project_id = project_id or _SETTINGS.firebase_project_id
+        self.subscription_id = subscription_id or _SETTINGS.pubsub_subscription_name
+        self._subscriber = None
+        self._streaming_pull_future = None
+
+    def start(self, callback):
+        # El cliente de Pub/Sub es pesado de importar: se carga al arrancar el listener
+        from google.cloud import pubsub_v1
+
+        credentials = get_credentials(PUBSUB_SCOPE)
+
+        self._subscriber = pubsub_v1.SubscriberClient(credentials=credentials)
+        subscription_path = self._subscriber.subscription_path(
+            self.project_id, self.subscription_id
+        )
+        # Pub/Sub deja de entregar cuando hay tantos mensajes sin ack: así la cola nunca se desborda
+        flow_control = pubsub_v1.types.FlowControl(
+            max_messages=_SETTINGS.pubsub_max_messages,
+            max_bytes=_SETTINGS.pubsub_max_bytes,
+        )
+
+        logger.info("Pub/Sub: Listening for messages on %s", subscription_path)
+        self._streaming_pull_future = self._subscriber.subscribe(
+            subscription_path, callback=callback, flow_control=flow_control
+        )
+        self._streaming_pull_future.add_done_callback(self._on_streaming_pull_done)
+
+    def _on_streaming_pull_done(self, future):
+        try:
+            error = future.exception()
+        except Exception:
+            return  # Cancelado en stop()
+        if error is not None:
+            logger.error("Pub/Sub: Streaming pull stopped: %s", error)
+
+    def stop(self):
+        if self._streaming_pull_future is not None:
+            # cancel() deja de recibir; result() espera a que el cliente termine sus hilos
+            self._streaming_pull_future.cancel()
+            try:
+                self._streaming_pull_future.result(timeout=_SETTINGS.pubsub_shutdown_timeout)
+            except Exception:
+                pass  # CancelledError al cancelar: es lo esperado
+            self._streaming_pull_future = None
+        if self._subscriber is not None:
+            self._subscriber.close()
+            self._subscriber = None
+
+
+class InMemoryMessage:
+    """Message with the google-cloud-pubsub interface; ack/nack are reported to its source"""
+
+    def __init__(self, source, message_id: str, data: bytes, delivery_attempt: int = 1, published_at: float = None):
+        self._source = source
+        self.message_id = message_id
+        self.data = data
+        self.delivery_attempt = delivery_attempt
+        self.publish_time = datetime.now(timezone.utc)
+        self.published_at = published_at or time.perf_counter()
+        self.acked_at = None
+        self.settled = False
+
+    def ack(self):
+        self._source._settle(self, acked=True)
+
+    def nack(self):
+        self._source._settle(self, acked=False)
+
+
+class InMemorySource(MessageSource):
+    """
+    Sustituto local de Pub/Sub para tests y desarrollo. Los mensajes publicados
+    se entregan desde `delivery_threads` hilos, con un máximo de
+    `max_outstanding` sin confirmar (como el flow control). Un nack vuelve a
+    encolar el mensaje con el mismo message_id, como haría Pub/Sub; los que no
+    reciben ni ack ni nack quedan pendientes (no hay plazo de ack).
+    """
+
+    def __init__(self, delivery_threads: int = 4, max_outstanding: int = None, redeliver_nacked: bool = True):
+        self.delivery_threads = delivery_threads
+        self.max_outstanding = max_outstanding or _SETTINGS.pubsub_max_messages
+        self.redeliver_nacked = redeliver_nacked
+        self.acked = []
+        self.nacked = 0
+        self._pending = queue.Queue()
+        self._outstanding = threading.BoundedSemaphore(self.max_outstanding)
+        self._unsettled = 0
+        self._idle = threading.Condition()
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def publish(self, payload, message_id: str = None) -> InMemoryMessage:
+        """Queue a payload (dict, str or bytes) for delivery"""
+        if isinstance(payload, dict):
+            payload = json.dumps(payload)
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        message = InMemoryMessage(self, message_id or uuid.uuid4().hex, payload)
+        with self._idle:
+            self._unsettled += 1
+        self._pending.put(message)
+        return message
+
+    def start(self, callback):
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._deliver, args=(callback,), name=f"in-memory-source-{i}", daemon=True)
+            for i in range(self.delivery_threads)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _deliver(self, callback):
+        while not self._stopping.is_set():
+            # Con timeouts para que stop() no se quede esperando a un hilo bloqueado
+            if not self._outstanding.acquire(timeout=0.1):
+                continue
+            try:
+                message = self._pending.get(timeout=0.1)
+            except queue.Empty:
+                self._outstanding.release()
+                continue
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error("In-memory source: callback failed for %s: %s", message.message_id, e)
+
+    def _settle(self, message, acked: bool):
+        if message.settled:
+            return
+        message.settled = True
+        self._outstanding.release()
+        if acked:
+            message.acked_at = time.perf_counter()
+            self.acked.append(message)
+        else:
+            self.nacked += 1
+            if self.redeliver_nacked and not self._stopping.is_set():
+                self._pending.put(InMemoryMessage(
+                    self, message.message_id, message.data, message.delivery_attempt + 1, message.published_at
+                ))
+                return
+        with self._idle:
+            self._unsettled -= 1
+            self._idle.notify_all()
+
+    def wait_until_idle(self, timeout: float = None) -> bool:
+        """Block until every published message has been acked (or dropped); False on timeout"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._unsettled == 0, timeout=timeout)
+
+    def stop(self):
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+class FileSource(InMemorySource):
+    """Delivers the payloads of a JSON Lines file (one notification or push envelope per line)"""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+
+    def start(self, callback):
+        with self.path.open(encoding="utf-8") as lines:
+            for number, line in enumerate(lines, start=1):
+                if line.strip():
+                    self.publish(line.strip(), message_id=f"{self.path.name}:{number}")
+        logger.info("File source: %s messages queued from %s", self._pending.qsize(), self.path)
+        super().start(callback)
+
+
+def create_message_source(settings=None) -> MessageSource:
+    """Source named by PUBSUB_SOURCE: "google" (default), "memory" or "file" (PUBSUB_SOURCE_PATH)"""
+    settings = settings or _SETTINGS
+    if settings.pubsub_source == "memory":
+        return InMemorySource()
+    if settings.pubsub_source == "file":
+        return FileSource(settings.pubsub_source_path)
+    return GooglePubSubSource()
@@ -1,100 +1,238 @@
 import logging
 import json
 import base64
-import threading
 import asyncio
-from google.cloud import pubsub_v1
-from google.oauth2 import service_account
 from src.config.config import get_settings
+from src.services.message_dedupe_service import MessageDedupeService
+from src.services.message_sources import MessageSource, create_message_source
 from src.services.subscription_service import SubscriptionService
 from src.utils.logger import setup_logger
-from src.config.db_config import get_db
+from src.config.db_config import get_session, session_scope
 
 logger = setup_logger(__name__, level=logging.INFO)
 _SETTINGS = get_settings()
 
 class PubSubService:
-    def __init__(self):
-        self.project_id = _SETTINGS.firebase_project_id
-        self.subscription_id = _SETTINGS.pubsub_subscription_name
+    """
+    Consumidor de notificaciones de Google Play. El origen de mensajes (Pub/Sub,
+    o InMemorySource/FileSource en local) los entrega en sus propios hilos; el
+    callback solo los pasa a colas acotadas del event loop de la aplicación,
+    donde `pubsub_workers` tareas los procesan con el mismo engine y pool que
+    el resto de la app.
+
+    Cada worker tiene su cola y recibe siempre los mensajes del mismo purchase
+    token, así que las notificaciones de una suscripción se aplican en orden.
+    Los mensajes que llegan juntos se procesan en micro-lotes: una consulta y
+    una transacción por lote, y se confirman (ack) todos a la vez.
+
+    Las reentregas de mensajes ya aplicados se confirman sin procesarse: el
+    message_id se registra en la misma transacción que los cambios
+    (ver MessageDedupeService).
+    """
+
+    def __init__(self, source: MessageSource = None):
+        # Google Pub/Sub por defecto; InMemorySource/FileSource para tests y desarrollo local
+        self.source = source or create_message_source()
         self.subscription_service = SubscriptionService()
-        self._shutdown_event = threading.Event()
-
-    def start_subscription_listener(self):
-        """Start listening for Pub/Sub messages"""
+        self.dedupe = MessageDedupeService()
+        self._loop = None
+        self._queues = []
+        self._workers = []
+        self._cleanup_task = None
+        self._source_started = False
+
+    @property
+    def running(self):
+        return bool(self._workers)
+
+    async def start(self):
+        """Start the worker tasks and the streaming pull. Must run on the application loop."""
+        if self.running:
+            logger.info("Pub/Sub: Listener already running")
+            return
+        self._loop = asyncio.get_running_loop()
+        workers = max(1, _SETTINGS.pubsub_workers)
+        self._queues = [asyncio.Queue(maxsize=max(1, _SETTINGS.pubsub_queue_size // workers)) for _ in range(workers)]
+        self._workers = [
+            asyncio.create_task(self._worker(queue), name=f"pubsub-worker-{i}")
+            for i, queue in enumerate(self._queues)
+        ]
+        self._cleanup_task = asyncio.create_task(self.dedupe.run_cleanup(), name="pubsub-dedupe-cleanup")
         try:
-            firebase_credentials = {
-                "type": _SETTINGS.firebase_type,
-                "project_id": _SETTINGS.firebase_project_id,
-                "private_key_id": _SETTINGS.firebase_private_key_id,
-                "private_key": _SETTINGS.firebase_private_key.replace("||", "\n"),
-                "client_email": _SETTINGS.firebase_client_email,
-                "client_id": _SETTINGS.firebase_client_id,
-                "auth_uri": _SETTINGS.firebase_auth_uri,
-                "token_uri": _SETTINGS.firebase_token_uri,
-                "auth_provider_x509_cert_url": _SETTINGS.firebase_auth_provider_x509_cert_url,
-                "client_x509_cert_url": _SETTINGS.firebase_client_x509_cert_url,
-            }
-
-            credentials = service_account.Credentials.from_service_account_info(
-                firebase_credentials,
-                scopes=['https://www.googleapis.com/auth/pubsub']
-            )
-
-            subscriber = pubsub_v1.SubscriberClient(credentials=credentials)
-            subscription_path = subscriber.subscription_path(
-                self.project_id, self.subscription_id
-            )
-
-            logger.info(f"Pub/Sub: Listening for messages on {subscription_path}")
-
-            def callback(message):
-                logger.info(f"Pub/Sub: Received message ID: {message.message_id}")
-                asyncio.run(self._handle_message(message))
-
-            streaming_pull_future = subscriber.subscribe(subscription_path, callback=callback)
+            # Crear el cliente es bloqueante (import pesado, credenciales): fuera del loop
+            await asyncio.to_thread(self.source.start, self._enqueue)
+            self._source_started = True
             logger.info("Pub/Sub: Listener started successfully")
-
-            while not self._shutdown_event.is_set():
-                self._shutdown_event.wait(timeout=1)
-
-            logger.info("Pub/Sub: Shutting down listener...")
-            streaming_pull_future.cancel()
-            logger.info("Pub/Sub: Listener shutdown complete")
-
         except Exception as e:
-            logger.error(f"Pub/Sub: Error in listener: {e}")
+            logger.error("Pub/Sub: Error in listener: %s", e)
+            await self._stop_workers()
 
-    def shutdown(self):
-        """Signal the listener to shut down"""
-        logger.info("Pub/Sub: Signaling listener to shut down")
-        self._shutdown_event.set()
-
-    async def _handle_message(self, message):
+    def _enqueue(self, message):
+        """Pub/Sub callback (runs in the client's threads): hand the message to the application loop"""
+        logger.debug("Pub/Sub: Received message ID: %s", message.message_id)
         try:
-            data = json.loads(message.data.decode("utf-8"))
-            logger.info(f"Pub/Sub: Message data: {data}")
-            await self.process_notification(data)
-            message.ack()
-            logger.info(f"Pub/Sub: Message {message.message_id} processed successfully")
+            notification = self.decode_notification(json.loads(message.data.decode("utf-8")))
+            if not isinstance(notification, dict):
+                raise ValueError("notification is not a JSON object")
         except Exception as e:
-            logger.error(f"Pub/Sub: Error processing message: {e}")
-            # Do not ack to trigger retry
-
-    async def process_notification(self, data):
-        """Process a notification from Pub/Sub"""
+            # Reintentarlo no lo arregla: sin ack ni nack solo retendría el lease y el flow control
+            if _SETTINGS.pubsub_dead_letter:
+                logger.error("Pub/Sub: Error decoding message %s, nacked for the dead-letter topic: %s", message.message_id, e)
+                message.nack()
+            else:
+                logger.error("Pub/Sub: Error decoding message %s, acked and dropped: %s (data: %.500r)",
+                             message.message_id, e, message.data)
+                message.ack()
+            return
+
+        # Mismo purchase token -> misma cola -> mismo worker: se conserva el orden por suscripción
+        key = self._partition_key(notification) or message.message_id
+        queue = self._queues[hash(key) % len(self._queues)]
         try:
-            notification_data = data
-            if "message" in data and "data" in data["message"]:
-                encoded_data = data["message"]["data"]
-                if isinstance(encoded_data, str):
-                    decoded_data = base64.b64decode(encoded_data).decode("utf-8")
-                    notification_data = json.loads(decoded_data)
-
-            # Usamos sesión async
-            async for db in get_db():
-                await self.subscription_service.process_subscription_notification(notification_data, db)
+            # Bloquea el hilo del cliente mientras la cola está llena
+            asyncio.run_coroutine_threadsafe(queue.put((message, notification)), self._loop).result()
+        except Exception as e:
+            # El loop se está cerrando: que Pub/Sub lo vuelva a entregar
+            logger.warning("Pub/Sub: Could not queue message %s: %s", message.message_id, e)
+            message.nack()
+
+    @staticmethod
+    def _partition_key(notification):
+        subscription_notification = notification.get("subscriptionNotification") or notification.get("voidedPurchaseNotification")
+        if isinstance(subscription_notification, dict):
+            return subscription_notification.get("purchaseToken")
+        return None
+
+    async def _worker(self, queue):
+        while True:
+            batch = await self._next_batch(queue)
+            try:
+                await self._handle_batch(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _next_batch(self, queue):
+        """Waits for a message, then collects more for up to `pubsub_batch_window` seconds"""
+        batch = [await queue.get()]
+        deadline = self._loop.time() + _SETTINGS.pubsub_batch_window
+        while len(batch) < _SETTINGS.pubsub_batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def stop(self):
+        """Stop pulling, let the workers finish what is queued and shut the client down"""
+        if not self.running:
+            return
+        logger.info("Pub/Sub: Shutting down listener...")
+        if self._source_started:
+            # Deja de recibir y espera a que terminen los callbacks en curso
+            await asyncio.to_thread(self.source.stop)
+            self._source_started = False
 
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)),
+                timeout=_SETTINGS.pubsub_shutdown_timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Pub/Sub: %s messages still queued after %ss, they will be redelivered",
+                           sum(queue.qsize() for queue in self._queues), _SETTINGS.pubsub_shutdown_timeout)
+        await self._stop_workers()
+
+        for queue in self._queues:
+            while not queue.empty():
+                message, _ = queue.get_nowait()
+                message.nack()
+        logger.info("Pub/Sub: Listener shutdown complete")
+
+    async def _stop_workers(self):
+        tasks = self._workers + ([self._cleanup_task] if self._cleanup_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._cleanup_task = None
+
+    async def _handle_batch(self, batch):
+        batch = await self._skip_processed(batch)
+        if not batch:
+            return
+        if await self._process(batch):
+            for message, _ in batch:
+                message.ack()
+            logger.info("Pub/Sub: %s messages processed successfully", len(batch))
+            return
+        if len(batch) == 1:
+            batch[0][0].nack()  # Pub/Sub lo reentrega
+            return
+
+        # Un mensaje problemático no debe retener al resto: se reintenta uno a uno, en orden.
+        # Tras un fallo, los siguientes de la misma suscripción tampoco se aplican (se reentregan).
+        logger.warning("Pub/Sub: Retrying batch of %s messages one by one", len(batch))
+        failed = set()
+        for message, notification in batch:
+            key = self._partition_key(notification) or message.message_id
+            if key in failed:
+                message.nack()
+                continue
+            if not await self._skip_processed([(message, notification)]):
+                continue  # Otra réplica (o un duplicado del lote) ya lo aplicó
+            if await self._process([(message, notification)]):
+                message.ack()
+            else:
+                failed.add(key)
+                message.nack()
+
+    async def _skip_processed(self, batch):
+        """Acks redeliveries of messages that were already applied and returns the rest"""
+        try:
+            processed = await self.dedupe.processed_ids({message.message_id for message, _ in batch})
+        except Exception as e:
+            # Sin BD tampoco se podrá procesar: el lote fallará y se reentregará
+            logger.error("Pub/Sub: Error checking processed message ids: %s", e)
+            return batch
+        pending = []
+        for message, notification in batch:
+            if message.message_id in processed:
+                message.ack()
+            else:
+                pending.append((message, notification))
+        if len(pending) < len(batch):
+            logger.info("Pub/Sub: %s redelivered messages acknowledged without reprocessing", len(batch) - len(pending))
+        return pending
+
+    async def _process(self, batch):
+        # Un mismo mensaje puede estar dos veces en el lote si se reentregó mientras esperaba en la cola
+        unique = {}
+        for message, notification in batch:
+            unique.setdefault(message.message_id, notification)
+        try:
+            # Una sola sesión y una transacción para todo el lote, incluido el registro de message_id
+            async with session_scope():
+                async with get_session() as db:
+                    self.dedupe.mark_processed(db, unique)
+                await self.subscription_service.process_subscription_notifications(list(unique.values()))
+            self.dedupe.remember(unique)
+            return True
         except Exception as e:
-            logger.error(f"Pub/Sub: Error processing notification: {e}")
-            raise
+            logger.error("Pub/Sub: Error processing %s message(s) (first %s): %s", len(batch), batch[0][0].message_id, e)
+            return False
+
+    @staticmethod
+    def decode_notification(data):
+        """Unwraps the push envelope ({"message": {"data": <base64>}}) if present"""
+        if "message" in data and "data" in data["message"]:
+            encoded_data = data["message"]["data"]
+            if isinstance(encoded_data, str):
+                return json.loads(base64.b64decode(encoded_data).decode("utf-8"))
+        return data
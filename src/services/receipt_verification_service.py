@@ -0,0 +1,210 @@
+import logging
+import asyncio
+import hashlib
+import random
+from src.config.config import get_settings
+from src.utils.google_clients import ANDROID_PUBLISHER_SCOPE, get_access_token, get_http_client
+from src.utils.logger import setup_logger
+from src.utils.ttl_cache import TTLCache
+
+logger = setup_logger(__name__, level=logging.INFO)
+_SETTINGS = get_settings()
+
+# Códigos de verifyReceipt de Apple
+APPLE_STATUS_OK = 0
+APPLE_STATUS_SANDBOX_RECEIPT = 21007
+APPLE_STATUS_UNAVAILABLE = 21005
+APPLE_RETRYABLE_STATUS_RANGE = range(21100, 21200)  # Errores internos de Apple
+
+RETRYABLE_HTTP_STATUS = {429, 500, 502, 503, 504}
+
+
+class ReceiptVerificationError(Exception):
+    """The store could not be reached or kept failing after every retry"""
+
+
+class _RetryableResponse(Exception):
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def receipt_cache_key(provider: str, *parts: str) -> tuple:
+    # El recibo no se guarda en claro
+    return provider, hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+
+
+class ReceiptVerificationService:
+    """
+    Verifies App Store and Google Play receipts over a shared httpx client.
+
+    - At most `concurrency` provider calls are in flight per process; the rest
+      wait for a slot instead of piling up connections to the store.
+    - Transport errors, 429/5xx and Apple's "try again" statuses are retried
+      up to `retries` times with exponential backoff (capped, with jitter,
+      honouring Retry-After).
+    - A production receipt answered with 21007 is sent to the sandbox once.
+    - Successful verifications are cached for `cache_ttl_seconds`, and
+      concurrent requests for the same receipt share one provider call.
+
+    URLs, client and token provider can be injected to run against a fake
+    provider in tests.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        token_provider=None,
+        apple_url: str = None,
+        apple_sandbox_url: str = None,
+        google_api_url: str = None,
+        concurrency: int = None,
+        retries: int = None,
+        backoff: float = None,
+        backoff_max: float = None,
+        cache_ttl_seconds: int = None,
+        cache_max_entries: int = None,
+    ):
+        self._client = client
+        self._token_provider = token_provider or (lambda: get_access_token(ANDROID_PUBLISHER_SCOPE))
+        self.apple_url = apple_url or _SETTINGS.apple_verify_receipt_url
+        self.apple_sandbox_url = apple_sandbox_url or _SETTINGS.apple_sandbox_verify_receipt_url
+        self.google_api_url = (google_api_url or _SETTINGS.google_play_api_url).rstrip("/")
+        self.concurrency = concurrency or _SETTINGS.receipt_verification_concurrency
+        self.retries = _SETTINGS.receipt_verification_retries if retries is None else retries
+        self.backoff = _SETTINGS.receipt_verification_backoff if backoff is None else backoff
+        self.backoff_max = _SETTINGS.receipt_verification_backoff_max if backoff_max is None else backoff_max
+        # Solo se guardan las verificaciones correctas; los fallos siempre vuelven a la tienda
+        self.cache = TTLCache(
+            _SETTINGS.receipt_cache_ttl_seconds if cache_ttl_seconds is None else cache_ttl_seconds,
+            cache_max_entries or _SETTINGS.receipt_cache_max_entries,
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._in_flight = {}
+
+    @property
+    def client(self):
+        # Por defecto el cliente compartido del proceso (pool de conexiones, HTTP/2 si está h2)
+        return self._client or get_http_client()
+
+    async def verify_apple_receipt(self, receipt_data: str, sandbox: bool = False) -> dict:
+        """verifyReceipt response for an App Store receipt"""
+        key = receipt_cache_key("apple", receipt_data, str(sandbox))
+        return await self._cached(key, lambda: self._verify_apple(receipt_data, sandbox), self._apple_verified)
+
+    async def verify_google_receipt(self, purchase_token: str, product_id: str, package_name: str) -> dict:
+        """purchases.subscriptions.get response for a Google Play purchase"""
+        key = receipt_cache_key("google", package_name, product_id, purchase_token)
+        return await self._cached(
+            key, lambda: self._verify_google(purchase_token, product_id, package_name), self._google_verified
+        )
+
+    @staticmethod
+    def _apple_verified(data: dict) -> bool:
+        return data.get("status") == APPLE_STATUS_OK
+
+    @staticmethod
+    def _google_verified(data: dict) -> bool:
+        return "error" not in data
+
+    async def _cached(self, key, verify, verified) -> dict:
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        # Peticiones simultáneas del mismo recibo esperan a una sola llamada a la tienda
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(verify())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        data = await asyncio.shield(task)
+        if verified(data):
+            self.cache.set(key, data)
+        return data
+
+    async def _verify_apple(self, receipt_data: str, sandbox: bool) -> dict:
+        payload = {
+            "receipt-data": receipt_data,
+            "password": _SETTINGS.app_store_shared_secret,
+        }
+        url = self.apple_sandbox_url if sandbox else self.apple_url
+        while True:
+            data = await self._with_retries("apple", lambda: self._post_apple(url, payload))
+            if url != self.apple_sandbox_url and data.get("status") == APPLE_STATUS_SANDBOX_RECEIPT:
+                # Recibo de sandbox enviado a producción: se repite una vez contra sandbox
+                logger.info("Receipt is from sandbox, retrying with sandbox environment")
+                url = self.apple_sandbox_url
+                continue
+            return data
+
+    async def _post_apple(self, url: str, payload: dict) -> dict:
+        response = await self.client.post(url, json=payload)
+        self._raise_for_retryable(response)
+        data = response.json()
+        status = data.get("status")
+        if status == APPLE_STATUS_UNAVAILABLE or status in APPLE_RETRYABLE_STATUS_RANGE:
+            raise _RetryableResponse(f"Apple status {status}")
+        return data
+
+    async def _verify_google(self, purchase_token: str, product_id: str, package_name: str) -> dict:
+        url = (
+            f"{self.google_api_url}/applications/{package_name}"
+            f"/purchases/subscriptions/{product_id}/tokens/{purchase_token}"
+        )
+
+        async def get():
+            # El token se pide en cada intento: puede haberse renovado entre reintentos
+            token = await self._token_provider()
+            response = await self.client.get(url, headers={"Authorization": f"Bearer {token}"})
+            self._raise_for_retryable(response)
+            return response.json()
+
+        return await self._with_retries("google", get)
+
+    @staticmethod
+    def _raise_for_retryable(response):
+        if response.status_code in RETRYABLE_HTTP_STATUS:
+            retry_after = response.headers.get("Retry-After")
+            raise _RetryableResponse(
+                f"HTTP {response.status_code}",
+                float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+
+    def _delay(self, attempt: int, retry_after: float = None) -> float:
+        delay = min(self.backoff_max, self.backoff * 2 ** attempt)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        # Jitter para que los reintentos de muchas peticiones no lleguen a la vez
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _with_retries(self, provider: str, call) -> dict:
+        import httpx
+
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    return await call()
+            except httpx.TransportError as e:
+                error = e
+            except _RetryableResponse as e:
+                error, retry_after = e, e.retry_after
+            if attempt == self.retries:
+                break
+            delay = self._delay(attempt, retry_after)
+            logger.warning("%s receipt verification failed (%s), retrying in %.2fs", provider, error, delay)
+            # La espera se hace fuera del semáforo: no ocupa un hueco de llamada
+            await asyncio.sleep(delay)
+        logger.error("%s receipt verification failed after %s attempts: %s", provider, self.retries + 1, error)
+        raise ReceiptVerificationError(f"{provider} receipt verification failed: {error}") from error
+
+
+_service = None
+
+
+def get_receipt_verification_service() -> ReceiptVerificationService:
+    """Process-wide service, so the semaphore and the cache are shared by every request"""
+    global _service
+    if _service is None:
+        _service = ReceiptVerificationService()
+    return _service
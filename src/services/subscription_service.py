@@ -1,3 +1,4 @@
+import importlib.util
 import logging
 import json
 import traceback
@@ -5,11 +6,10 @@ from datetime import datetime, timedelta, timezone
 import uuid
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
-from src.config.db_config import get_db
+from src.config.db_config import get_session
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import and_
-from firebase_admin import auth
+from sqlalchemy import and_, insert, update
 import asyncio
 
 from src.models.user_model import UserModel
@@ -21,30 +21,75 @@ from src.models.subscription_model import (
     SubscriptionAction
 )
 from src.config.config import get_settings
+from src.config.firebase_config import get_firebase_auth
+from src.utils.entitlement_cache import EntitlementCache
+from src.utils.google_clients import execute, get_android_publisher
 from src.utils.logger import setup_logger
+from src.utils.metrics import FIREBASE_CALL_SECONDS
 
-# Optional: For Google Play verification
-try:
-    from google.oauth2 import service_account
-    from googleapiclient.discovery import build
-    GOOGLE_API_AVAILABLE = True
-except ImportError:
-    GOOGLE_API_AVAILABLE = False
+# Optional: For Google Play verification (se importa al usarse, es pesado)
+GOOGLE_API_AVAILABLE = importlib.util.find_spec("googleapiclient") is not None
 
 logger = setup_logger(__name__, level=logging.INFO)
 _SETTINGS = get_settings()
 
+# Compartida por todas las instancias del servicio en el proceso
+entitlement_cache = EntitlementCache(
+    ttl_seconds=_SETTINGS.entitlement_cache_ttl_seconds,
+    max_entries=_SETTINGS.entitlement_cache_max_entries,
+)
+
+
+# Consultas de suscripciones en el camino caliente. Se construyen aquí para que
+# tests/test_subscription_query_plans.py compruebe con EXPLAIN las mismas que se ejecutan.
+def user_subscription_query(user_id: int, subscription_status=SubscriptionStatus.ACTIVE):
+    """A user's subscriptions in `subscription_status` (create and cancel)"""
+    return select(SubscriptionModel).where(
+        SubscriptionModel.user_id == user_id,
+        SubscriptionModel.status == subscription_status
+    )
+
+def current_subscription_query(user_id: int, now):
+    """ACTIVE subscriptions of a user that have not reached end_date, newest first"""
+    return (
+        user_subscription_query(user_id)
+        .where(SubscriptionModel.end_date > now)
+        .order_by(SubscriptionModel.created_at.desc())
+    )
+
+def lapsed_subscriptions_query(now, limit: int):
+    """ACTIVE subscriptions past end_date, oldest first (expiry sweep)"""
+    return (
+        select(SubscriptionModel.id, SubscriptionModel.user_id)
+        .where(
+            SubscriptionModel.status == SubscriptionStatus.ACTIVE,
+            SubscriptionModel.end_date <= now
+        )
+        .order_by(SubscriptionModel.end_date)
+        .limit(limit)
+    )
+
+def subscriptions_by_token_query(purchase_tokens):
+    """Subscriptions for a batch of Google Play purchase tokens (notifications)"""
+    return (
+        select(SubscriptionModel)
+        .where(SubscriptionModel.purchase_token.in_(purchase_tokens))
+        .order_by(SubscriptionModel.id)
+    )
+
 class SubscriptionService:
     async def get_user_from_token(self, token: str):
         """
         Valida el token de Firebase y obtiene al usuario desde la base de datos usando SQLAlchemy async.
         """
+        auth = get_firebase_auth()
         try:
-            logger.info(f"Verifying Firebase token: {token[:10]}...")
+            logger.info("Verifying Firebase token: %s...", token[:10])
 
             # Verificar token con Firebase
-            decoded_token = auth.verify_id_token(token)
-            logger.info(f"Token verified successfully. Decoded token contains: {list(decoded_token.keys())}")
+            with FIREBASE_CALL_SECONDS.labels(operation="verify_id_token").time():
+                decoded_token = auth.verify_id_token(token)
+            logger.info("Token verified successfully. Decoded token contains: %s", list(decoded_token.keys()))
 
             email = decoded_token.get('email')
             if not email:
@@ -54,30 +99,31 @@ class SubscriptionService:
                     detail="Invalid token: email not found"
                 )
 
-            async for db in get_db():
+            async with get_session() as db:
                 stmt = select(UserModel).where(UserModel.email == email)
                 result = await db.execute(stmt)
                 user = result.scalars().first()
 
                 if not user:
-                    logger.error(f"User not found for email: {email}")
+                    logger.error("User not found for email: %s", email)
                     raise HTTPException(
                         status_code=status.HTTP_404_NOT_FOUND,
                         detail="User not found"
                     )
 
-                logger.info(f"User found: id={user.id}, email={user.email}")
+                logger.info("User found: id=%s, email=%s", user.id, user.email)
+                entitlement_cache.remember_token(token, user.id, decoded_token.get('exp'))
                 return user
 
         except auth.InvalidIdTokenError as e:
-            logger.error(f"Invalid Firebase token: {str(e)}")
+            logger.error("Invalid Firebase token: %s", str(e))
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Invalid or expired token: {str(e)}"
             )
         except Exception as e:
             error_traceback = traceback.format_exc()
-            logger.error(f"Error getting user from token: {e}\nTraceback: {error_traceback}")
+            logger.error("Error getting user from token: %s\nTraceback: %s", e, error_traceback)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error processing authentication: {str(e)}"
@@ -85,11 +131,11 @@ class SubscriptionService:
     
     async def create_subscription(self, user_id: int, product_id: str, provider: str, receipt_data: dict = None):
         """Create a new subscription for a user or update an existing one"""
-        async for db in get_db():
+        async with get_session() as db:
             try:
                 # Extract base plan ID
                 base_plan_id = self._extract_base_plan_id(product_id)
-                logger.info(f"Extracted base plan ID: {base_plan_id} from product ID: {product_id}")
+                logger.info("Extracted base plan ID: %s from product ID: %s", base_plan_id, product_id)
 
                 # Determine the subscription tier
                 tier_mapping = {
@@ -103,38 +149,35 @@ class SubscriptionService:
                     tier = self._verify_receipt_and_get_tier(provider, receipt_data, tier)
 
                 if isinstance(tier, str):
-                    logger.warning(f"Tier is a string: '{tier}', converting to enum")
+                    logger.warning("Tier is a string: '%s', converting to enum", tier)
                     tier = SubscriptionTier.from_string(tier)
 
-                logger.info(f"Processing subscription with tier: {tier} (value: {tier.value})")
+                logger.info("Processing subscription with tier: %s (value: %s)", tier, tier.value)
 
                 # Check for existing active subscription
-                stmt = select(SubscriptionModel).where(
-                    SubscriptionModel.user_id == user_id,
-                    SubscriptionModel.status == SubscriptionStatus.ACTIVE
-                )
-                result = await db.execute(stmt)
+                result = await db.execute(user_subscription_query(user_id))
                 existing_subscription = result.scalars().first()
 
                 current_time = datetime.now(timezone.utc)
 
                 if existing_subscription:
-                    logger.info(f"Updating existing subscription for user {user_id}")
+                    logger.info("Updating existing subscription for user %s", user_id)
                     subscription = await self._update_existing_subscription(
                         db, existing_subscription, tier, product_id, provider, receipt_data, current_time
                     )
                 else:
-                    logger.info(f"Creating new subscription for user {user_id}")
+                    logger.info("Creating new subscription for user %s", user_id)
                     subscription = await self._create_new_subscription(
                         db, user_id, tier, product_id, provider, receipt_data, current_time
                     )
 
+                entitlement_cache.invalidate_user(user_id)
                 return subscription
 
             except Exception as e:
                 await db.rollback()
                 error_traceback = traceback.format_exc()
-                logger.error(f"Error creating subscription: {e}\nTraceback: {error_traceback}")
+                logger.error("Error creating subscription: %s\nTraceback: %s", e, error_traceback)
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=f"Error creating subscription: {str(e)}"
@@ -148,6 +191,13 @@ class SubscriptionService:
             base_plan_id = f"{parts[0]}_{parts[1]}"
         return base_plan_id
             
+    @staticmethod
+    def _purchase_token(receipt_data):
+        """purchaseToken of a Google Play receipt, stored in its own indexed column"""
+        if isinstance(receipt_data, dict):
+            return receipt_data.get('purchaseToken')
+        return None
+
     def _verify_receipt_and_get_tier(self, provider, receipt_data, default_tier):
         """Verify receipt data and extract tier information"""
         if provider == 'google_play':
@@ -155,7 +205,7 @@ class SubscriptionService:
             # Use the tier from receipt verification if available
             if receipt_verification and 'tier' in receipt_verification:
                 tier_value = receipt_verification['tier']
-                logger.info(f"Received tier value from verification: {tier_value}")
+                logger.info("Received tier value from verification: %s", tier_value)
                 return SubscriptionTier.from_string(tier_value)
         elif provider == 'apple':
             # TODO: Implement Apple receipt verification
@@ -167,50 +217,6 @@ class SubscriptionService:
             )
         return default_tier
         
-    async def _create_new_subscription(
-        self,
-        db: AsyncSession,
-        user_id: int,
-        tier,
-        product_id: str,
-        provider: str,
-        receipt_data: dict,
-        current_time
-    ):
-        """Create a new subscription record"""
-
-        # Preparar campos base
-        subscription = SubscriptionModel(
-            user_id=user_id,
-            tier=tier.value,
-            product_id=product_id,
-            provider=provider,
-            platform='android' if provider == 'google_play' else 'ios',
-            receipt_data=json.dumps(receipt_data) if receipt_data else None,
-            status=SubscriptionStatus.ACTIVE,
-            auto_renew=True,
-            created_at=current_time,
-            updated_at=current_time,
-            end_date=self._extract_subscription_end_date(None, receipt_data, provider)
-        )
-
-        # Agregar suscripción y commit
-        db.add(subscription)
-        await db.flush()  # Para obtener el ID sin cerrar la transacción
-
-        # Historial de creación
-        subscription_history = SubscriptionHistoryModel(
-            subscription_id=subscription.id,
-            action=SubscriptionAction.CREATED,
-            details=f"New subscription created for tier {tier.value}",
-            created_at=current_time
-        )
-        db.add(subscription_history)
-
-        await db.commit()
-        logger.info(f"Successfully created new subscription for user {user_id}, subscription ID: {subscription.id}")
-        return subscription
-        
     async def _create_new_subscription(
         self,
         db: AsyncSession,
@@ -237,6 +243,7 @@ class SubscriptionService:
             start_date=current_time,
             end_date=self._extract_subscription_end_date(None, receipt_data, provider),
             receipt_data=json.dumps(receipt_data) if receipt_data else None,
+            purchase_token=self._purchase_token(receipt_data),
             created_at=current_time,
             updated_at=current_time
         )
@@ -254,35 +261,73 @@ class SubscriptionService:
         db.add(subscription_history)
         await db.commit()
 
-        logger.info(f"Successfully created subscription {new_subscription.id} with tier {tier.value}")
+        logger.info("Successfully created subscription %s with tier %s", new_subscription.id, tier.value)
         return new_subscription
     
+    async def _update_existing_subscription(
+        self,
+        db: AsyncSession,
+        subscription: SubscriptionModel,
+        tier,
+        product_id: str,
+        provider: str,
+        receipt_data: dict,
+        current_time
+    ):
+        """Update the user's active subscription with a new purchase"""
+        subscription.tier = tier
+        subscription.product_id = product_id
+        subscription.provider = provider
+        subscription.platform = 'android' if provider == 'google_play' else 'ios'
+        subscription.status = SubscriptionStatus.ACTIVE
+        subscription.updated_at = current_time
+        if receipt_data:
+            subscription.receipt_data = json.dumps(receipt_data)
+            subscription.purchase_token = self._purchase_token(receipt_data) or subscription.purchase_token
+            subscription.end_date = self._extract_subscription_end_date(None, receipt_data, provider) or subscription.end_date
+
+        db.add(SubscriptionHistoryModel(
+            subscription_id=subscription.id,
+            action=SubscriptionAction.UPDATED,
+            details=f"Updated subscription to {tier.value}",
+            created_at=current_time
+        ))
+        await db.commit()
+
+        logger.info("Successfully updated subscription %s to tier %s", subscription.id, tier.value)
+        return subscription
+
     async def verify_subscription(self, token: str):
-        """Verify user subscription using async SQLAlchemy."""
-        async for db in get_db():
+        """
+        Verify user subscription using async SQLAlchemy. Read-only: subscriptions
+        past end_date are marked EXPIRED by the sweeper (expire_lapsed_subscriptions).
+        """
+        # Camino habitual (la app verifica en cada arranque): token y suscripción ya en cache
+        user_id = entitlement_cache.user_id_for_token(token)
+        if user_id is not None:
+            cached = entitlement_cache.get_entitlement(user_id)
+            if cached is not None:
+                return cached
+
+        # Tomada antes de leer: si otra petición invalida al usuario mientras tanto, el resultado no se cachea
+        generation = entitlement_cache.generation()
+        async with get_session() as db:
             try:
                 logger.info("Starting subscription verification process")
-                user = await self.get_user_from_token(token)
-                logger.info(f"User retrieved from token: user_id={user.id}, email={user.email}")
+                if user_id is None:
+                    user = await self.get_user_from_token(token)
+                    user_id = user.id
+                    logger.info("User retrieved from token: user_id=%s, email=%s", user.id, user.email)
 
                 current_time = datetime.now(timezone.utc)
 
                 # Buscar suscripción activa
-                stmt_active = (
-                    select(SubscriptionModel)
-                    .where(
-                        SubscriptionModel.user_id == user.id,
-                        SubscriptionModel.status == SubscriptionStatus.ACTIVE,
-                        SubscriptionModel.end_date > current_time
-                    )
-                    .order_by(SubscriptionModel.created_at.desc())
-                )
-                result_active = await db.execute(stmt_active)
+                result_active = await db.execute(current_subscription_query(user_id, current_time))
                 subscription = result_active.scalars().first()
 
                 if subscription:
-                    logger.info(f"Found active subscription: id={subscription.id}")
-                    return {
+                    logger.info("Found active subscription: id=%s", subscription.id)
+                    result = {
                         "has_subscription": True,
                         "subscription": {
                             "id": subscription.id,
@@ -294,60 +339,84 @@ class SubscriptionService:
                             "end_date": subscription.end_date.isoformat()
                         }
                     }
+                    entitlement_cache.set_entitlement(user_id, result, subscription.end_date, generation)
+                    return result
 
-                # Buscar suscripción expirada
-                logger.info("No active subscription found, checking for expired subscriptions")
-                stmt_expired = (
-                    select(SubscriptionModel)
-                    .where(
-                        SubscriptionModel.user_id == user.id,
-                        SubscriptionModel.status == SubscriptionStatus.ACTIVE,
-                        SubscriptionModel.end_date <= current_time
-                    )
-                    .order_by(SubscriptionModel.created_at.desc())
-                )
-                result_expired = await db.execute(stmt_expired)
-                expired_subscription = result_expired.scalars().first()
-
-                if expired_subscription:
-                    logger.info(f"Found expired subscription: id={expired_subscription.id}, updating to EXPIRED")
-                    expired_subscription.status = SubscriptionStatus.EXPIRED
-                    db.add(expired_subscription)
-
-                    history = SubscriptionHistoryModel(
-                        subscription_id=expired_subscription.id,
-                        action=SubscriptionAction.EXPIRED,
-                        tier=expired_subscription.tier,
-                        created_at=current_time
-                    )
-                    db.add(history)
-                    await db.commit()
-                    logger.info("Subscription status updated and history created")
-
-                return {"has_subscription": False}
+                # Una suscripción ACTIVE con end_date pasada cuenta como caducada; el barrido la marca EXPIRED
+                logger.info("No active subscription found for user %s", user_id)
+                result = {"has_subscription": False}
+                entitlement_cache.set_entitlement(user_id, result, generation=generation)
+                return result
 
             except Exception as e:
                 import traceback
-                logger.error(f"Error in verify_subscription: {e}\n{traceback.format_exc()}")
+                logger.error("Error in verify_subscription: %s\n%s", e, traceback.format_exc())
                 raise
     
+    async def expire_lapsed_subscriptions(self, batch_size: int = None) -> int:
+        """
+        Mark ACTIVE subscriptions past end_date as EXPIRED, with a history row
+        each. Works in batches of `batch_size`: one SELECT, one UPDATE and one
+        multi-row INSERT per batch, each batch in its own short transaction.
+        Rows are locked with SKIP LOCKED (MySQL), so several workers can sweep
+        at once without expiring the same subscription twice.
+        """
+        batch_size = batch_size or _SETTINGS.subscription_expiry_batch_size
+        expired = 0
+        while True:
+            now = datetime.now(timezone.utc)
+            async with get_session() as db:
+                try:
+                    stmt = lapsed_subscriptions_query(now, batch_size).with_for_update(skip_locked=True)
+                    rows = (await db.execute(stmt)).all()
+                    if not rows:
+                        return expired
+                    ids = [row.id for row in rows]
+
+                    await db.execute(
+                        update(SubscriptionModel)
+                        .where(SubscriptionModel.id.in_(ids), SubscriptionModel.status == SubscriptionStatus.ACTIVE)
+                        .values(status=SubscriptionStatus.EXPIRED, updated_at=now)
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.execute(insert(SubscriptionHistoryModel), [
+                        {
+                            "subscription_id": subscription_id,
+                            "action": SubscriptionAction.EXPIRED,
+                            "details": "Subscription expired (end date reached)",
+                            "created_at": now,
+                        }
+                        for subscription_id in ids
+                    ])
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
+                    raise
+
+            entitlement_cache.invalidate_user(*{row.user_id for row in rows})
+            expired += len(rows)
+            logger.info("Expired %s subscriptions past their end date", len(rows))
+            if len(rows) < batch_size:
+                return expired
+
+    async def run_expiry_sweeper(self, interval: float = None):
+        """Periodic expiry sweep; runs until cancelled"""
+        interval = interval if interval is not None else _SETTINGS.subscription_expiry_sweep_interval
+        while True:
+            try:
+                await self.expire_lapsed_subscriptions()
+            except Exception as e:
+                logger.error("Error expiring lapsed subscriptions: %s", e)
+            await asyncio.sleep(interval)
+
     async def cancel_subscription(self, token: str):
         """Cancel a user's active subscription"""
-        async for db in get_db():
+        async with get_session() as db:
             try:
                 user = await self.get_user_from_token(token)
 
                 # Buscar suscripción activa
-                stmt = (
-                    select(SubscriptionModel)
-                    .where(
-                        and_(
-                            SubscriptionModel.user_id == user.id,
-                            SubscriptionModel.status == SubscriptionStatus.ACTIVE
-                        )
-                    )
-                )
-                result = await db.execute(stmt)
+                result = await db.execute(user_subscription_query(user.id))
                 subscription = result.scalars().first()
 
                 if not subscription:
@@ -367,6 +436,7 @@ class SubscriptionService:
                 )
                 db.add(history)
                 await db.commit()
+                entitlement_cache.invalidate_user(user.id)
 
                 return {
                     "message": "Subscription cancelled successfully",
@@ -377,7 +447,7 @@ class SubscriptionService:
             except Exception as e:
                 await db.rollback()
                 import traceback
-                logger.error(f"Error cancelling subscription: {e}\n{traceback.format_exc()}")
+                logger.error("Error cancelling subscription: %s\n%s", e, traceback.format_exc())
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="An error occurred while cancelling the subscription"
@@ -428,7 +498,7 @@ class SubscriptionService:
             if len(product_id.split('_')) > 1 and product_id.split('_')[1] == 'plan':
                 base_plan_id = f"{product_id.split('_')[0]}_{product_id.split('_')[1]}"
             
-            logger.info(f"Extracted base plan ID: {base_plan_id} from product ID: {product_id}")
+            logger.info("Extracted base plan ID: %s from product ID: %s", base_plan_id, product_id)
             
             # Map product IDs to subscription tiers
             tier_mapping = {
@@ -441,25 +511,25 @@ class SubscriptionService:
             if base_plan_id not in tier_mapping:
                 # Try to extract the tier name from the base plan ID
                 possible_tier = base_plan_id.split('_')[0] if '_' in base_plan_id else base_plan_id
-                logger.info(f"Trying to map {possible_tier} to a subscription tier")
+                logger.info("Trying to map %s to a subscription tier", possible_tier)
                 
                 # Use the from_string method to convert to enum
                 try:
                     subscription_tier = SubscriptionTier.from_string(possible_tier)
-                    logger.info(f"Successfully mapped to tier: {subscription_tier} (value: {subscription_tier.value})")
+                    logger.info("Successfully mapped to tier: %s (value: %s)", subscription_tier, subscription_tier.value)
                 except Exception as tier_error:
                     error_traceback = traceback.format_exc()
-                    logger.error(f"Error mapping tier from string '{possible_tier}': {tier_error}\nTraceback: {error_traceback}")
+                    logger.error("Error mapping tier from string '%s': %s\nTraceback: %s", possible_tier, tier_error, error_traceback)
                     # Default to FREE tier if mapping fails
                     subscription_tier = SubscriptionTier.FREE
-                    logger.info(f"Defaulting to FREE tier after mapping failure")
+                    logger.info("Defaulting to FREE tier after mapping failure")
             else:
                 subscription_tier = tier_mapping[base_plan_id]
-                logger.info(f"Using mapped tier: {subscription_tier} (value: {subscription_tier.value})")
+                logger.info("Using mapped tier: %s (value: %s)", subscription_tier, subscription_tier.value)
             
             # For now, return a mock verification response
             # This avoids the private key issues until proper credentials are set up
-            logger.info(f"Returning mock verification for product ID: {product_id}")
+            logger.info("Returning mock verification for product ID: %s", product_id)
             
             # Set a default expiry time (30 days from now)
             expiry_time = datetime.now(timezone.utc) + timedelta(days=30)
@@ -473,166 +543,177 @@ class SubscriptionService:
             
         except Exception as e:
             error_traceback = traceback.format_exc()
-            logger.error(f"Error verifying Google Play receipt: {e}\nTraceback: {error_traceback}")
+            logger.error("Error verifying Google Play receipt: %s\nTraceback: %s", e, error_traceback)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Error verifying Google Play receipt: {str(e)}"
             )
 
     async def process_subscription_notification(self, notification_data: dict, token: str = None):
-        async for db in get_db():
-            try:
-                logger.info(f"Processing notification data: {notification_data}")
-
-                # Check if this is a Google Play subscription notification
-                subscription_notification = notification_data.get('subscriptionNotification') or notification_data.get('voidedPurchaseNotification')
-                if subscription_notification:
-                    # Extract data from notification
-                    purchase_token = subscription_notification.get('purchaseToken')
-                    subscription_id = subscription_notification.get('subscriptionId')
-                    package_name = notification_data.get('packageName')
-                    notification_type = subscription_notification.get('notificationType')
-
-                    if not all([purchase_token, subscription_id]):
-                        logger.error(f"Missing required notification data: {notification_data}")
-                        return {"success": False, "error": "Missing required notification data"}
-
-                    # Find the user with this subscription by searching the receipt_data
-                    stmt = select(SubscriptionModel).where(
-                        SubscriptionModel.receipt_data.like(f'%{purchase_token}%')
-                    )
-                    result = await db.execute(stmt)
-                    existing_sub = result.scalars().first()
-
-                    if not existing_sub:
-                        logger.warning(f"No subscription found for purchase token: {purchase_token}")
-                        return {
-                            "success": False,
-                            "error": "No subscription found for this purchase token. Unable to associate with a user."
-                        }
+        try:
+            return (await self.process_subscription_notifications([notification_data]))[0]
+        except Exception as e:
+            error_traceback = traceback.format_exc()
+            logger.error("Error processing subscription notification: %s\nTraceback: %s", e, error_traceback)
+            return {"success": False, "error": str(e)}
 
-                    # Extract base plan ID and determine subscription tier
-                    user_id = existing_sub.user_id
-                    base_plan_id = self._extract_base_plan_id(subscription_id)
-                    tier_mapping = {'pro_plan': SubscriptionTier.PRO, 'analyst_plan': SubscriptionTier.ANALYST}
-                    subscription_tier = self._determine_subscription_tier(base_plan_id, tier_mapping)
-
-                    # Prepare receipt data object
-                    receipt_data = {
-                        'purchaseToken': purchase_token,
-                        'productId': subscription_id,
-                        'packageName': package_name
-                    }
+    async def process_subscription_notifications(self, notifications: list):
+        """
+        Process a batch of Google Play notifications in a single transaction.
 
-                    now = datetime.now(timezone.utc)
-
-                    # Handle notification types
-                    if notification_type in [1, 2, 4, 7]:  # RECOVERED, RENEWED, PURCHASED, RESTARTED
-                        if isinstance(subscription_tier, str):
-                            subscription_tier = SubscriptionTier.from_string(subscription_tier)
-
-                        # Update existing subscription
-                        existing_sub.tier = subscription_tier
-                        existing_sub.product_id = subscription_id
-                        existing_sub.status = SubscriptionStatus.ACTIVE
-                        existing_sub.platform = 'android'
-                        existing_sub.receipt_data = json.dumps(receipt_data)
-                        existing_sub.updated_at = now
-                        existing_sub.end_date = self._extract_subscription_end_date(notification_data, receipt_data, 'google_play')
-
-                        # Determine action type
-                        action = SubscriptionAction.UPDATED
-                        if notification_type == 4:
-                            action = SubscriptionAction.CREATED
-                        elif notification_type == 2:
-                            action = SubscriptionAction.RENEWED
-
-                        # Add to subscription history
-                        db.add(SubscriptionHistoryModel(
-                            subscription_id=existing_sub.id,
-                            action=action,
-                            details=f"Updated subscription to {subscription_tier.value} via notification",
-                            created_at=now
-                        ))
-                        await db.commit()
-                        return {"success": True, "subscription_id": existing_sub.id}
-
-                    elif notification_type == 3:  # CANCELED
-                        existing_sub.status = SubscriptionStatus.CANCELLED
-                        existing_sub.auto_renew = False
-
-                        db.add(SubscriptionHistoryModel(
-                            subscription_id=existing_sub.id,
-                            action=SubscriptionAction.CANCELLED,
-                            details="Subscription cancelled via notification",
-                            created_at=now
-                        ))
-                        await db.commit()
-                        return {"success": True, "subscription_id": existing_sub.id}
-
-                    elif notification_type == 13:  # EXPIRED
-                        existing_sub.status = SubscriptionStatus.EXPIRED
-
-                        db.add(SubscriptionHistoryModel(
-                            subscription_id=existing_sub.id,
-                            action=SubscriptionAction.EXPIRED,
-                            details="Subscription expired via notification",
-                            created_at=now
-                        ))
-                        await db.commit()
-                        return {"success": True, "subscription_id": existing_sub.id}
-
-                    # Default handling for untracked types
-                    logger.info(f"Processed notification type {notification_type} for subscription {subscription_id}")
-                    return {"success": True, "message": f"Processed notification type {notification_type}"}
-
-                # If no known notification format found
-                logger.warning("No valid notification found in payload")
-                return {"success": False, "error": "Invalid or unsupported notification format"}
+        All purchase tokens are resolved with one query and every status change
+        and history row is committed together. Notifications are applied in the
+        given order, so several for the same subscription leave it in the state
+        of the last one. Returns one result dict per notification; raises (after
+        rolling back) if the transaction fails, so the caller can retry the batch.
+        """
+        async with get_session() as db:
+            try:
+                parsed = [self._parse_notification(data) for data in notifications]
+
+                # Find the subscriptions by purchase token (indexed column), one query for the batch
+                tokens = {item["purchase_token"] for item in parsed if "error" not in item}
+                subscriptions = {}
+                if tokens:
+                    for subscription in (await db.execute(subscriptions_by_token_query(tokens))).scalars():
+                        subscriptions.setdefault(subscription.purchase_token, subscription)
+
+                now = datetime.now(timezone.utc)
+                results = [
+                    self._apply_notification(db, item, subscriptions.get(item.get("purchase_token")), now)
+                    for item in parsed
+                ]
+                await db.commit()
+                entitlement_cache.invalidate_user(*{subscription.user_id for subscription in subscriptions.values()})
+                return results
 
-            except Exception as e:
+            except Exception:
                 await db.rollback()
-                error_traceback = traceback.format_exc()
-                logger.error(f"Error processing subscription notification: {e}\nTraceback: {error_traceback}")
-                return {"success": False, "error": str(e)}
+                raise
+
+    def _parse_notification(self, notification_data: dict):
+        """Extract the fields used from a Google Play notification, or {"error": ...}"""
+        logger.info("Processing notification with keys: %s", list(notification_data.keys()))
+
+        # Check if this is a Google Play subscription notification
+        subscription_notification = notification_data.get('subscriptionNotification') or notification_data.get('voidedPurchaseNotification')
+        if not subscription_notification:
+            logger.warning("No valid notification found in payload")
+            return {"error": "Invalid or unsupported notification format"}
+
+        parsed = {
+            "data": notification_data,
+            "purchase_token": subscription_notification.get('purchaseToken'),
+            "subscription_id": subscription_notification.get('subscriptionId'),
+            "package_name": notification_data.get('packageName'),
+            "notification_type": subscription_notification.get('notificationType'),
+        }
+        if not all([parsed["purchase_token"], parsed["subscription_id"]]):
+            logger.error("Missing required notification data: %s", list(notification_data.keys()))
+            return {"error": "Missing required notification data"}
+        return parsed
+
+    def _apply_notification(self, db: AsyncSession, parsed: dict, existing_sub, now):
+        """Apply one parsed notification to its subscription; history rows are added to the session"""
+        if "error" in parsed:
+            return {"success": False, "error": parsed["error"]}
+
+        purchase_token = parsed["purchase_token"]
+        subscription_id = parsed["subscription_id"]
+        notification_type = parsed["notification_type"]
+
+        if not existing_sub:
+            logger.warning("No subscription found for purchase token: %s", purchase_token)
+            return {
+                "success": False,
+                "error": "No subscription found for this purchase token. Unable to associate with a user."
+            }
+
+        # Extract base plan ID and determine subscription tier
+        base_plan_id = self._extract_base_plan_id(subscription_id)
+        tier_mapping = {'pro_plan': SubscriptionTier.PRO, 'analyst_plan': SubscriptionTier.ANALYST}
+        subscription_tier = self._determine_subscription_tier(base_plan_id, tier_mapping)
+
+        # Prepare receipt data object
+        receipt_data = {
+            'purchaseToken': purchase_token,
+            'productId': subscription_id,
+            'packageName': parsed["package_name"]
+        }
+
+        # Handle notification types
+        if notification_type in [1, 2, 4, 7]:  # RECOVERED, RENEWED, PURCHASED, RESTARTED
+            if isinstance(subscription_tier, str):
+                subscription_tier = SubscriptionTier.from_string(subscription_tier)
+
+            # Update existing subscription
+            existing_sub.tier = subscription_tier
+            existing_sub.product_id = subscription_id
+            existing_sub.status = SubscriptionStatus.ACTIVE
+            existing_sub.platform = 'android'
+            existing_sub.receipt_data = json.dumps(receipt_data)
+            existing_sub.purchase_token = purchase_token
+            existing_sub.updated_at = now
+            existing_sub.end_date = self._extract_subscription_end_date(parsed["data"], receipt_data, 'google_play')
+
+            # Determine action type
+            action = SubscriptionAction.UPDATED
+            if notification_type == 4:
+                action = SubscriptionAction.CREATED
+            elif notification_type == 2:
+                action = SubscriptionAction.RENEWED
+
+            # Add to subscription history
+            db.add(SubscriptionHistoryModel(
+                subscription_id=existing_sub.id,
+                action=action,
+                details=f"Updated subscription to {subscription_tier.value} via notification",
+                created_at=now
+            ))
+            return {"success": True, "subscription_id": existing_sub.id}
+
+        elif notification_type == 3:  # CANCELED
+            existing_sub.status = SubscriptionStatus.CANCELLED
+            existing_sub.auto_renew = False
+
+            db.add(SubscriptionHistoryModel(
+                subscription_id=existing_sub.id,
+                action=SubscriptionAction.CANCELLED,
+                details="Subscription cancelled via notification",
+                created_at=now
+            ))
+            return {"success": True, "subscription_id": existing_sub.id}
+
+        elif notification_type == 13:  # EXPIRED
+            existing_sub.status = SubscriptionStatus.EXPIRED
+
+            db.add(SubscriptionHistoryModel(
+                subscription_id=existing_sub.id,
+                action=SubscriptionAction.EXPIRED,
+                details="Subscription expired via notification",
+                created_at=now
+            ))
+            return {"success": True, "subscription_id": existing_sub.id}
+
+        # Default handling for untracked types
+        logger.info("Processed notification type %s for subscription %s", notification_type, subscription_id)
+        return {"success": True, "message": f"Processed notification type {notification_type}"}
 
     async def _get_subscription_info(self, package_name, subscription_id, token):
         """Get subscription details from Google Play"""
         try:
-            # Create credentials from Firebase service account
-            firebase_credentials = {
-                "type": _SETTINGS.firebase_type,
-                "project_id": _SETTINGS.firebase_project_id,
-                "private_key_id": _SETTINGS.firebase_private_key_id,
-                "private_key": _SETTINGS.firebase_private_key.replace("||", "\n"),
-                "client_email": _SETTINGS.firebase_client_email,
-                "client_id": _SETTINGS.firebase_client_id,
-                "auth_uri": _SETTINGS.firebase_auth_uri,
-                "token_uri": _SETTINGS.firebase_token_uri,
-                "auth_provider_x509_cert_url": _SETTINGS.firebase_auth_provider_x509_cert_url,
-                "client_x509_cert_url": _SETTINGS.firebase_client_x509_cert_url,
-            }
-            
-            # Create credentials object
-            creds = service_account.Credentials.from_service_account_info(
-                firebase_credentials,
-                scopes=['https://www.googleapis.com/auth/androidpublisher']
-            )
-            
-            # Build the Android Publisher API client
-            service = build('androidpublisher', 'v3', credentials=creds)
-            
+            # Cliente y credenciales compartidos; construirlo la primera vez es bloqueante
+            service = await asyncio.to_thread(get_android_publisher)
+
             # Get subscription purchase details
-            result = service.purchases().subscriptions().get(
+            return await execute(service.purchases().subscriptions().get(
                 packageName=package_name,
                 subscriptionId=subscription_id,
                 token=token
-            ).execute()
-            
-            return result
+            ))
         except Exception as e:
             error_traceback = traceback.format_exc()
-            logger.error(f"Error getting subscription info from Google Play: {e}\nTraceback: {error_traceback}")
+            logger.error("Error getting subscription info from Google Play: %s\nTraceback: %s", e, error_traceback)
             return None
 
     def process_subscription_notification_sync(self, notification_data, db):
@@ -655,7 +736,7 @@ class SubscriptionService:
             )
         except Exception as e:
             error_traceback = traceback.format_exc()
-            logger.error(f"Error in sync subscription notification processing: {e}\nTraceback: {error_traceback}")
+            logger.error("Error in sync subscription notification processing: %s\nTraceback: %s", e, error_traceback)
             raise 
 
     def _determine_subscription_tier(self, base_plan_id, tier_mapping=None):
@@ -670,21 +751,21 @@ class SubscriptionService:
         if base_plan_id not in tier_mapping:
             # Try to extract the tier name from the base plan ID
             possible_tier = base_plan_id.split('_')[0] if '_' in base_plan_id else base_plan_id
-            logger.info(f"Trying to map {possible_tier} to a subscription tier")
+            logger.info("Trying to map %s to a subscription tier", possible_tier)
             
             # Use the from_string method to convert to enum
             try:
                 subscription_tier = SubscriptionTier.from_string(possible_tier)
-                logger.info(f"Successfully mapped to tier: {subscription_tier} (value: {subscription_tier.value})")
+                logger.info("Successfully mapped to tier: %s (value: %s)", subscription_tier, subscription_tier.value)
             except Exception as tier_error:
                 error_traceback = traceback.format_exc()
-                logger.error(f"Error mapping tier from string '{possible_tier}': {tier_error}\nTraceback: {error_traceback}")
+                logger.error("Error mapping tier from string '%s': %s\nTraceback: %s", possible_tier, tier_error, error_traceback)
                 # Default to FREE tier if mapping fails
                 subscription_tier = SubscriptionTier.FREE
-                logger.info(f"Defaulting to FREE tier after mapping failure")
+                logger.info("Defaulting to FREE tier after mapping failure")
         else:
             subscription_tier = tier_mapping[base_plan_id]
-            logger.info(f"Using mapped tier: {subscription_tier} (value: {subscription_tier.value})")
+            logger.info("Using mapped tier: %s (value: %s)", subscription_tier, subscription_tier.value)
             
         return subscription_tier 
 
@@ -692,21 +773,22 @@ class SubscriptionService:
         """Extract subscription end date from notification or receipt data"""
         end_date = None
         # Try to get from notification data first
-        logger.info(f"Extracting subscription end date from notification data: {notification_data}")
-        logger.info(f"Extracting subscription end date from receipt data: {receipt_data}")
+        logger.debug("Extracting subscription end date (notification keys: %s, receipt keys: %s)",
+                     list(notification_data.keys()) if notification_data else None,
+                     list(receipt_data.keys()) if receipt_data else None)
         if notification_data:
             # For Google Play
             if 'expiryTimeMillis' in notification_data:
                 millis = int(notification_data['expiryTimeMillis'])
                 end_date = datetime.fromtimestamp(millis / 1000.0, tz=timezone.utc)
-                logger.info(f"Extracted end date from expiryTimeMillis: {end_date}")
+                logger.info("Extracted end date from expiryTimeMillis: %s", end_date)
                 return end_date
                 
             # For Google Play - alternative field
             if 'validUntilTimestampMsec' in notification_data:
                 millis = int(notification_data['validUntilTimestampMsec'])
                 end_date = datetime.fromtimestamp(millis / 1000.0, tz=timezone.utc)
-                logger.info(f"Extracted end date from validUntilTimestampMsec: {end_date}")
+                logger.info("Extracted end date from validUntilTimestampMsec: %s", end_date)
                 return end_date
                 
             # For Google Play - another alternative
@@ -714,16 +796,16 @@ class SubscriptionService:
                 # Could be in ISO format string
                 try:
                     end_date = datetime.fromisoformat(notification_data['expireTime'].replace('Z', '+00:00'))
-                    logger.info(f"Extracted end date from expireTime: {end_date}")
+                    logger.info("Extracted end date from expireTime: %s", end_date)
                     return end_date
                 except (ValueError, TypeError):
-                    logger.warning(f"Failed to parse expireTime: {notification_data['expireTime']}")
+                    logger.warning("Failed to parse expireTime: %s", notification_data['expireTime'])
             
             # For Apple App Store
             if 'expires_date_ms' in notification_data:
                 millis = int(notification_data['expires_date_ms'])
                 end_date = datetime.fromtimestamp(millis / 1000.0, tz=timezone.utc)
-                logger.info(f"Extracted end date from expires_date_ms: {end_date}")
+                logger.info("Extracted end date from expires_date_ms: %s", end_date)
                 return end_date
 
         # Try to get from receipt data if available
@@ -732,14 +814,14 @@ class SubscriptionService:
             if 'expiryTimeMillis' in receipt_data:
                 millis = int(receipt_data['expiryTimeMillis'])
                 end_date = datetime.fromtimestamp(millis / 1000.0, tz=timezone.utc)
-                logger.info(f"Extracted end date from receipt expiryTimeMillis: {end_date}")
+                logger.info("Extracted end date from receipt expiryTimeMillis: %s", end_date)
                 return end_date
                 
             # For Apple App Store
             if 'expires_date_ms' in receipt_data:
                 millis = int(receipt_data['expires_date_ms'])
                 end_date = datetime.fromtimestamp(millis / 1000.0, tz=timezone.utc)
-                logger.info(f"Extracted end date from receipt expires_date_ms: {end_date}")
+                logger.info("Extracted end date from receipt expires_date_ms: %s", end_date)
                 return end_date
         
         # If we couldn't find an end date, use default period based on provider
@@ -747,10 +829,10 @@ class SubscriptionService:
         if provider == 'google_play' or provider == 'android':
             # Default to 30 days for Google Play
             end_date = current_time + timedelta(days=30)
-            logger.warning(f"Using default end date (30 days): {end_date}")
+            logger.warning("Using default end date (30 days): %s", end_date)
         else:
             # Default to 30 days for Apple/other providers
             end_date = current_time + timedelta(days=30)
-            logger.warning(f"Using default end date (30 days): {end_date}")
+            logger.warning("Using default end date (30 days): %s", end_date)
             
         return end_date 
\ No newline at end of file
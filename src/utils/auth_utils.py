@@ -1,40 +1,48 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from firebase_admin import auth
-from src.config.firebase_config import initialize_firebase
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config.firebase_config import get_firebase_auth
 from src.models.user_model import UserModel, FirebaseTokenModel
+from src.utils.metrics import FIREBASE_CALL_SECONDS
 import logging
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
-# Inicializar Firebase una sola vez
-firebase_app = initialize_firebase()
+def _claim_to_datetime(value):
+    """Convierte un claim epoch del token a datetime UTC sin zona, como espera la columna DateTime"""
+    return datetime.fromtimestamp(value, tz=timezone.utc).replace(tzinfo=None)
 
-def decode_and_sync_user(token: str, db: Session):
+async def decode_and_sync_user(token: str, db: AsyncSession):
     """
     Decodifica el token de Firebase, sincroniza el usuario con la base de datos y registra el token.
+    Usa la sesión de la petición en curso para no abrir una conexión adicional.
     Retorna el usuario sincronizado.
     """
+    auth = get_firebase_auth()
     try:
         # Decodifica el token de Firebase
-        decoded_token = auth.verify_id_token(token)
-        logger.debug(f"Token decodificado correctamente: {decoded_token}")
+        with FIREBASE_CALL_SECONDS.labels(operation="verify_id_token").time():
+            decoded_token = auth.verify_id_token(token)
+        logger.debug("Token decodificado correctamente para uid: %s", decoded_token.get("uid"))
     except Exception as e:
-        logger.error(f"Error al decodificar el token: {e}")
+        logger.error("Error al decodificar el token: %s", e)
         raise HTTPException(status_code=401, detail="Token inválido")
 
     # Verifica si el usuario está en Firebase
     try:
-        firebase_user = auth.get_user(decoded_token["uid"])
-        logger.info(f"Usuario encontrado en Firebase: {firebase_user.email}")
+        with FIREBASE_CALL_SECONDS.labels(operation="get_user").time():
+            firebase_user = auth.get_user(decoded_token["uid"])
+        logger.info("Usuario encontrado en Firebase: %s", firebase_user.email)
     except Exception as e:
-        logger.error(f"El usuario no existe en Firebase: {e}")
+        logger.error("El usuario no existe en Firebase: %s", e)
         raise HTTPException(status_code=404, detail="Usuario no registrado en Firebase")
 
     # Verifica si el usuario ya está en la base de datos
-    user = db.query(UserModel).filter_by(email=decoded_token["email"]).first()
+    result = await db.execute(select(UserModel).where(UserModel.email == decoded_token["email"]))
+    user = result.scalars().first()
     if not user:
-        logger.info(f"Usuario no encontrado en la base de datos, registrando: {decoded_token['email']}")
+        logger.info("Usuario no encontrado en la base de datos, registrando: %s", decoded_token['email'])
         user = UserModel(
             email=decoded_token["email"],
             name=decoded_token.get("name"),
@@ -43,18 +51,18 @@ def decode_and_sync_user(token: str, db: Session):
             country_code=decoded_token.get("country"),
         )
         db.add(user)
-        db.commit()
+        await db.flush()
 
-    # Registra el token de Firebase en la base de datos
+    # Registra el token de Firebase en la base de datos (los claims vienen en segundos epoch)
     firebase_token = FirebaseTokenModel(
         user_id=user.id,
         iss=decoded_token["iss"],
         aud=decoded_token["aud"],
-        auth_time=decoded_token["auth_time"],
-        iat=decoded_token["iat"],
-        exp=decoded_token["exp"],
+        auth_time=_claim_to_datetime(decoded_token["auth_time"]),
+        iat=_claim_to_datetime(decoded_token["iat"]),
+        exp=_claim_to_datetime(decoded_token["exp"]),
     )
     db.add(firebase_token)
-    db.commit()
+    await db.commit()
 
     return user
@@ -0,0 +1,181 @@
+import gzip
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional: Brotli support
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Preferred order when the client accepts several encodings
+SUPPORTED_ENCODINGS = ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+# Content types that are already compressed (xlsx/docx are ZIP files) or that
+# must reach the client as soon as each chunk is sent (server-sent events)
+UNCOMPRESSIBLE_CONTENT_TYPES = (
+    "application/vnd.openxmlformats-officedocument.",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-7z-compressed",
+    "application/x-rar-compressed",
+    "application/pdf",
+    "image/",
+    "audio/",
+    "video/",
+    "font/woff",
+    "text/event-stream",
+)
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    if content_type == "image/svg+xml":
+        return True
+    return not content_type.startswith(UNCOMPRESSIBLE_CONTENT_TYPES)
+
+
+def select_encoding(accept_encoding: str) -> str | None:
+    """
+    Returns the best encoding supported by both the client and the server,
+    or None if the response should be sent uncompressed.
+    """
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+
+    for encoding in SUPPORTED_ENCODINGS:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress_body(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    """Compresses a full response body with the given encoding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses responses with Brotli or GZip depending on
+    the client's Accept-Encoding. Responses that already carry a
+    Content-Encoding (e.g. precompressed cache entries) or whose content type
+    is already compressed (xlsx exports, images) are passed through.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self.app, encoding, self.minimum_size, self.gzip_level, self.brotli_quality)
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int, gzip_level: int, brotli_quality: int) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.send: Send = None
+        self.initial_message: Message = {}
+        self.passthrough = False
+        self.started = False
+        self.compressor = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _start_stream(self):
+        if self.encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress, compressor.flush
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the headers until we know whether the body gets compressed
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = "content-encoding" in headers or not is_compressible(headers.get("content-type", ""))
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if len(body) < self.minimum_size and not more_body:
+                # Small responses are not worth compressing
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                message["body"] = compress_body(body, self.encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Length"] = str(len(message["body"]))
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            # Streaming response: compress chunk by chunk
+            del headers["Content-Length"]
+            self.compressor = self._start_stream()
+            await self.send(self.initial_message)
+
+        if self.compressor is None:
+            await self.send(message)
+            return
+
+        process, finish = self.compressor
+        chunk = process(body)
+        if not more_body:
+            chunk += finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
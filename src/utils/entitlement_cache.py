@@ -0,0 +1,88 @@
+import time
+import hashlib
+import itertools
+import threading
+from datetime import datetime, timezone
+from src.utils.ttl_cache import TTLCache
+
+
+class EntitlementCache:
+    """
+    In-process cache for /subscriptions/verify. Keeps two maps:
+
+    - token -> user id, until the Firebase token expires, so repeated launches
+      with the same token skip the signature check and the user lookup;
+    - user id -> verify result (tier, status, end_date), until `ttl_seconds`
+      or the subscription's end_date, whichever comes first.
+
+    Every write to a user's subscriptions must call `invalidate_user` after it
+    commits. A reader that loaded a result from the database before that
+    invalidation must not put it back: take `generation()` before querying and
+    pass it to `set_entitlement`, which ignores results older than the user's
+    last invalidation.
+
+    The cache is per process: writes made by another worker are only seen
+    once the TTL runs out, so keep it short.
+    """
+
+    def __init__(self, ttl_seconds: int = 300, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._tokens = TTLCache(ttl_seconds, max_entries)
+        self._entitlements = TTLCache(ttl_seconds, max_entries)
+        # user id -> generación de su última invalidación; basta con recordarla mientras
+        # una lectura en curso pueda escribir (como mucho el TTL)
+        self._invalidated = TTLCache(ttl_seconds, max_entries)
+        self._generations = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        # No se guarda el token en claro
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def user_id_for_token(self, token: str):
+        return self._tokens.get(self._token_key(token))
+
+    def remember_token(self, token: str, user_id: int, expires_at_epoch: float = None):
+        """Cache the token's user until the token expires (`exp` claim) or the TTL"""
+        seconds = self.ttl_seconds
+        if expires_at_epoch:
+            seconds = min(seconds, expires_at_epoch - time.time())
+        self._tokens.set(self._token_key(token), user_id, seconds)
+
+    def get_entitlement(self, user_id: int):
+        return self._entitlements.get(user_id)
+
+    def generation(self) -> int:
+        """Current generation; take it before reading the subscription from the database"""
+        with self._lock:
+            return next(self._generations)
+
+    def set_entitlement(self, user_id: int, result: dict, end_date: datetime = None, generation: int = None):
+        """
+        Cache a verify result; an active subscription is only cached until its
+        end_date. With `generation`, the result is dropped if the user was
+        invalidated after it was taken.
+        """
+        seconds = self.ttl_seconds
+        if end_date is not None:
+            if end_date.tzinfo is None:
+                end_date = end_date.replace(tzinfo=timezone.utc)
+            seconds = min(seconds, (end_date - datetime.now(timezone.utc)).total_seconds())
+        with self._lock:
+            if generation is not None and self._invalidated.get(user_id, 0) > generation:
+                return
+            self._entitlements.set(user_id, result, seconds)
+
+    def invalidate_user(self, *user_ids):
+        with self._lock:
+            generation = next(self._generations)
+            for user_id in user_ids:
+                self._entitlements.pop(user_id)
+                self._invalidated.set(user_id, generation)
+
+    def clear(self):
+        self._tokens.clear()
+        self._entitlements.clear()
+        self._invalidated.clear()
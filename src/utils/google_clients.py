@@ -0,0 +1,156 @@
+"""
+Clientes compartidos por todo el proceso para las APIs de Google y las
+llamadas HTTP salientes.
+
+Las credenciales de la cuenta de servicio se crean una vez por conjunto de
+scopes y el token se renueva antes de caducar; el cliente de androidpublisher
+se construye una sola vez (construirlo vuelve a parsear el documento de
+discovery) y sus peticiones bloqueantes se ejecutan fuera del event loop. Las
+llamadas con httpx comparten un AsyncClient con pool de conexiones, que se
+cierra al apagar la aplicación.
+"""
+import logging
+import asyncio
+import importlib.util
+import threading
+from datetime import datetime, timedelta, timezone
+from src.config.config import get_settings
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, level=logging.INFO)
+_SETTINGS = get_settings()
+
+ANDROID_PUBLISHER_SCOPE = "https://www.googleapis.com/auth/androidpublisher"
+PUBSUB_SCOPE = "https://www.googleapis.com/auth/pubsub"
+
+_lock = threading.Lock()
+_credentials = {}
+_token_locks = {}
+_android_publisher = None
+_thread_local = threading.local()
+_http_client = None
+
+# HTTP/2 en httpx necesita el paquete h2 (httpx[http2]); sin él se usa HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def service_account_info():
+    """Service account of the Firebase project, as expected by google-auth"""
+    return {
+        "type": _SETTINGS.firebase_type,
+        "project_id": _SETTINGS.firebase_project_id,
+        "private_key_id": _SETTINGS.firebase_private_key_id,
+        "private_key": _SETTINGS.firebase_private_key.replace("||", "\n"),
+        "client_email": _SETTINGS.firebase_client_email,
+        "client_id": _SETTINGS.firebase_client_id,
+        "auth_uri": _SETTINGS.firebase_auth_uri,
+        "token_uri": _SETTINGS.firebase_token_uri,
+        "auth_provider_x509_cert_url": _SETTINGS.firebase_auth_provider_x509_cert_url,
+        "client_x509_cert_url": _SETTINGS.firebase_client_x509_cert_url,
+    }
+
+
+def get_credentials(*scopes):
+    """Service-account credentials for `scopes`, created once per process"""
+    key = tuple(sorted(scopes))
+    credentials = _credentials.get(key)
+    if credentials is not None:
+        return credentials
+    with _lock:
+        if key not in _credentials:
+            from google.oauth2 import service_account
+            _credentials[key] = service_account.Credentials.from_service_account_info(
+                service_account_info(), scopes=list(key)
+            )
+        return _credentials[key]
+
+
+def _needs_refresh(credentials):
+    if not credentials.token or credentials.expiry is None:
+        return True
+    # google-auth guarda expiry como UTC sin zona horaria
+    expiry = credentials.expiry.replace(tzinfo=timezone.utc)
+    margin = timedelta(seconds=_SETTINGS.google_token_refresh_margin)
+    return expiry - datetime.now(timezone.utc) <= margin
+
+
+async def get_access_token(*scopes) -> str:
+    """
+    Bearer token for `scopes`. It is refreshed (in a thread, the refresh is a
+    blocking HTTP call) when it is missing or about to expire; concurrent
+    callers wait for a single refresh.
+    """
+    credentials = get_credentials(*scopes)
+    if not _needs_refresh(credentials):
+        return credentials.token
+    key = tuple(sorted(scopes))
+    lock = _token_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        if _needs_refresh(credentials):
+            from google.auth.transport.requests import Request
+            await asyncio.to_thread(credentials.refresh, Request())
+            logger.debug("Google token for %s refreshed, expires at %s", key, credentials.expiry)
+    return credentials.token
+
+
+def get_android_publisher():
+    """androidpublisher v3 client, built once from the bundled discovery document"""
+    global _android_publisher
+    if _android_publisher is not None:
+        return _android_publisher
+    with _lock:
+        if _android_publisher is None:
+            from googleapiclient.discovery import build
+            _android_publisher = build(
+                "androidpublisher", "v3",
+                credentials=get_credentials(ANDROID_PUBLISHER_SCOPE),
+                cache_discovery=False,
+            )
+        return _android_publisher
+
+
+def _thread_http():
+    # httplib2.Http no es thread-safe: una conexión autorizada por hilo del pool de to_thread
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        http = AuthorizedHttp(
+            get_credentials(ANDROID_PUBLISHER_SCOPE),
+            http=httplib2.Http(timeout=_SETTINGS.http_client_timeout),
+        )
+        _thread_local.http = http
+    return http
+
+
+async def execute(request):
+    """Run a googleapiclient request off the event loop"""
+    return await asyncio.to_thread(lambda: request.execute(http=_thread_http()))
+
+
+def get_http_client():
+    """Process-wide httpx.AsyncClient; reuses connections (HTTP/2 when available) across requests"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # httpx solo lo usan algunos endpoints: no se importa al arrancar
+        import httpx
+        http2 = _SETTINGS.http_client_http2 and HTTP2_AVAILABLE
+        if _SETTINGS.http_client_http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            timeout=_SETTINGS.http_client_timeout,
+            limits=httpx.Limits(
+                max_connections=_SETTINGS.http_client_max_connections,
+                max_keepalive_connections=_SETTINGS.http_client_max_keepalive,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client (application shutdown)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
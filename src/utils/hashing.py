@@ -0,0 +1,14 @@
+import hashlib
+
+# Separador que no aparece en texto de noticias: evita que ("ab", "c") y ("a", "bc") den el mismo hash
+_SEPARATOR = "\x1f"
+
+
+def news_content_hash(title, detail, content):
+    """
+    SHA-256 (hex) del texto de una noticia. Sirve para saber si un re-scrape
+    cambió el artículo; None cuenta como texto vacío, igual que en la
+    migración que rellena la columna con SHA2() en MySQL.
+    """
+    text = _SEPARATOR.join(value or "" for value in (title, detail, content))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -1,38 +1,256 @@
+import atexit
+import json
 import logging
-import coloredlogs
+import logging.handlers
 import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+import coloredlogs
+
+LOG_DIR = 'logs'
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Atributos estándar de LogRecord; el resto se considera "extra" en el formato JSON
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as a single JSON line for log aggregators"""
+
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+        }
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def _build_formatters(log_format):
+    if log_format == 'json':
+        return JsonFormatter(), JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT), coloredlogs.ColoredFormatter(TEXT_FORMAT)
+
+
+class _LogPipeline:
+    """
+    One queue shared by every logger plus one background listener that owns
+    the sinks. Request handlers only enqueue records; disk and terminal I/O
+    happen on the listener thread.
+
+    Importing a module only starts the console sink; the file sink is opened
+    by configure_logging(), so tests and scripts do not write logs/ into the
+    working tree.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue(-1)
+        self.queue_handler = logging.handlers.QueueHandler(self.queue)
+        self.handlers = {}
+        self.listener = None
+        self.log_file = None
+        self.log_format = 'text'
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def start(self, log_file=None):
+        """Start the listener; with `log_file`, also write to logs/<log_file>"""
+        with self._lock:
+            if self.listener is not None:
+                if log_file is None or 'file' in self.handlers:
+                    return
+                # Ya arrancado solo con consola: se reinicia añadiendo el fichero
+                self._stop_listener()
+            file_formatter, console_formatter = _build_formatters(self.log_format)
+
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(console_formatter)
+            self.handlers = {'console': console_handler}
+            if log_file is not None:
+                os.makedirs(LOG_DIR, exist_ok=True)
+                file_handler = logging.FileHandler(os.path.join(LOG_DIR, log_file), encoding='utf-8')
+                file_handler.setFormatter(file_formatter)
+                self.handlers['file'] = file_handler
+
+            self.listener = logging.handlers.QueueListener(
+                self.queue, *self.handlers.values(), respect_handler_level=True
+            )
+            self.listener.start()
+
+    def _stop_listener(self):
+        # stop() vacía la cola antes de cerrar el hilo
+        self.listener.stop()
+        self.listener = None
+        for handler in self.handlers.values():
+            handler.close()
+        self.handlers = {}
+
+    def stop(self):
+        with self._lock:
+            if self.listener is not None:
+                self._stop_listener()
+
+    def set_format(self, log_format):
+        self.log_format = log_format
+        file_formatter, console_formatter = _build_formatters(log_format)
+        self.handlers['console'].setFormatter(console_formatter)
+        if 'file' in self.handlers:
+            self.handlers['file'].setFormatter(file_formatter)
+
+
+_pipeline = _LogPipeline()
+
+
+def parse_logger_map(raw):
+    """
+    Parses "logger.name=VALUE,other.logger=VALUE" into a dict. Used for the
+    per-module level overrides and the debug sampling settings.
+    """
+    result = {}
+    for item in (raw or '').split(','):
+        name, sep, value = item.strip().partition('=')
+        if sep and name.strip() and value.strip():
+            result[name.strip()] = value.strip()
+    return result
+
+
+def _to_level(value):
+    level = logging.getLevelName(str(value).upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level: {value}")
+    return level
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Lets through one out of every `every` DEBUG records per message template.
+    INFO and above are never sampled.
+    """
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, int(every))
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        with self._lock:
+            count = self._counts.get(record.msg, 0)
+            self._counts[record.msg] = count + 1
+        return count % self.every == 0
+
+
+class _LoggingConfig:
+    """Levels and sampling applied to every logger created with setup_logger"""
+
+    def __init__(self):
+        self.configured = False
+        self.level = None
+        self.overrides = {}
+        self.sampling = {}
+        self.logger_names = set()
+
+    def level_for(self, name, default):
+        # La regla más específica gana: "src.services" cubre "src.services.article_service"
+        best = None
+        for prefix in self.overrides:
+            if name == prefix or name.startswith(prefix + '.'):
+                if best is None or len(prefix) > len(best):
+                    best = prefix
+        if best is not None:
+            return self.overrides[best]
+        return self.level if self.configured else default
+
+    def apply(self, logger, default_level):
+        logger.setLevel(self.level_for(logger.name, default_level))
+        for existing in [f for f in logger.filters if isinstance(f, DebugSamplingFilter)]:
+            logger.removeFilter(existing)
+        every = self.sampling.get(logger.name)
+        if every:
+            logger.addFilter(DebugSamplingFilter(every))
+
+
+_config = _LoggingConfig()
+
+
+def configure_logging(settings, force=False):
+    """
+    Applies the logging settings once at startup: global level (LOG_LEVEL),
+    per-module overrides (LOG_LEVEL_OVERRIDES), DEBUG sampling
+    (LOG_DEBUG_SAMPLING) and output format (LOG_FORMAT). Loggers created
+    before this call are updated in place; later calls are ignored unless
+    force=True.
+    """
+    if _config.configured and not force:
+        return
+
+    log_format = getattr(settings, 'log_format', 'text')
+    if log_format not in ('text', 'json'):
+        raise ValueError(f"Unsupported log format: {log_format}")
+
+    _config.level = _to_level(settings.log_level)
+    _config.overrides = {
+        name: _to_level(value)
+        for name, value in parse_logger_map(getattr(settings, 'log_level_overrides', '')).items()
+    }
+    _config.sampling = {
+        name: int(value)
+        for name, value in parse_logger_map(getattr(settings, 'log_debug_sampling', '')).items()
+    }
+    _config.configured = True
+
+    _pipeline.start(_pipeline.log_file or 'app.log')
+    _pipeline.set_format(log_format)
+
+    # Loggers de terceros sin configurar (p. ej. sqlalchemy.engine) también respetan los overrides
+    for name in set(_config.overrides) | _config.logger_names:
+        _config.apply(logging.getLogger(name), _config.level)
+
+
+def shutdown_logging():
+    """Flushes pending records and stops the background listener"""
+    _pipeline.stop()
+
 
 def setup_logger(name, level=logging.INFO, log_file='app.log'):
     """
-    Sets up a logger with the given name and level, and adds colored logs.
-    
+    Sets up a logger with the given name. Records are handed to a shared
+    queue and written to the colored console sink (and, once
+    configure_logging() runs, the log file) by a background thread, so
+    logging never blocks the event loop on I/O. Calling it again for the
+    same name does not add handlers.
+
     Args:
         name (str): The name of the logger.
-        level (int): The logging level.
-        log_file (str): The file where logs will be saved.
-        
+        level (int): The logging level used until configure_logging() runs;
+            afterwards LOG_LEVEL and LOG_LEVEL_OVERRIDES take precedence.
+        log_file (str): The file under logs/ opened by configure_logging() (the first call wins).
+
     Returns:
         logging.Logger: The configured logger.
     """
+    if _pipeline.log_file is None:
+        _pipeline.log_file = log_file
+    _pipeline.start()
+
     logger = logging.getLogger(name)
-    logger.setLevel(level)
-
-    # Create a file handler
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    file_handler = logging.FileHandler(os.path.join('logs', log_file), encoding='utf-8')
-    file_handler.setLevel(level)
-    file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(file_formatter)
-
-    # Create a console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level)
-    console_formatter = coloredlogs.ColoredFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(console_formatter)
-
-    # Add the handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    _config.logger_names.add(name)
+    _config.apply(logger, level)
+
+    # Un solo QueueHandler por logger aunque el módulo se importe varias veces
+    if _pipeline.queue_handler not in logger.handlers:
+        logger.addHandler(_pipeline.queue_handler)
 
     return logger
@@ -0,0 +1,195 @@
+import time
+import functools
+from contextvars import ContextVar
+from dataclasses import dataclass
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 10, 30)
+
+# Peticiones HTTP (etiqueta `route`: plantilla de la ruta, p. ej. /api/v1/articles/{id})
+HTTP_REQUEST_SECONDS = Histogram(
+    "axioma_http_request_seconds",
+    "HTTP request latency per route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "axioma_http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "axioma_http_request_db_seconds",
+    "Total SQL execution time per HTTP request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Consultas SQL individuales
+DB_QUERY_SECONDS = Histogram(
+    "axioma_db_query_seconds",
+    "SQL statement execution time",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# Llamadas a Firebase (verify_id_token, get_user, ...)
+FIREBASE_CALL_SECONDS = Histogram(
+    "axioma_firebase_call_seconds",
+    "Firebase Admin SDK call latency",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Construcción de los modelos de respuesta
+SERIALIZATION_SECONDS = Histogram(
+    "axioma_serialization_seconds",
+    "Time spent building response models",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+# Métodos de servicio (p. ej. ArticleService.get_articles)
+SERVICE_METHOD_SECONDS = Histogram(
+    "axioma_service_method_seconds",
+    "Service method latency",
+    ["service", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Pool de conexiones de SQLAlchemy (etiqueta `engine`: primary / replica)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "axioma_db_pool_wait_seconds",
+    "Time spent acquiring a connection from the SQLAlchemy pool",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+DB_POOL_CHECKED_OUT_ON_CHECKOUT = Histogram(
+    "axioma_db_pool_checked_out_connections",
+    "Connections checked out, sampled right after each checkout",
+    ["engine"],
+    buckets=(0, 1, 2, 5, 10, 20, 30, 40, 50, 75, 100, 150, 200),
+)
+DB_POOL_OVERFLOW_ON_CHECKOUT = Histogram(
+    "axioma_db_pool_overflow_connections",
+    "Overflow connections in use, sampled right after each checkout",
+    ["engine"],
+    buckets=(0, 1, 2, 5, 10, 20, 30, 40, 50, 75, 100),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "axioma_db_pool_timeouts_total",
+    "Checkouts that failed because the pool was exhausted for pool_timeout seconds",
+    ["engine"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "axioma_db_pool_checked_out",
+    "Connections currently checked out",
+    ["engine"],
+)
+DB_POOL_SIZE = Gauge(
+    "axioma_db_pool_size",
+    "Configured pool size (persistent connections)",
+    ["engine"],
+)
+DB_POOL_MAX_OVERFLOW = Gauge(
+    "axioma_db_pool_max_overflow",
+    "Configured maximum overflow connections",
+    ["engine"],
+)
+
+
+@dataclass
+class RequestStats:
+    """SQL statistics accumulated while a request is being served"""
+    query_count: int = 0
+    query_seconds: float = 0.0
+    # Solo se rellena cuando la petición se está perfilando
+    statements: list | None = None
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def get_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+def set_request_stats(stats: RequestStats | None):
+    return _request_stats.set(stats)
+
+
+def reset_request_stats(token):
+    _request_stats.reset(token)
+
+
+def record_query(engine_name: str, elapsed: float, statement: str | None = None):
+    """Called from the SQLAlchemy cursor events for every executed statement"""
+    DB_QUERY_SECONDS.labels(engine=engine_name).observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.query_count += 1
+        stats.query_seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append({"engine": engine_name, "statement": statement, "seconds": elapsed})
+
+
+def timed(service: str):
+    """Decorator that records the latency of an async service method"""
+    def decorator(func):
+        histogram = SERVICE_METHOD_SECONDS.labels(service=service, method=func.__name__)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that records per-route latency and the number and total
+    time of SQL statements executed while serving each request.
+    """
+
+    def __init__(self, app: ASGIApp, excluded_paths: tuple = ("/metrics",)) -> None:
+        self.app = app
+        self.excluded_paths = excluded_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            # Usar la plantilla de la ruta evita una serie por cada id
+            route = scope.get("route")
+            route_name = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(method=scope["method"], route=route_name, status=str(status_code)).observe(elapsed)
+            HTTP_REQUEST_DB_QUERIES.labels(route=route_name).observe(stats.query_count)
+            HTTP_REQUEST_DB_SECONDS.labels(route=route_name).observe(stats.query_seconds)
+
+
+def render_metrics():
+    """Returns the Prometheus text exposition payload and its content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
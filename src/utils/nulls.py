@@ -0,0 +1,18 @@
+def is_missing(value):
+    """
+    Equivalente a pd.isna() para valores escalares, sin importar pandas:
+    None, NaN (float o numpy), NaT y pd.NA cuentan como ausentes.
+    """
+    if value is None:
+        return True
+    if isinstance(value, (str, bytes, int)):
+        return False
+    try:
+        # NaN y NaT son los únicos valores distintos de sí mismos
+        return bool(value != value)
+    except (TypeError, ValueError):
+        # pd.NA no se puede convertir a bool
+        return type(value).__name__ == "NAType"
+
+def none_if_missing(value):
+    return None if is_missing(value) else value
@@ -0,0 +1,186 @@
+import asyncio
+import cProfile
+import heapq
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.utils.logger import setup_logger
+from src.utils.metrics import RequestStats, get_request_stats, reset_request_stats, set_request_stats
+
+logger = setup_logger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+# Parámetros que pueden llevar credenciales (p. ej. ?token=<Firebase ID token>)
+SENSITIVE_PARAMS = re.compile(
+    r"token|secret|password|passwd|api_?key|^key$|authorization|credential|signature|session", re.IGNORECASE
+)
+REDACTED = "[REDACTED]"
+
+
+def redact_query_string(query_string: bytes) -> str:
+    """Query string with the values of credential-like parameters replaced by [REDACTED]"""
+    params = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return urlencode([
+        (name, REDACTED if SENSITIVE_PARAMS.search(name) else value) for name, value in params
+    ], safe="[]")
+
+
+class ProfileStore:
+    """
+    Keeps on disk the profiles of the slowest `keep` requests. Each profile is
+    a `.json` report (request, SQL statements, top functions) plus the raw
+    `.prof` file, which can be opened with snakeviz or pstats.
+    """
+
+    def __init__(self, directory: str, keep: int = 20):
+        self.directory = directory
+        self.keep = keep
+        self._heap = []  # (elapsed, profile_id), el más rápido en la cima
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        # Los nombres empiezan por la duración en µs: así sobreviven a reinicios
+        for filename in os.listdir(self.directory):
+            match = re.match(r"^(\d+)_.+\.json$", filename)
+            if match:
+                heapq.heappush(self._heap, (int(match.group(1)) / 1e6, filename[:-len(".json")]))
+        while len(self._heap) > self.keep:
+            self._remove(heapq.heappop(self._heap)[1])
+
+    def _remove(self, profile_id: str):
+        for extension in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(self.directory, profile_id + extension))
+            except FileNotFoundError:
+                pass
+
+    def accepts(self, elapsed: float) -> bool:
+        return self.keep > 0 and (len(self._heap) < self.keep or elapsed > self._heap[0][0])
+
+    def save(self, elapsed: float, profile_id: str, report: dict, profiler: cProfile.Profile) -> bool:
+        """Writes the profile if it is among the slowest ones, evicting the fastest"""
+        with self._lock:
+            if not self.accepts(elapsed):
+                return False
+            with open(os.path.join(self.directory, profile_id + ".json"), "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+            profiler.dump_stats(os.path.join(self.directory, profile_id + ".prof"))
+
+            heapq.heappush(self._heap, (elapsed, profile_id))
+            while len(self._heap) > self.keep:
+                self._remove(heapq.heappop(self._heap)[1])
+            return True
+
+
+def summarize_profile(profiler: cProfile.Profile, limit: int = 30) -> str:
+    """Top functions by cumulative time, as printed by pstats"""
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return output.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a request when it carries `X-Profile: 1` or
+    is picked by `sample_rate`. It records a cProfile profile plus every SQL
+    statement and its duration, and keeps the slowest ones in a ProfileStore.
+
+    cProfile observes the whole thread, so only one request is profiled at a
+    time. Other requests arriving meanwhile are not profiled themselves, but
+    they run on the same event loop thread: whatever they execute while the
+    profiled request is awaiting shows up in its profile too. Use the SQL
+    list and the route for attribution, and profile on a quiet instance when
+    the function breakdown matters.
+
+    Query strings are stored with credential-like parameters redacted.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore, sample_rate: float = 0.0) -> None:
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self._active = False
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if self._active:
+            return False
+        if Headers(scope=scope).get(PROFILE_HEADER) in ("1", "true"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._active = True
+        started_at = datetime.now(timezone.utc)
+        status_code = 500
+
+        stats = get_request_stats()
+        stats_token = None
+        if stats is None:
+            stats = RequestStats()
+            stats_token = set_request_stats(stats)
+        stats.statements = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            self._active = False
+            if stats_token is not None:
+                reset_request_stats(stats_token)
+
+            statements, stats.statements = stats.statements, None
+
+            route = scope.get("route")
+            route_name = getattr(route, "path", None) or scope["path"]
+            if self.store.accepts(elapsed):
+                slug = re.sub(r"[^A-Za-z0-9]+", "-", route_name).strip("-") or "root"
+                profile_id = f"{int(elapsed * 1e6):012d}_{started_at:%Y%m%dT%H%M%S}_{slug}"
+                report = {
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_name,
+                    "query_string": redact_query_string(scope.get("query_string", b"")),
+                    "status": status_code,
+                    "started_at": started_at.isoformat(),
+                    "elapsed_seconds": elapsed,
+                    "sql": {
+                        "count": stats.query_count,
+                        "seconds": stats.query_seconds,
+                        "statements": statements,
+                    },
+                    "profile": summarize_profile(profiler),
+                }
+                try:
+                    # Escribir en disco fuera del event loop
+                    if await asyncio.to_thread(self.store.save, elapsed, profile_id, report, profiler):
+                        logger.info("Perfil guardado: %s (%.3fs, %s consultas SQL)", profile_id, elapsed, stats.query_count)
+                except Exception as e:
+                    logger.error("❌ Error al guardar el perfil %s: %s", profile_id, e)
@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field
+from fastapi import Response
+from src.utils.compression import compress_body, select_encoding
+from src.utils.ttl_cache import TTLCache
+
+
+@dataclass
+class CachedResponse:
+    """A serialized response body plus its lazily computed compressed variants"""
+    body: bytes
+    media_type: str
+    encoded: dict = field(default_factory=dict)
+
+    def get_body(self, encoding: str | None, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+        if encoding is None:
+            return self.body
+        # Compress only once per encoding; subsequent hits reuse the bytes
+        if encoding not in self.encoded:
+            self.encoded[encoding] = compress_body(self.body, encoding, gzip_level, brotli_quality)
+        return self.encoded[encoding]
+
+
+class ResponseCache:
+    """
+    Small in-process TTL cache for serialized responses. Entries keep the
+    compressed bytes alongside the raw body so hot responses are compressed
+    once instead of on every request.
+    """
+
+    def __init__(self, ttl_seconds: int = 60, max_entries: int = 256, minimum_size: int = 1024,
+                 gzip_level: int = 6, brotli_quality: int = 5):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._entries = TTLCache(ttl_seconds, max_entries)
+
+    def get(self, key) -> CachedResponse | None:
+        return self._entries.get(key)
+
+    def set(self, key, body: bytes, media_type: str = "application/json") -> CachedResponse:
+        entry = CachedResponse(body=body, media_type=media_type)
+        self._entries.set(key, entry)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+    def to_response(self, entry: CachedResponse, accept_encoding: str) -> Response:
+        """Builds a response for the entry using the encoding the client accepts"""
+        encoding = select_encoding(accept_encoding) if len(entry.body) >= self.minimum_size else None
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(
+            content=entry.get_body(encoding, self.gzip_level, self.brotli_quality),
+            media_type=entry.media_type,
+            headers=headers,
+        )
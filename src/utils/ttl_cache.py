@@ -0,0 +1,54 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a per-entry TTL and a size bound.
+
+    Entries are kept in least-recently-used order, so when the cache is full
+    the LRU entry is dropped in O(1) instead of scanning for the one closest
+    to expiring. Expired entries are removed when they are read.
+    """
+
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl_seconds: float = None):
+        """Store `value` for `ttl_seconds` (default: the cache TTL); nothing is stored if it is <= 0"""
+        seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if seconds <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
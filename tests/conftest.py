@@ -0,0 +1,156 @@
+"""
+Test environment and helpers shared by the tests and, through
+`tests.conftest`, by the benchmarks: synthetic subscription data with Google
+Play purchase tokens, seeded into MySQL or a local SQLite file, and Google
+Play notifications for it.
+
+Settings are read when `src` is first imported, so pytest_configure sets the
+test values before any test module is collected. The suite runs against a
+throwaway SQLite database, never the one configured for the app.
+"""
+import copy
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+FIREBASE_SETTINGS = [
+    "FIREBASE_TYPE", "FIREBASE_PROJECT_ID", "FIREBASE_PRIVATE_KEY_ID", "FIREBASE_PRIVATE_KEY",
+    "FIREBASE_CLIENT_EMAIL", "FIREBASE_CLIENT_ID", "FIREBASE_AUTH_URI", "FIREBASE_TOKEN_URI",
+    "FIREBASE_AUTH_PROVIDER_X509_CERT_URL", "FIREBASE_CLIENT_X509_CERT_URL",
+    "FIREBASE_UNIVERSE_DOMAIN", "FIREBASE_DATABASE_URL",
+]
+
+PACKAGE_NAME = "com.axioma.app"
+PRODUCTS = ["pro_plan_monthly", "analyst_plan_monthly", "pro_plan_yearly"]
+
+# RENEWED, CANCELED, EXPIRED y su estado final
+NOTIFICATION_STATUS = {2: "ACTIVE", 3: "CANCELLED", 13: "EXPIRED"}
+
+
+def pytest_configure(config):
+    # Antes de recoger los tests; los benchmarks que importan tests.conftest no pasan por aquí
+    for name in FIREBASE_SETTINGS:
+        os.environ.setdefault(name, "test")
+    os.environ["DB_URL"] = f"sqlite+aiosqlite:///{Path(tempfile.mkdtemp(prefix='axioma-tests-')) / 'tests.db'}"
+    os.environ.pop("DB_REPLICA_HOST", None)
+
+
+def purchase_token(subscription_id):
+    """Tokens deterministas con la longitud típica de Google Play (~150 caracteres)"""
+    digest = hashlib.sha256(f"purchase-{subscription_id}".encode()).hexdigest()
+    return f"{digest[:24]}.AO-J1O{digest}{digest[:56]}"
+
+
+def metadata_for(dialect_name):
+    """SQLite no conoce las collations de MySQL: se crean las tablas sin ellas"""
+    from sqlalchemy import MetaData
+
+    import src.models  # noqa: F401  (registra las tablas en el metadata)
+    from src.models.base_model import Base
+
+    if dialect_name != "sqlite":
+        return Base.metadata
+    metadata = MetaData()
+    for table in Base.metadata.tables.values():
+        copied = table.to_metadata(metadata)
+        for column in copied.columns:
+            if getattr(column.type, "collation", None):
+                column.type = copy.copy(column.type)
+                column.type.collation = None
+    return metadata
+
+
+async def seed_subscriptions(db_url, subscriptions, users, batch_size=10_000, seed=42, progress=False):
+    """Creates the schema and `subscriptions` rows; reuses the database if it already has that many"""
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(db_url)
+    metadata = metadata_for(engine.dialect.name)
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    start = time.perf_counter()
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+            existing = (await conn.execute(select(func.count()).select_from(metadata.tables["subscription"]))).scalar()
+        if existing == subscriptions:
+            return {"seeded": False, "seconds": 0.0}
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.drop_all)
+            await conn.run_sync(metadata.create_all)
+
+        for batch_start in range(1, users + 1, batch_size):
+            async with engine.begin() as conn:
+                await conn.execute(insert(metadata.tables["user"]), [
+                    {"id": i, "email": f"sub-user-{i}@example.com", "name": f"Sub {i}", "email_verified": True}
+                    for i in range(batch_start, min(batch_start + batch_size, users + 1))
+                ])
+
+        for batch_start in range(1, subscriptions + 1, batch_size):
+            rows = []
+            for i in range(batch_start, min(batch_start + batch_size, subscriptions + 1)):
+                token = purchase_token(i)
+                product = rng.choice(PRODUCTS)
+                created = now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))
+                rows.append({
+                    "id": i,
+                    "user_id": rng.randint(1, users),
+                    "subscription_id": f"GPA.{i:012d}",
+                    "tier": "PRO" if product.startswith("pro") else "ANALYST",
+                    "status": rng.choice(["ACTIVE", "ACTIVE", "CANCELLED", "EXPIRED"]),
+                    "start_date": created,
+                    "end_date": created + timedelta(days=30),
+                    "auto_renew": True,
+                    "platform": "android",
+                    "receipt_data": json.dumps({"purchaseToken": token, "productId": product, "packageName": PACKAGE_NAME}),
+                    "purchase_token": token,
+                    "product_id": product,
+                    "provider": "google_play",
+                    "created_at": created,
+                    "updated_at": created,
+                })
+            async with engine.begin() as conn:
+                await conn.execute(insert(metadata.tables["subscription"]), rows)
+            if progress:
+                print(f"  {rows[-1]['id']}/{subscriptions} subscriptions", end="\r", flush=True)
+        if progress:
+            print()
+        return {"seeded": True, "seconds": time.perf_counter() - start}
+    finally:
+        await engine.dispose()
+
+
+def notification_payloads(messages, subscriptions, seed=42):
+    """
+    `messages` random subscriptionNotification payloads for the seeded
+    subscriptions, plus the status each purchase token must end in (that of
+    its last notification).
+    """
+    rng = random.Random(seed)
+    expected, payloads = {}, []
+    for _ in range(messages):
+        token = purchase_token(rng.randint(1, subscriptions))
+        notification_type = rng.choice(list(NOTIFICATION_STATUS))
+        expected[token] = NOTIFICATION_STATUS[notification_type]
+        payloads.append({
+            "version": "1.0",
+            "packageName": PACKAGE_NAME,
+            "subscriptionNotification": {
+                "version": "1.0",
+                "notificationType": notification_type,
+                "purchaseToken": token,
+                "subscriptionId": "pro_plan_monthly",
+            },
+        })
+    return payloads, expected
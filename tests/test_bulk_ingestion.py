@@ -0,0 +1,140 @@
+"""
+Bulk news ingestion: prepare_news_frame cleaning and upsert_news batching
+and updates, against the throwaway SQLite database set up in conftest.py.
+"""
+import asyncio
+import math
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ingestion.bulk import NEWS_COLUMNS, prepare_news_frame, upsert_news
+from src.models.news_tag_model import NewsCharactersModel, NewsModel, NewsTranslationModel, NewsTransCharactersModel
+from src.utils.hashing import news_content_hash
+from tests.conftest import metadata_for
+
+
+def article(i, **fields):
+    record = {
+        "source_link": f"https://news.example.com/{i}",
+        "news_source": "Example",
+        "title": f"Title {i}",
+        "detail": f"Detail {i}",
+        "content": f"Content {i}",
+        "publish_datetime": "2025-01-01 10:00:00",
+        "sentiment_category": "POSITIVO",
+        "sentiment_score": 0.5,
+    }
+    record.update(fields)
+    return record
+
+
+def run_with_engine(scenario):
+    async def main():
+        engine = create_async_engine(os.environ["DB_URL"])
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(metadata_for(engine.dialect.name).create_all)
+                for model in (NewsTransCharactersModel, NewsCharactersModel, NewsTranslationModel, NewsModel):
+                    await conn.execute(delete(model))
+            return await scenario(engine)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+async def stored_news(engine):
+    async with engine.connect() as conn:
+        rows = await conn.execute(select(NewsModel.source_link, NewsModel.title, NewsModel.content_hash))
+        return {link: (title, content_hash) for link, title, content_hash in rows}
+
+
+def test_prepare_news_frame_maps_and_cleans_columns():
+    df = pd.DataFrame([
+        article(1, title="A" * 300 + "\ud800", sentiment_category="muy_negativo", extra="dropped"),
+        article(2, sentiment_category="SARCÁSTICO", sentiment_score=None, detail=math.nan),
+        article(3, source_link=None),
+        article(4, source_link="  "),
+        article(5, title="First scrape"),
+        article(5, title="Second scrape", publish_datetime="not a date"),
+    ]).drop(columns=["news_source"])
+
+    frame = prepare_news_frame(df)
+
+    assert list(frame.columns) == NEWS_COLUMNS + ["content_hash"]
+    records = {record["source_link"]: record for record in frame.to_dict("records")}
+    assert sorted(records) == [f"https://news.example.com/{i}" for i in (1, 2, 5)]
+
+    first, second, last = (records[f"https://news.example.com/{i}"] for i in (1, 2, 5))
+    assert first["title"] == "A" * 255
+    assert first["sentiment_category"] == "MUY_NEGATIVO"
+    assert first["news_source"] is None
+    assert first["publish_datetime"] == pd.Timestamp("2025-01-01 10:00:00")
+    assert second["sentiment_category"] == "DESCONOCIDO"
+    assert second["sentiment_score"] == 0.0
+    assert second["detail"] is None
+    assert second["content_hash"] == news_content_hash("Title 2", None, "Content 2")
+    # Repetido en el mismo fichero: gana la última fila
+    assert last["title"] == "Second scrape"
+    assert last["publish_datetime"] is None
+
+
+def test_upsert_news_inserts_in_batches_and_updates_by_source_link():
+    async def scenario(engine):
+        first = await upsert_news(pd.DataFrame([article(i) for i in range(5)]), batch_size=2, bind=engine)
+
+        rescrape = pd.DataFrame([article(0, title="Title 0 (updated)"), article(5)])
+        second = await upsert_news(rescrape, batch_size=2, bind=engine, skip_unchanged=False)
+        return first, second, await stored_news(engine)
+
+    first, second, news = run_with_engine(scenario)
+
+    assert (first.rows_read, first.rows_written, first.inserted, first.batches) == (5, 5, 5, 3)
+    assert (second.rows_written, second.batches) == (2, 1)
+    assert len(news) == 6
+    title, content_hash = news["https://news.example.com/0"]
+    assert title == "Title 0 (updated)"
+    assert content_hash == news_content_hash("Title 0 (updated)", "Detail 0", "Content 0")
+
+
+def test_changed_articles_keep_their_analysis_and_are_flagged():
+    async def scenario(engine):
+        await upsert_news(pd.DataFrame([article(i) for i in range(3)]), bind=engine)
+        async with engine.begin() as conn:
+            ids = dict((await conn.execute(select(NewsModel.source_link, NewsModel.id))).all())
+            changed_id = ids["https://news.example.com/1"]
+            await conn.execute(insert(NewsTranslationModel).values(
+                news_id=changed_id, title_tra="Título 1", detail_tra="Detalle 1", content_tra="Contenido 1", language="es",
+            ))
+            await conn.execute(insert(NewsCharactersModel).values(
+                news_id=changed_id, character_name="Someone", character_description="Mentioned in article 1",
+            ))
+
+        rescrape = pd.DataFrame([article(0), article(1, content="Content 1, corrected"), article(3)])
+        report = await upsert_news(rescrape, batch_size=2, bind=engine)
+
+        async with engine.connect() as conn:
+            flagged = (await conn.execute(select(NewsModel.id).where(NewsModel.needs_analysis))).scalars().all()
+            translations = (await conn.execute(select(NewsTranslationModel.news_id))).scalars().all()
+            characters = (await conn.execute(select(NewsCharactersModel.news_id))).scalars().all()
+        return changed_id, report, await stored_news(engine), flagged, translations, characters
+
+    changed_id, report, news, flagged, translations, characters = run_with_engine(scenario)
+
+    assert (report.inserted, report.updated, report.unchanged) == (1, 1, 1)
+    assert (report.rows_read, report.rows_written, report.batches) == (3, 2, 2)
+    assert report.changed_ids == [changed_id]
+    assert news["https://news.example.com/1"][1] == news_content_hash("Title 1", "Detail 1", "Content 1, corrected")
+    assert len(news) == 4
+    # Se conserva el análisis anterior hasta que se regenere
+    assert flagged == [changed_id]
+    assert translations == [changed_id]
+    assert characters == [changed_id]
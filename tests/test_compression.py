@@ -0,0 +1,124 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.config.compression_config import feed_cache
+from src.routes.api.v1 import articles
+from src.utils.compression import CompressionMiddleware, select_encoding
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+BIG = json.dumps([{"id": i, "title": f"Artículo {i}"} for i in range(200)]).encode()
+
+
+def build_app():
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return Response(BIG, media_type="application/json")
+
+    @app.get("/small")
+    def small():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    @app.get("/xlsx")
+    def xlsx():
+        return Response(BIG, media_type=XLSX)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((BIG for _ in range(3)), media_type="application/json")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse((f"data: {i}\n\n".encode() * 200 for i in range(3)), media_type="text/event-stream")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(build_app())
+
+
+def raw_body(client, path, accept_encoding):
+    # stream() no descomprime: se comprueban los bytes que envía el servidor
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", "gzip"),
+    ("br", "br"),
+    ("gzip, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+])
+def test_select_encoding(accept_encoding, expected):
+    assert select_encoding(accept_encoding) == expected
+
+
+def test_gzip_and_brotli_bodies(client):
+    response, body = raw_body(client, "/big", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(body) == BIG
+
+    response, body = raw_body(client, "/big", "br")
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(body) == BIG
+
+
+def test_identity_and_small_bodies_are_not_compressed(client):
+    for path, accept_encoding in [("/big", "identity"), ("/big", "gzip;q=0"), ("/small", "gzip")]:
+        response, body = raw_body(client, path, accept_encoding)
+        assert "content-encoding" not in response.headers, path
+        assert body == client.get(path, headers={"Accept-Encoding": "identity"}).content
+
+
+def test_already_compressed_and_event_streams_are_left_alone(client):
+    response, body = raw_body(client, "/xlsx", "gzip")
+    assert "content-encoding" not in response.headers
+    assert body == BIG
+
+    response, body = raw_body(client, "/events", "gzip")
+    assert "content-encoding" not in response.headers
+    assert body.startswith(b"data: 0")
+
+
+def test_streaming_json_is_compressed_chunk_by_chunk(client):
+    response, body = raw_body(client, "/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body) == BIG * 3
+
+
+def test_anonymous_feed_is_cached_and_authenticated_requests_bypass_it(monkeypatch):
+    calls = []
+
+    async def get_articles(limit, sort, token):
+        calls.append(token)
+        return []
+
+    monkeypatch.setattr(articles.article_service, "get_articles", get_articles)
+    feed_cache.clear()
+    app = FastAPI()
+    app.include_router(articles.router)
+    client = TestClient(app)
+
+    assert client.get("/articles").json() == []  # miss
+    assert client.get("/articles").json() == []  # hit
+    assert calls == [None]
+
+    client.get("/articles", params={"token": "user-token"})
+    client.get("/articles", params={"token": "user-token"})
+    assert calls == [None, "user-token", "user-token"]
+    feed_cache.clear()
@@ -0,0 +1,88 @@
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+from hypothesis import given, settings, strategies as st
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.ingestion.convert import clean_dataframe, convert_nan_to_empty_string, convert_nan_to_none
+
+
+# Implementaciones anteriores, celda por celda: son la referencia
+def reference_nan_to_none(series):
+    return series.apply(lambda x: None if pd.isna(x) else x)
+
+
+def reference_nan_to_empty_string(series):
+    return series.apply(lambda x: "" if pd.isna(x) else x)
+
+
+def reference_clean_dataframe(df):
+    strip = lambda text: re.sub(r'[\ud800-\udfff]', '', text) if isinstance(text, str) else text
+    for col in df.select_dtypes(include=['object']):
+        df[col] = df[col].apply(strip)
+    return df
+
+
+surrogates = st.sampled_from(["\ud800", "\udbff", "\udc00", "\udfff"])
+texts = st.lists(st.one_of(st.characters(), surrogates), max_size=8).map("".join)
+missing = st.sampled_from([None, float("nan"), pd.NaT, pd.NA])
+timestamps = st.datetimes(min_value=pd.Timestamp("2000-01-01").to_pydatetime(),
+                          max_value=pd.Timestamp("2030-01-01").to_pydatetime()).map(pd.Timestamp)
+scalars = st.one_of(texts, missing, st.integers(-10, 10), st.floats(allow_nan=True), st.booleans(), timestamps)
+
+
+def series_of(elements, dtype=None):
+    return st.lists(elements, max_size=30).map(lambda values: pd.Series(values, dtype=dtype, name="col"))
+
+
+series = st.one_of(
+    series_of(scalars, dtype=object),
+    series_of(st.one_of(texts, missing), dtype=object),
+    series_of(st.one_of(st.integers(-10, 10), st.just(None)), dtype=object),
+    series_of(st.floats(allow_nan=True)),
+    series_of(st.integers(-10, 10)),
+    series_of(st.booleans()),
+    series_of(st.one_of(timestamps, st.just(pd.NaT))),
+)
+
+
+def cells(series):
+    """Distingue None de NaN y 1 de 1.0, cosa que assert_series_equal no hace"""
+    return [(type(value).__name__, repr(value)) for value in series.tolist()]
+
+
+def assert_identical(result, expected):
+    assert result.dtype == expected.dtype
+    assert result.name == expected.name
+    assert result.index.equals(expected.index)
+    assert cells(result) == cells(expected)
+
+
+@settings(max_examples=300, deadline=None)
+@given(series)
+def test_convert_nan_to_none_matches_reference(values):
+    assert_identical(convert_nan_to_none(values), reference_nan_to_none(values))
+
+
+@settings(max_examples=300, deadline=None)
+@given(series)
+def test_convert_nan_to_empty_string_matches_reference(values):
+    assert_identical(convert_nan_to_empty_string(values), reference_nan_to_empty_string(values))
+
+
+@settings(max_examples=300, deadline=None)
+@given(st.lists(series, min_size=1, max_size=4))
+def test_clean_dataframe_matches_reference(columns):
+    length = min(len(column) for column in columns)
+    frame = pd.DataFrame({f"c{i}": column.iloc[:length].reset_index(drop=True) for i, column in enumerate(columns)})
+
+    result = clean_dataframe(frame.copy())
+    expected = reference_clean_dataframe(frame.copy())
+
+    assert list(result.columns) == list(expected.columns)
+    for name in expected.columns:
+        assert_identical(result[name], expected[name])
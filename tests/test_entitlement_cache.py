@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils.entitlement_cache import EntitlementCache
+
+
+def test_result_read_before_an_invalidation_is_not_cached():
+    cache = EntitlementCache(ttl_seconds=60)
+    generation = cache.generation()  # verify empieza a leer de la BD...
+    cache.invalidate_user(7)         # ...y mientras tanto se cancela la suscripción
+    cache.set_entitlement(7, {"has_subscription": True}, generation=generation)
+
+    assert cache.get_entitlement(7) is None
+
+    generation = cache.generation()
+    cache.set_entitlement(7, {"has_subscription": False}, generation=generation)
+    assert cache.get_entitlement(7) == {"has_subscription": False}
+
+
+def test_invalidating_one_user_keeps_the_others():
+    cache = EntitlementCache(ttl_seconds=60)
+    generation = cache.generation()
+    cache.invalidate_user(1)
+    cache.set_entitlement(2, {"has_subscription": True}, generation=generation)
+
+    assert cache.get_entitlement(2) == {"has_subscription": True}
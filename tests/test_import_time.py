@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Tiempo máximo de `import app` (segundos). Se puede ajustar en CI lentos.
+IMPORT_BUDGET_SECONDS = float(os.environ.get("IMPORT_TIME_BUDGET", "2.0"))
+
+# Dependencias que solo se usan en endpoints concretos, scripts o tareas en segundo plano
+LAZY_MODULES = [
+    "pandas",
+    "openpyxl",
+    "googleapiclient",
+    "google.cloud.pubsub_v1",
+    "firebase_admin",
+]
+
+
+
+def parse_importtime(stderr):
+    """Returns {module: cumulative seconds} from `python -X importtime` output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            modules[name.strip()] = int(cumulative) / 1e6
+        except ValueError:
+            continue  # cabecera
+    return modules
+
+
+def import_app_with_importtime():
+    # Firebase ya no se inicializa al importar: basta con los valores de prueba de conftest.py
+    env = dict(os.environ)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return parse_importtime(result.stderr)
+
+
+def test_app_import_time_within_budget():
+    modules = import_app_with_importtime()
+    assert "app" in modules
+    assert modules["app"] <= IMPORT_BUDGET_SECONDS, (
+        f"import app took {modules['app']:.2f}s (budget {IMPORT_BUDGET_SECONDS:.2f}s). Slowest imports: "
+        + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in sorted(modules.items(), key=lambda item: -item[1])[1:8])
+    )
+
+
+def test_heavy_dependencies_are_not_imported_at_startup():
+    modules = import_app_with_importtime()
+    loaded = [name for name in LAZY_MODULES if name in modules]
+    assert not loaded, f"Imported at startup, should be lazy: {', '.join(loaded)}"
+
+
+if __name__ == "__main__":
+    modules = import_app_with_importtime()
+    print(f"import app: {modules['app']:.3f}s")
+    for name, seconds in sorted(modules.items(), key=lambda item: -item[1])[:15]:
+        print(f"  {seconds:.3f}s  {name}")
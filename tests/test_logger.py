@@ -0,0 +1,70 @@
+"""
+setup_logger / configure_logging: one queue handler per logger, and LOG_LEVEL
+applied to the loggers created before and after configuration, including the
+records written while `app` is being imported.
+"""
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the project root to the Python path
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+from src.utils import logger as logger_module
+from src.utils.logger import configure_logging, setup_logger
+
+
+@pytest.fixture
+def logging_state(tmp_path, monkeypatch):
+    # configure_logging abre logs/app.log en el directorio actual y es global al proceso
+    monkeypatch.chdir(tmp_path)
+    config, pipeline = logger_module._config, logger_module._pipeline
+    saved = dict(vars(config))
+    yield
+    vars(config).update(saved)
+    pipeline.stop()
+    pipeline.start()
+
+
+def settings(log_level, overrides=""):
+    return SimpleNamespace(log_level=log_level, log_format="text", log_level_overrides=overrides, log_debug_sampling="")
+
+
+def test_setup_logger_twice_adds_one_handler():
+    first = setup_logger("tests.logger.twice")
+    second = setup_logger("tests.logger.twice")
+
+    assert first is second
+    assert len(first.handlers) == 1
+
+
+def test_configured_level_applies_to_existing_and_new_loggers(logging_state):
+    before = setup_logger("tests.logger.before", level=logging.DEBUG)
+
+    configure_logging(settings("WARNING", "tests.logger.verbose=DEBUG"), force=True)
+    after = setup_logger("tests.logger.after", level=logging.DEBUG)
+    verbose = setup_logger("tests.logger.verbose.child", level=logging.ERROR)
+
+    assert not before.isEnabledFor(logging.INFO)
+    assert not after.isEnabledFor(logging.INFO)
+    assert after.isEnabledFor(logging.WARNING)
+    assert verbose.isEnabledFor(logging.DEBUG)
+    assert (Path("logs") / "app.log").exists()
+
+
+def test_log_level_applies_while_app_is_imported(tmp_path):
+    env = dict(os.environ, LOG_LEVEL="WARNING", PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-c", "import app"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120,
+    )
+
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert "INFO" not in result.stderr
+    assert "INFO" not in (tmp_path / "logs" / "app.log").read_text(encoding="utf-8")
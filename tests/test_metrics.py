@@ -0,0 +1,98 @@
+"""
+Per-request SQL statistics: record_query, the SQLAlchemy cursor events that
+call it and MetricsMiddleware, which reports them per route.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config.db_config import _instrument_queries
+from src.utils.metrics import MetricsMiddleware, RequestStats, record_query, reset_request_stats, set_request_stats
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_record_query_accumulates_into_the_current_request():
+    record_query("test", 0.5)  # fuera de una petición solo se observa el histograma
+
+    stats = RequestStats(statements=[])
+    token = set_request_stats(stats)
+    try:
+        record_query("test", 0.25, "SELECT 1")
+        record_query("test", 0.5, "SELECT 2")
+    finally:
+        reset_request_stats(token)
+    record_query("test", 1.0)
+
+    assert stats.query_count == 2
+    assert stats.query_seconds == 0.75
+    assert [entry["statement"] for entry in stats.statements] == ["SELECT 1", "SELECT 2"]
+    assert sample("axioma_db_query_seconds_count", engine="test") == 4
+
+
+def test_failed_statements_are_not_timed(tmp_path):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}")
+        _instrument_queries("failing", engine)
+        stats = RequestStats()
+        token = set_request_stats(stats)
+        try:
+            async with engine.connect() as conn:
+                for _ in range(3):
+                    with pytest.raises(exc.OperationalError):
+                        await conn.execute(text("SELECT * FROM missing_table"))
+                await conn.execute(text("SELECT 1"))
+                # Nada de las sentencias fallidas se queda en la conexión, que vuelve al pool
+                leftovers = dict(conn.info)
+        finally:
+            reset_request_stats(token)
+            await engine.dispose()
+        return stats, leftovers
+
+    stats, leftovers = asyncio.run(run())
+
+    assert stats.query_count == 1
+    assert leftovers == {}
+    assert sample("axioma_db_query_seconds_count", engine="failing") == 1
+
+
+def test_middleware_reports_route_template_status_and_queries():
+    app = FastAPI()
+
+    @app.get("/metrics-test/items/{item_id}")
+    async def item(item_id: int):
+        record_query("test", 0.01)
+        record_query("test", 0.02)
+        return {"id": item_id}
+
+    @app.get("/metrics")
+    async def metrics():
+        record_query("test", 0.01)
+        return {}
+
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+    route = "/metrics-test/items/{item_id}"
+
+    assert client.get("/metrics-test/items/1").status_code == 200
+    assert client.get("/metrics-test/items/2").status_code == 200
+    assert client.get("/metrics-test/items/x").status_code == 422
+    client.get("/metrics")
+
+    assert sample("axioma_http_request_seconds_count", method="GET", route=route, status="200") == 2
+    assert sample("axioma_http_request_seconds_count", method="GET", route=route, status="422") == 1
+    assert sample("axioma_http_request_db_queries_sum", route=route) == 4
+    assert sample("axioma_http_request_db_seconds_sum", route=route) == pytest.approx(0.06)
+    assert sample("axioma_http_request_seconds_count", method="GET", route="/metrics", status="200") == 0
@@ -0,0 +1,102 @@
+"""
+Request profiling: off unless PROFILING_ENABLED, credentials never written to
+the reports, and only the slowest profiles kept on disk.
+"""
+import cProfile
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import profiling_config
+from src.utils.metrics import record_query
+from src.utils.profiling import ProfileStore, ProfilingMiddleware, redact_query_string
+
+
+def profiling_settings(enabled, directory):
+    return SimpleNamespace(profiling_enabled=enabled, profiling_dir=str(directory), profiling_keep=5, profiling_sample_rate=1.0)
+
+
+def test_disabled_profiling_registers_nothing(monkeypatch, tmp_path):
+    app = FastAPI()
+    monkeypatch.setattr(profiling_config, "_SETTINGS", profiling_settings(False, tmp_path / "profiles"))
+    profiling_config.add_profiling(app)
+
+    assert app.user_middleware == []
+    assert not (tmp_path / "profiles").exists()
+
+    monkeypatch.setattr(profiling_config, "_SETTINGS", profiling_settings(True, tmp_path / "profiles"))
+    profiling_config.add_profiling(app)
+    assert [middleware.cls for middleware in app.user_middleware] == [ProfilingMiddleware]
+
+
+def test_redact_query_string():
+    redacted = redact_query_string(b"token=abc&limit=5&api_key=k1&apikey=k2&key=k3&sort=desc&session_id=s")
+
+    assert redacted == (
+        "token=[REDACTED]&limit=5&api_key=[REDACTED]&apikey=[REDACTED]&key=[REDACTED]"
+        "&sort=desc&session_id=[REDACTED]"
+    )
+    assert redact_query_string(b"") == ""
+
+
+def test_profile_report_has_no_credentials(tmp_path):
+    app = FastAPI()
+
+    @app.get("/articles/{article_id}")
+    async def article(article_id: int):
+        record_query("test", 0.001, "SELECT * FROM news WHERE id = ?")
+        return {"id": article_id}
+
+    app.add_middleware(ProfilingMiddleware, store=ProfileStore(str(tmp_path), keep=5))
+    client = TestClient(app)
+
+    client.get("/articles/1", params={"token": "firebase-id-token"})
+    assert list(tmp_path.iterdir()) == []  # sin X-Profile ni muestreo no se perfila
+
+    client.get(
+        "/articles/1",
+        params={"token": "firebase-id-token", "limit": "5"},
+        headers={"X-Profile": "1", "Authorization": "Bearer bearer-secret", "Cookie": "session=cookie-secret"},
+    )
+    [report_file] = tmp_path.glob("*.json")
+    raw = report_file.read_text(encoding="utf-8")
+    report = json.loads(raw)
+
+    assert report["route"] == "/articles/{article_id}"
+    assert report["query_string"] == "token=[REDACTED]&limit=5"
+    assert report["sql"]["count"] == 1
+    for secret in ("firebase-id-token", "bearer-secret", "cookie-secret"):
+        assert secret not in raw
+    assert report_file.with_suffix(".prof").exists()
+
+
+def test_store_keeps_only_the_slowest(tmp_path):
+    store = ProfileStore(str(tmp_path), keep=2)
+    profiler = cProfile.Profile()
+
+    def save(elapsed):
+        profile_id = f"{int(elapsed * 1e6):012d}_test"
+        return store.save(elapsed, profile_id, {"id": profile_id}, profiler)
+
+    assert save(0.1)
+    assert save(0.3)
+    assert save(0.2)      # desplaza al de 0.1
+    assert not save(0.15)  # más rápido que los dos guardados
+    assert not store.accepts(0.2)
+
+    kept = sorted(path.name for path in tmp_path.iterdir())
+    assert kept == [
+        "000000200000_test.json", "000000200000_test.prof",
+        "000000300000_test.json", "000000300000_test.prof",
+    ]
+
+    # Al reiniciar se recuperan los existentes y se recorta al nuevo `keep`
+    ProfileStore(str(tmp_path), keep=1)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["000000300000_test.json", "000000300000_test.prof"]
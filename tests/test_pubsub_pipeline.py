@@ -0,0 +1,122 @@
+"""
+Google Play notifications through PubSubService end to end, without Google
+Cloud: an InMemorySource feeds the queues, micro-batches and dedupe, and
+SubscriptionService writes to the throwaway SQLite database set up in
+conftest.py. The throughput numbers live in benchmarks/bench_pubsub.py.
+
+Every delivered message must end acked or nacked: one left unsettled holds
+its lease and a flow-control slot until the ack deadline expires.
+"""
+import asyncio
+import os
+
+from sqlalchemy import func, select
+
+from tests.conftest import notification_payloads, seed_subscriptions
+
+MESSAGES = 300
+SUBSCRIPTIONS = 50
+
+
+async def pump(payloads):
+    from src.config.db_config import engine, get_session
+    from src.models.subscription_model import SubscriptionHistoryModel, SubscriptionModel
+    from src.services.message_sources import InMemorySource
+    from src.services.pubsub_service import PubSubService
+
+    source = InMemorySource()
+    for i, payload in enumerate(payloads):
+        source.publish(payload, message_id=f"msg-{i}")
+    # Uno repetido: Pub/Sub puede entregar el mismo mensaje dos veces
+    source.publish(payloads[0], message_id="msg-0")
+
+    service = PubSubService(source=source)
+    try:
+        await service.start()
+        idle = await asyncio.to_thread(source.wait_until_idle, 60)
+        await service.stop()
+
+        async with get_session() as db:
+            history = (await db.execute(select(func.count()).select_from(SubscriptionHistoryModel))).scalar()
+            statuses = {
+                token: status.value
+                for token, status in await db.execute(select(SubscriptionModel.purchase_token, SubscriptionModel.status))
+            }
+    finally:
+        await engine.dispose()
+    return source, idle, history, statuses
+
+
+def test_every_notification_is_applied_once():
+    asyncio.run(seed_subscriptions(os.environ["DB_URL"], SUBSCRIPTIONS, 10))
+    payloads, expected = notification_payloads(MESSAGES, SUBSCRIPTIONS)
+
+    source, idle, history, statuses = asyncio.run(pump(payloads))
+
+    assert idle
+    assert len(source.acked) == MESSAGES + 1
+    assert len({message.message_id for message in source.acked}) == MESSAGES
+    assert history == MESSAGES
+    assert {token: statuses[token] for token in expected} == expected
+
+
+class FakeMessage:
+    """Records how the service settled it"""
+
+    def __init__(self, message_id, data=b""):
+        self.message_id = message_id
+        self.data = data
+        self.settled = None
+
+    def ack(self):
+        self.settled = "ack"
+
+    def nack(self):
+        self.settled = "nack"
+
+
+def test_undecodable_messages_are_settled(monkeypatch):
+    from src.services import pubsub_service
+    from src.services.message_sources import InMemorySource
+
+    service = pubsub_service.PubSubService(source=InMemorySource())
+    messages = [FakeMessage("not-json", b"not json"), FakeMessage("not-an-object", b"[1, 2]")]
+    for message in messages:
+        service._enqueue(message)
+    assert [message.settled for message in messages] == ["ack", "ack"]
+
+    # Con dead-letter topic se rechazan para que Pub/Sub los reenvíe allí
+    monkeypatch.setattr(pubsub_service._SETTINGS, "pubsub_dead_letter", True)
+    message = FakeMessage("dead-letter", b"not json")
+    service._enqueue(message)
+    assert message.settled == "nack"
+
+
+def test_failed_messages_are_nacked(monkeypatch):
+    from src.services.message_sources import InMemorySource
+    from src.services.pubsub_service import PubSubService
+
+    service = PubSubService(source=InMemorySource())
+
+    async def skip_processed(batch):
+        return batch
+
+    async def process(batch):
+        return not any(notification["fail"] for _, notification in batch)
+
+    monkeypatch.setattr(service, "_skip_processed", skip_processed)
+    monkeypatch.setattr(service, "_process", process)
+
+    def item(message_id, token, fail=False):
+        return FakeMessage(message_id), {"subscriptionNotification": {"purchaseToken": token}, "fail": fail}
+
+    single = [item("single", "token-a", fail=True)]
+    asyncio.run(service._handle_batch(single))
+    assert single[0][0].settled == "nack"
+
+    # Tras el fallo de token-b, su siguiente mensaje tampoco se aplica: se reentregan los dos, en orden
+    batch = [item("m1", "token-a"), item("m2", "token-b", fail=True), item("m3", "token-b"), item("m4", "token-c")]
+    asyncio.run(service._handle_batch(batch))
+    assert {message.message_id: message.settled for message, _ in batch} == {
+        "m1": "ack", "m2": "nack", "m3": "nack", "m4": "ack",
+    }
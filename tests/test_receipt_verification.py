@@ -0,0 +1,173 @@
+"""
+ReceiptVerificationService against a local fake App Store / Google Play server.
+
+The fake provider runs in a thread on 127.0.0.1 and answers according to the
+receipt or purchase token it receives, so each test can script failures,
+sandbox receipts and slow responses without touching the real stores.
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the Python path
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+import httpx
+
+from src.services.receipt_verification_service import ReceiptVerificationError, ReceiptVerificationService
+
+
+class FakeProvider(ThreadingHTTPServer):
+    """Counts requests per path and tracks how many are being served at once"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeProviderHandler)
+        self.calls = {}
+        self.failures_left = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _serve(self, respond):
+        server = self.server
+        with server.lock:
+            server.calls[self.path] = server.calls.get(self.path, 0) + 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            self._reply(*respond(server))
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def do_POST(self):
+        receipt = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["receipt-data"]
+
+        def respond(server):
+            # Los recibos "sandbox-*" solo son válidos en /sandbox, como en Apple
+            if receipt.startswith("sandbox-") and self.path != "/sandbox":
+                return 200, {"status": 21007}
+            return 200, {"status": 0, "receipt": {"receipt_data": receipt}}
+
+        self._serve(respond)
+
+    def do_GET(self):
+        token = self.path.rsplit("/", 1)[-1]
+
+        def respond(server):
+            with server.lock:
+                failures = server.failures_left.get(token, 0)
+                server.failures_left[token] = max(0, failures - 1)
+            if failures:
+                return 503, {"error": {"code": 503, "message": "Backend Error"}}
+            return 200, {"paymentState": 1, "expiryTimeMillis": "1893456000000", "token": token}
+
+        self._serve(respond)
+
+
+@pytest.fixture
+def provider():
+    server = FakeProvider()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run_with_service(provider, scenario, **kwargs):
+    async def fake_token():
+        return "fake-token"
+
+    async def main():
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            options = dict(
+                client=client,
+                token_provider=fake_token,
+                apple_url=f"{provider.url}/verifyReceipt",
+                apple_sandbox_url=f"{provider.url}/sandbox",
+                google_api_url=provider.url,
+                backoff=0.01,
+            )
+            options.update(kwargs)
+            return await scenario(ReceiptVerificationService(**options))
+
+    return asyncio.run(main())
+
+
+def test_sandbox_receipt_falls_back_to_sandbox(provider):
+    data = run_with_service(provider, lambda service: service.verify_apple_receipt("sandbox-receipt"))
+
+    assert data["status"] == 0
+    assert provider.calls == {"/verifyReceipt": 1, "/sandbox": 1}
+
+
+def test_google_retries_server_errors(provider):
+    provider.failures_left = {"token-1": 2, "token-2": 5}
+    data = run_with_service(
+        provider, lambda service: service.verify_google_receipt("token-1", "pro_plan_monthly", "com.axioma.app"),
+        retries=3,
+    )
+    assert data["paymentState"] == 1
+
+    with pytest.raises(ReceiptVerificationError):
+        run_with_service(
+            provider, lambda service: service.verify_google_receipt("token-2", "pro_plan_monthly", "com.axioma.app"),
+            retries=2,
+        )
+    assert provider.calls["/applications/com.axioma.app/purchases/subscriptions/pro_plan_monthly/tokens/token-2"] == 3
+
+
+def test_concurrent_calls_are_limited(provider):
+    provider.delay = 0.05
+
+    async def scenario(service):
+        return await asyncio.gather(*(service.verify_apple_receipt(f"receipt-{i}") for i in range(20)))
+
+    results = run_with_service(provider, scenario, concurrency=4)
+
+    assert all(data["status"] == 0 for data in results)
+    assert provider.calls["/verifyReceipt"] == 20
+    assert provider.max_in_flight <= 4
+
+
+def test_verified_receipts_are_cached(provider):
+    provider.delay = 0.02
+
+    async def scenario(service):
+        # Las peticiones simultáneas comparten una llamada; las siguientes salen de la caché
+        await asyncio.gather(*(service.verify_apple_receipt("receipt") for _ in range(5)))
+        return await service.verify_apple_receipt("receipt")
+
+    data = run_with_service(provider, scenario)
+
+    assert data["status"] == 0
+    assert provider.calls == {"/verifyReceipt": 1}
@@ -0,0 +1,32 @@
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils.ttl_cache import TTLCache
+
+
+def test_full_cache_drops_least_recently_used():
+    cache = TTLCache(ttl_seconds=60, max_entries=3)
+    for key in "abc":
+        cache.set(key, key.upper())
+    cache.get("a")  # "b" pasa a ser el menos usado
+    cache.set("d", "D")
+
+    assert len(cache) == 3
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["A", "C", "D"]
+
+
+def test_entries_expire_with_their_own_ttl():
+    cache = TTLCache(ttl_seconds=60)
+    cache.set("short", 1, ttl_seconds=0.05)
+    cache.set("long", 2)
+    cache.set("never", 3, ttl_seconds=0)
+    time.sleep(0.1)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert cache.get("never", "missing") == "missing"